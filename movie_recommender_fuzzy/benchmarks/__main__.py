@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from movie_recommender_fuzzy.benchmarks.compare import as_dict, compare_results, format_report
+from movie_recommender_fuzzy.benchmarks.suite import run_suite
+from movie_recommender_fuzzy.benchmarks.synthetic import write_dataset
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def _load(path: Path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _report(current: dict, baseline_path: Path, threshold: float) -> int:
+    comparisons = compare_results(current["results"], _load(baseline_path)["results"], threshold=threshold)
+    print(format_report(comparisons), file=sys.stderr)
+    return 1 if any(comparison.regression for comparison in comparisons) else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m movie_recommender_fuzzy.benchmarks",
+        description="Benchmarks sobre catálogos sintéticos, comparados contra una línea base.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = commands.add_parser("run", help="Corre la suite y escribe los resultados en JSON")
+    run_cmd.add_argument(
+        "--scales", type=int, nargs="+", default=[1_000, 10_000], help="Filas (películas e interacciones)"
+    )
+    run_cmd.add_argument("--sessions", type=int, default=50, help="Sesiones medidas por escala")
+    run_cmd.add_argument("--seed", type=int, default=0)
+    run_cmd.add_argument("--output", help="Archivo de resultados (por defecto, stdout)")
+    run_cmd.add_argument("--baseline", help=f"Línea base a comparar (p. ej. {DEFAULT_BASELINE.name})")
+    run_cmd.add_argument("--threshold", type=float, default=0.25, help="Empeoramiento tolerado (fracción)")
+    run_cmd.add_argument("--save-baseline", action="store_true", help=f"Guarda el resultado en {DEFAULT_BASELINE}")
+
+    compare_cmd = commands.add_parser("compare", help="Compara dos archivos de resultados")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("baseline", nargs="?", default=str(DEFAULT_BASELINE))
+    compare_cmd.add_argument("--threshold", type=float, default=0.25)
+    compare_cmd.add_argument("--json", action="store_true", help="Imprime la comparación como JSON")
+
+    generate_cmd = commands.add_parser("generate", help="Escribe movies.json + interactions.jsonl sintéticos")
+    generate_cmd.add_argument("--movies", type=int, required=True)
+    generate_cmd.add_argument("--interactions", type=int, default=0)
+    generate_cmd.add_argument("--seed", type=int, default=0)
+    generate_cmd.add_argument("--output-dir", required=True)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        write_dataset(Path(args.output_dir), args.movies, args.interactions, seed=args.seed)
+        return
+
+    if args.command == "compare":
+        current = _load(Path(args.current))
+        if args.json:
+            comparisons = compare_results(current["results"], _load(Path(args.baseline))["results"], args.threshold)
+            print(json.dumps([as_dict(comparison) for comparison in comparisons], indent=2))
+            sys.exit(1 if any(comparison.regression for comparison in comparisons) else 0)
+        sys.exit(_report(current, Path(args.baseline), args.threshold))
+
+    document = run_suite(args.scales, seed=args.seed, sessions=args.sessions)
+    text = json.dumps(document, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.save_baseline:
+        DEFAULT_BASELINE.write_text(text + "\n", encoding="utf-8")
+    if args.baseline:
+        sys.exit(_report(document, Path(args.baseline), args.threshold))
+
+
+if __name__ == "__main__":
+    main()
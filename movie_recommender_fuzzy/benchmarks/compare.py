@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping
+
+
+@dataclass
+class Comparison:
+    """Un resultado frente a la línea base. `change` > 0 significa peor."""
+
+    name: str
+    unit: str
+    baseline: float
+    current: float
+    change: float
+    regression: bool
+
+
+def compare_results(
+    current: Mapping[str, Mapping[str, object]],
+    baseline: Mapping[str, Mapping[str, object]],
+    threshold: float = 0.25,
+) -> List[Comparison]:
+    """Compara los resultados comunes a ambos documentos.
+
+    Un resultado es regresión si empeora más de `threshold` (fracción) según
+    su dirección (`better`: "higher" o "lower").
+    """
+    comparisons: List[Comparison] = []
+    for name in sorted(current.keys() & baseline.keys()):
+        now, before = current[name], baseline[name]
+        base_value, value = float(before["value"]), float(now["value"])
+        if base_value == 0:
+            change = 0.0
+        elif now.get("better") == "higher":
+            change = (base_value - value) / base_value
+        else:
+            change = (value - base_value) / base_value
+        comparisons.append(
+            Comparison(
+                name=name,
+                unit=str(now.get("unit", "")),
+                baseline=base_value,
+                current=value,
+                change=change,
+                regression=change > threshold,
+            )
+        )
+    return comparisons
+
+
+def format_report(comparisons: List[Comparison]) -> str:
+    """Tabla de texto con una fila por resultado (cuánto empeoró); las regresiones se marcan con `!!`."""
+    width = max((len(comparison.name) for comparison in comparisons), default=10)
+    lines = [f"{'benchmark':<{width}}  {'baseline':>12}  {'actual':>12}  {'empeora':>8}"]
+    for comparison in comparisons:
+        flag = "  !!" if comparison.regression else ""
+        lines.append(
+            f"{comparison.name:<{width}}  {comparison.baseline:>12.4g}  {comparison.current:>12.4g}"
+            f"  {comparison.change * 100:>+7.1f}%{flag}"
+        )
+    regressions = sum(comparison.regression for comparison in comparisons)
+    lines.append(f"{regressions} regresiones de {len(comparisons)} resultados comparados")
+    return "\n".join(lines)
+
+
+def as_dict(comparison: Comparison) -> Dict[str, object]:
+    return {
+        "name": comparison.name,
+        "unit": comparison.unit,
+        "baseline": comparison.baseline,
+        "current": comparison.current,
+        "change": round(comparison.change, 4),
+        "regression": comparison.regression,
+    }
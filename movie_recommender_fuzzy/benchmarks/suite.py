@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence
+
+from movie_recommender_fuzzy.benchmarks.synthetic import synthetic_interactions, synthetic_movies, synthetic_sessions
+from movie_recommender_fuzzy.domain.models import Interaction
+from movie_recommender_fuzzy.infra.catalog_writer import write_catalog
+from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.db_sqlite import SQLiteDB
+from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository, SQLiteInteractionRepository
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.infra.session_repository import SessionRepository, SQLiteSessionRepository
+from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyEngine
+from movie_recommender_fuzzy.services.preference_service import PreferenceService
+from movie_recommender_fuzzy.services.recommendation_service import RecommendationService
+from movie_recommender_fuzzy.services.session_service import SessionService
+
+# Resultado: nombre → {"value", "unit", "better": "higher" | "lower"}.
+Results = Dict[str, Dict[str, object]]
+
+# Valoraciones por sesión en los benchmarks de servicios (el objetivo por defecto de la app).
+SESSION_RATINGS = 20
+# Repeticiones de cada micro-benchmark; se reporta la mejor, la menos afectada por ruido.
+REPEAT = 5
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def best_seconds_per_op(run_batch: Callable[[], int], repeat: int = REPEAT) -> float:
+    """Mejor tiempo por operación en `repeat` corridas de `run_batch` (que devuelve cuántas hizo).
+
+    Como en `timeit`, el mínimo es lo más estable: el resto de las corridas
+    solo agrega interferencias de la máquina.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operations = run_batch()
+        best = min(best, (time.perf_counter() - started) / max(1, operations))
+    return best
+
+
+def latencies_ms(calls: Iterable[Callable[[], object]]) -> List[float]:
+    samples = []
+    for call in calls:
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _metric(results: Results, name: str, value: float, unit: str, better: str) -> None:
+    results[name] = {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def _per_op_us(results: Results, name: str, run_batch: Callable[[], int], repeat: int = REPEAT) -> None:
+    _metric(results, f"{name}.us_per_op", best_seconds_per_op(run_batch, repeat) * 1e6, "us", "lower")
+
+
+def _latency_metrics(results: Results, name: str, samples: Sequence[float]) -> None:
+    _metric(results, f"{name}.p50_ms", percentile(samples, 50), "ms", "lower")
+    _metric(results, f"{name}.p99_ms", percentile(samples, 99), "ms", "lower")
+
+
+def bench_fuzzy_engine(results: Results, seed: int = 0) -> None:
+    """Micro: evaluaciones por segundo del motor difuso, con y sin desglose y en lote."""
+    rng = random.Random(seed)
+    inputs = [(rng.random(), rng.random(), rng.random()) for _ in range(500)]
+    engine = FuzzyEngine()
+
+    def plain() -> int:
+        for affinity, popularity, similarity in inputs:
+            engine.compute_relevance(affinity, popularity, similarity)
+        return len(inputs)
+
+    def breakdown() -> int:
+        for affinity, popularity, similarity in inputs:
+            engine.compute_relevance_with_breakdown(affinity, popularity, similarity)
+        return len(inputs)
+
+    def batch() -> int:
+        return len(engine.compute_relevance_many(inputs))
+
+    _metric(results, "micro.fuzzy_engine.evals_per_s", 1 / best_seconds_per_op(plain), "ops/s", "higher")
+    _metric(results, "micro.fuzzy_engine_breakdown.evals_per_s", 1 / best_seconds_per_op(breakdown), "ops/s", "higher")
+    _metric(results, "micro.fuzzy_engine_batch.evals_per_s", 1 / best_seconds_per_op(batch), "ops/s", "higher")
+
+
+def bench_repositories(results: Results, scale: int, seed: int = 0, lookups: int = 200) -> None:
+    """Micro: carga y consultas de los repositorios con `scale` películas e interacciones."""
+    rng = random.Random(seed)
+    tag = f"[n={scale}]"
+    movies = list(synthetic_movies(scale, seed=seed))
+    interactions = list(synthetic_interactions(scale, scale, seed=seed))
+
+    def load_movies() -> int:
+        MovieRepository(InMemoryDB()).add_movies(movies)
+        return scale
+
+    def load_interactions() -> int:
+        InteractionRepository(InMemoryDB()).add_many(interactions)
+        return scale
+
+    _metric(
+        results, f"micro.movies.add_rows_per_s{tag}", 1 / best_seconds_per_op(load_movies, 3), "rows/s", "higher"
+    )
+    _metric(
+        results,
+        f"micro.interactions.add_rows_per_s{tag}",
+        1 / best_seconds_per_op(load_interactions, 3),
+        "rows/s",
+        "higher",
+    )
+
+    db = InMemoryDB()
+    movie_repo = MovieRepository(db)
+    movie_repo.add_movies(movies)
+    interaction_repo = InteractionRepository(db)
+    interaction_repo.add_many(interactions)
+    id_batches = [[rng.randint(1, scale) for _ in range(100)] for _ in range(lookups)]
+    session_ids = [rng.randint(1, interactions[-1].session_id) for _ in range(lookups)]
+
+    def get_many() -> int:
+        for ids in id_batches:
+            movie_repo.get_many(ids)
+        return len(id_batches)
+
+    def list_top_popular() -> int:
+        movie_repo.list_top_popular()
+        return 1
+
+    def list_by_session() -> int:
+        for session_id in session_ids:
+            interaction_repo.list_by_session(session_id)
+        return len(session_ids)
+
+    _per_op_us(results, f"micro.movies.get_many_100{tag}", get_many)
+    _per_op_us(results, f"micro.movies.list_top_popular{tag}", list_top_popular)
+    _per_op_us(results, f"micro.interactions.list_by_session{tag}", list_by_session)
+
+
+def _build_repositories(scale: int, sessions: int, seed: int):
+    db = InMemoryDB()
+    movie_repo = MovieRepository(db)
+    movie_repo.add_movies(synthetic_movies(scale, seed=seed))
+    session_repo = SessionRepository(db)
+    # Objetivo alto: las sesiones siguen activas durante todas las repeticiones.
+    session_repo.add_many(synthetic_sessions(sessions, target_ratings=SESSION_RATINGS * 10, seed=seed))
+    interaction_repo = InteractionRepository(db)
+    interaction_repo.add_many(
+        synthetic_interactions(sessions * SESSION_RATINGS, scale, per_session=SESSION_RATINGS, seed=seed)
+    )
+    return movie_repo, session_repo, interaction_repo
+
+
+def bench_services(results: Results, scale: int, seed: int = 0, sessions: int = 50) -> None:
+    """Micro de servicios y macro de recomendación de punta a punta sobre `scale` películas.
+
+    `recommend.cold` es el primer cálculo de una sesión (sin estado previo) y
+    `recommend.incremental` el re-ranking tras una valoración nueva; de ambos
+    se reportan p50 y p99 sobre `sessions` sesiones de 20 valoraciones.
+    """
+    tag = f"[n={scale}]"
+    movie_repo, session_repo, interaction_repo = _build_repositories(scale, sessions, seed)
+    preference_service = PreferenceService(interaction_repo, movie_repo)
+    session_ids = list(range(1, sessions + 1))
+
+    def build_profiles() -> int:
+        for session_id in session_ids:
+            preference_service.build_user_profile(1, session_id=session_id)
+        return len(session_ids)
+
+    def first_movies() -> int:
+        # Servicio nuevo en cada corrida: mide la construcción del pool de la sesión.
+        service = SessionService(session_repo, interaction_repo, movie_repo, seed=seed)
+        for session_id in session_ids:
+            service.get_next_movie(session_id)
+        return len(session_ids)
+
+    session_service = SessionService(session_repo, interaction_repo, movie_repo, seed=seed)
+    for session_id in session_ids:
+        session_service.get_next_movie(session_id)
+
+    def swipes() -> int:
+        for session_id in session_ids:
+            movie = session_service.get_next_movie(session_id)
+            session_service.register_decision(session_id, movie.id, Interaction.LIKE)
+        return len(session_ids)
+
+    _per_op_us(results, f"micro.preference.build_profile{tag}", build_profiles)
+    _per_op_us(results, f"micro.session.first_movie{tag}", first_movies)
+    _per_op_us(results, f"micro.session.swipe{tag}", swipes)
+
+    recommender = RecommendationService(movie_repo, interaction_repo, preference_service, FuzzyEngine())
+    _latency_metrics(
+        results,
+        f"macro.recommend.cold{tag}",
+        latencies_ms(
+            lambda sid=sid: recommender.recommend_movies(1, sid, k=10, include_breakdown=True) for sid in session_ids
+        ),
+    )
+
+    rng = random.Random(seed)
+
+    def rate_and_rerank(session_id: int) -> None:
+        session_service.rate_recommendation(session_id, rng.randint(1, scale), rng.randint(1, 5))
+        recommender.recommend_movies(1, session_id, k=10, include_breakdown=True)
+
+    _latency_metrics(
+        results,
+        f"macro.recommend.incremental{tag}",
+        latencies_ms(lambda sid=sid: rate_and_rerank(sid) for sid in session_ids),
+    )
+
+
+def bench_bulk_writes(results: Results, scale: int, seed: int = 0, rows: int = 200) -> None:
+    """Micro: µs por fila al importar decisiones una a una o con `register_decisions`.
+
+    Cada corrida registra `rows` decisiones en una sesión nueva, en memoria y
+    sobre SQLite; el lote ahorra sobre todo las transacciones por fila.
+    """
+    tag = f"[n={scale}]"
+    rng = random.Random(seed)
+    movies = list(synthetic_movies(scale, seed=seed))
+    decisions = [
+        (rng.randint(1, scale), rng.choice((Interaction.LIKE, Interaction.DISLIKE, Interaction.NOT_SEEN)), None)
+        for _ in range(rows)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = InMemoryDB()
+        store = SQLiteDB(Path(tmp) / "sessions.db")
+        backends = {
+            "": (SessionRepository(memory), InteractionRepository(memory)),
+            ".sqlite": (SQLiteSessionRepository(store), SQLiteInteractionRepository(store)),
+        }
+        movie_repo = MovieRepository(memory)
+        movie_repo.add_movies(movies)
+        for suffix, (session_repo, interaction_repo) in backends.items():
+            service = SessionService(session_repo, interaction_repo, movie_repo, seed=seed)
+
+            def per_row() -> int:
+                session = service.start_session(user_id=1, target_ratings=rows)
+                for movie_id, decision, score in decisions:
+                    service.register_decision(session.id, movie_id, decision, score)
+                return rows
+
+            def batch() -> int:
+                session = service.start_session(user_id=1, target_ratings=rows)
+                service.register_decisions(session.id, decisions)
+                return rows
+
+            _per_op_us(results, f"micro.session.register_row{suffix}{tag}", per_row)
+            _per_op_us(results, f"micro.session.register_batch{suffix}{tag}", batch)
+        store.close()
+
+
+def bench_metrics_overhead(results: Results, scale: int, seed: int = 0, requests: int = 20) -> None:
+    """Macro: µs por petición HTTP con `APP_METRICS` apagado y prendido, y su cociente.
+
+    Con el cliente de pruebas de Flask se preparan dos sesiones por app: una a
+    mitad de camino y otra completa. Cada corrida hace `requests` GET a
+    `/swipe` en la primera y otros tantos a `/results` en la segunda; son
+    peticiones sin escrituras ni cálculos en segundo plano, así que repetirlas
+    mide siempre lo mismo. Las corridas de ambas apps se alternan para que el
+    ruido de la máquina les toque a las dos por igual; el objetivo de la
+    instrumentación es un cociente de 1,02 o menos.
+
+    Como en una máquina ruidosa esa diferencia queda por debajo del ruido, se
+    reporta también una estimación estable: registros por petición
+    (`Metrics.records`) por el costo de un registro medido aislado, sobre el
+    tiempo de la app sin métricas.
+    """
+    # Import diferido: la suite no necesita Flask salvo para este benchmark.
+    from movie_recommender_fuzzy.services.metrics import Metrics
+    from movie_recommender_fuzzy.web.app import create_app
+
+    tag = f"[n={scale}]"
+
+    def rated_session(client, ratings: int) -> None:
+        client.get("/start")
+        movies = client.get(f"/api/swipe/next?count={ratings}").get_json()["movies"]
+        for index, movie in enumerate(movies):
+            decision = Interaction.LIKE if index % 2 == 0 else Interaction.DISLIKE
+            client.post("/swipe", data={"movie_id": movie["id"], "decision": decision})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = Path(tmp) / "movies.json"
+        write_catalog(catalog, (asdict(movie) for movie in synthetic_movies(scale, seed=seed)))
+        previous = os.environ.get("APP_METRICS")
+        flows = {}
+        records_per_request = 0.0
+        try:
+            for enabled in (False, True):
+                os.environ["APP_METRICS"] = "1" if enabled else ""
+                app = create_app(data_path=catalog, lazy=False)
+                swiping, finished = app.test_client(), app.test_client()
+                rated_session(swiping, SESSION_RATINGS // 2)
+                rated_session(finished, SESSION_RATINGS)
+
+                def flow(swiping=swiping, finished=finished) -> int:
+                    for _ in range(requests):
+                        swiping.get("/swipe")
+                        finished.get("/results")
+                    return 2 * requests
+
+                flows[enabled] = flow
+                if enabled:
+                    metrics = app.extensions["metrics"]
+                    before = metrics.records
+                    made = flow()
+                    records_per_request = (metrics.records - before) / made
+        finally:
+            if previous is None:
+                os.environ.pop("APP_METRICS", None)
+            else:
+                os.environ["APP_METRICS"] = previous
+
+        best = {enabled: float("inf") for enabled in flows}
+        # La diferencia buscada (~2%) es menor que el ruido de una corrida: hacen falta más rondas que en el resto.
+        for round_number in range(4 * REPEAT):
+            # El orden se invierte en cada ronda: ninguna de las dos corre siempre primero.
+            for enabled in (False, True) if round_number % 2 == 0 else (True, False):
+                best[enabled] = min(best[enabled], best_seconds_per_op(flows[enabled], repeat=1))
+
+    recorder = Metrics()
+
+    def records() -> int:
+        # Mezcla de lo que se registra por petición: etapas y métricas HTTP con etiquetas.
+        for _ in range(1000):
+            with recorder.stage("bench"):
+                pass
+            recorder.inc("http_requests_total", endpoint="results", method="GET", status="200")
+        return 2000
+
+    estimate = 1 + records_per_request * best_seconds_per_op(records) / best[False]
+    _metric(results, f"macro.http.request{tag}.us_per_op", best[False] * 1e6, "us", "lower")
+    _metric(results, f"macro.http.request.metrics{tag}.us_per_op", best[True] * 1e6, "us", "lower")
+    _metric(results, f"macro.http.metrics_overhead{tag}.ratio", best[True] / best[False], "x", "lower")
+    _metric(results, f"macro.http.metrics_overhead_estimate{tag}.ratio", estimate, "x", "lower")
+
+
+def run_suite(scales: Sequence[int] = (1_000, 10_000), seed: int = 0, sessions: int = 50) -> Dict[str, object]:
+    """Corre todos los benchmarks y devuelve el documento JSON de resultados."""
+    results: Results = {}
+    bench_fuzzy_engine(results, seed=seed)
+    for scale in scales:
+        bench_repositories(results, scale, seed=seed)
+        bench_services(results, scale, seed=seed, sessions=sessions)
+        bench_bulk_writes(results, scale, seed=seed)
+        bench_metrics_overhead(results, scale, seed=seed)
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "scales": list(scales),
+            "seed": seed,
+            "sessions": sessions,
+        },
+        "results": results,
+    }
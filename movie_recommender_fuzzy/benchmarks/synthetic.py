@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import random
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+from movie_recommender_fuzzy.domain.models import Interaction, Movie, Session
+from movie_recommender_fuzzy.infra.catalog_writer import write_catalog
+
+# Géneros con pesos parecidos a los del catálogo real de TMDb (Drama domina).
+GENRE_WEIGHTS = {
+    "Drama": 580,
+    "Comedy": 193,
+    "Animation": 161,
+    "Romance": 161,
+    "Adventure": 155,
+    "Crime": 142,
+    "Thriller": 141,
+    "Action": 140,
+    "Fantasy": 119,
+    "Family": 106,
+    "Science Fiction": 89,
+    "History": 81,
+    "Mystery": 67,
+    "War": 62,
+    "Music": 35,
+    "Documentary": 34,
+    "Horror": 26,
+    "Western": 23,
+    "TV Movie": 11,
+}
+# Mezcla de decisiones de un swipe: Like, Dislike, No la vi.
+DECISION_WEIGHTS = {Interaction.LIKE: 0.45, Interaction.DISLIKE: 0.35, Interaction.NOT_SEEN: 0.20}
+EPOCH = datetime(2024, 1, 1)
+
+
+def synthetic_movies(count: int, seed: int = 0) -> Iterator[Movie]:
+    """Catálogo sintético de `count` películas, reproducible para una misma `seed`.
+
+    Se genera de a una (sirve para millones de filas). La popularidad decrece
+    con el id como en una cola larga, así que las 100 primeras son el top 100.
+    """
+    rng = random.Random(f"movies:{seed}")
+    genres, weights = list(GENRE_WEIGHTS), list(GENRE_WEIGHTS.values())
+    for movie_id in range(1, count + 1):
+        picked = rng.choices(genres, weights=weights, k=rng.choice((1, 1, 2, 2, 2, 3)))
+        yield Movie(
+            id=movie_id,
+            title=f"Synthetic {movie_id}",
+            year=rng.randint(1950, 2024),
+            genres=list(dict.fromkeys(picked)),
+            duration_minutes=rng.choice((None, rng.randint(75, 190))),
+            popularity=round(30.0 / (1.0 + movie_id / 50.0) * rng.uniform(0.9, 1.1), 4),
+            rating=round(min(10.0, max(1.0, rng.gauss(6.6, 1.0))), 1),
+            is_top_100=movie_id <= 100,
+        )
+
+
+def synthetic_sessions(count: int, users: int = 1000, target_ratings: int = 20, seed: int = 0) -> Iterator[Session]:
+    """Sesiones `1..count` repartidas entre `users` usuarios."""
+    rng = random.Random(f"sessions:{seed}")
+    for session_id in range(1, count + 1):
+        yield Session(
+            id=session_id,
+            user_id=rng.randint(1, users),
+            started_at=EPOCH + timedelta(minutes=session_id),
+            target_ratings=target_ratings,
+        )
+
+
+def synthetic_interactions(
+    count: int, movie_count: int, per_session: int = 25, users: int = 1000, seed: int = 0
+) -> Iterator[Interaction]:
+    """Log de `count` interacciones: `per_session` por sesión, sesgadas hacia las películas populares.
+
+    Las sesiones coinciden con las de `synthetic_sessions` (mismos ids y usuarios
+    si se usan la misma `seed` y `users`).
+    """
+    rng = random.Random(f"interactions:{seed}")
+    session_users = synthetic_sessions((count + per_session - 1) // per_session, users=users, seed=seed)
+    decisions, weights = list(DECISION_WEIGHTS), list(DECISION_WEIGHTS.values())
+    session = None
+    for interaction_id in range(1, count + 1):
+        if (interaction_id - 1) % per_session == 0:
+            session = next(session_users)
+        yield Interaction(
+            id=interaction_id,
+            user_id=session.user_id,
+            # Cuadrado de un uniforme: más peso a los ids bajos (los más populares).
+            movie_id=1 + int(movie_count * rng.random() ** 2),
+            session_id=session.id,
+            decision=rng.choices(decisions, weights=weights)[0],
+            timestamp=EPOCH + timedelta(seconds=interaction_id),
+        )
+
+
+def write_dataset(
+    directory: Path, movies: int, interactions: int = 0, per_session: int = 25, seed: int = 0
+) -> None:
+    """Escribe `movies.json` (mismo formato que `data/movies.json`) e `interactions.jsonl` en streaming."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    write_catalog(directory / "movies.json", (asdict(movie) for movie in synthetic_movies(movies, seed=seed)))
+    if not interactions:
+        return
+    with (directory / "interactions.jsonl").open("w", encoding="utf-8") as handle:
+        for interaction in synthetic_interactions(interactions, movies, per_session=per_session, seed=seed):
+            row = asdict(interaction)
+            row["timestamp"] = interaction.timestamp.isoformat()
+            handle.write(json.dumps(row, separators=(",", ":")) + "\n")
@@ -47,9 +47,9 @@ class Session:
         """Indica si se alcanzaron las valoraciones requeridas."""
         return self.valid_ratings_count >= self.target_ratings
 
-    def increment_valid_ratings(self) -> None:
+    def increment_valid_ratings(self, amount: int = 1) -> None:
         """Incrementa el contador de valoraciones válidas."""
-        self.valid_ratings_count += 1
+        self.valid_ratings_count += amount
 
     def mark_completed(self) -> None:
         """Marca la sesión como completada y registra su cierre."""
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 from .models import Interaction, Movie
 
+# Por debajo de esta fracción de lo acumulado, lo que queda tras restar se considera cero.
+_RESIDUE = 1e-9
+
 
 @dataclass
 class UserPreferenceProfile:
@@ -23,71 +27,185 @@ class UserPreferenceProfile:
         self, interactions: List[Interaction], movies_by_id: Dict[int, Movie]
     ) -> None:
         """Recalcula afinidades y rating preferido a partir de interacciones."""
-        likes_by_genre: Dict[str, int] = {}
-        dislikes_by_genre: Dict[str, int] = {}
-        score_sum_by_genre: Dict[str, int] = {}
-        score_count_by_genre: Dict[str, int] = {}
-        liked_ratings: List[float] = []
-
+        stats = LongTermProfile(user_id=self.user_id)
         for interaction in interactions:
-            if not interaction.is_valid_rating():
-                continue
-
             movie = movies_by_id.get(interaction.movie_id)
-            if movie is None or not movie.genres:
-                continue
-
-            score = interaction.score
-            if score is not None:
-                for raw in movie.genres:
-                    genre = raw.strip().lower()
-                    score_sum_by_genre[genre] = score_sum_by_genre.get(genre, 0) + score
-                    score_count_by_genre[genre] = score_count_by_genre.get(genre, 0) + 1
-                # Umbrales: 4-5 fuerte preferencia; 1-2 aversión; 3 neutro.
-                if score >= 4:
-                    for raw in movie.genres:
-                        genre = raw.strip().lower()
-                        likes_by_genre[genre] = likes_by_genre.get(genre, 0) + 1
-                    if movie.rating is not None:
-                        liked_ratings.append(movie.rating * (score / 5))
-                elif score <= 2:
-                    for raw in movie.genres:
-                        genre = raw.strip().lower()
-                        dislikes_by_genre[genre] = dislikes_by_genre.get(genre, 0) + 1
-            else:
-                if interaction.decision == Interaction.LIKE:
-                    for raw in movie.genres:
-                        genre = raw.strip().lower()
-                        likes_by_genre[genre] = likes_by_genre.get(genre, 0) + 1
-                    if movie.rating is not None:
-                        liked_ratings.append(movie.rating)
-                elif interaction.decision == Interaction.DISLIKE:
-                    for raw in movie.genres:
-                        genre = raw.strip().lower()
-                        dislikes_by_genre[genre] = dislikes_by_genre.get(genre, 0) + 1
+            if movie is not None:
+                stats.add(interaction, movie)
+        scored = stats.to_preference_profile()
+        self.genre_affinities = scored.genre_affinities
+        self.preferred_rating = scored.preferred_rating
+
+
+def _score_affinity(avg: float) -> float:
+    """Afinidad de un puntaje medio: 2 o menos -> 0, 5 -> 1, lineal entre medio."""
+    return max(0.0, min(1.0, (avg - 2.0) / 3.0))
+
+
+def decay_factor(elapsed: timedelta, half_life_days: float) -> float:
+    """Fracción que conserva un peso tras `elapsed`: la mitad cada `half_life_days` días.
+
+    Nunca pasa de 1 (un `elapsed` negativo cuenta como 0), así que no desborda
+    con vidas medias cortas; a lo sumo se hace 0 para lo muy viejo.
+    """
+    return 2.0 ** (-max(0.0, elapsed.total_seconds()) / (half_life_days * 86400.0))
+
+
+def _minus(total: float, part: float) -> float:
+    # Lo que queda de restar lo ya sumado; el error de redondeo no debe dejar restos.
+    rest = total - part
+    return rest if rest > _RESIDUE * total else 0.0
+
+
+@dataclass
+class GenreStats:
+    """Sumas ponderadas (con decaimiento) de las valoraciones de un género."""
+
+    likes: float = 0.0
+    dislikes: float = 0.0
+    score_sum: float = 0.0
+    score_weight: float = 0.0
+
+    def add(self, other: "GenreStats", factor: float = 1.0) -> None:
+        self.likes += other.likes * factor
+        self.dislikes += other.dislikes * factor
+        self.score_sum += other.score_sum * factor
+        self.score_weight += other.score_weight * factor
+
+    def subtract(self, other: "GenreStats", factor: float = 1.0) -> None:
+        self.likes = _minus(self.likes, other.likes * factor)
+        self.dislikes = _minus(self.dislikes, other.dislikes * factor)
+        self.score_sum = _minus(self.score_sum, other.score_sum * factor)
+        self.score_weight = _minus(self.score_weight, other.score_weight * factor)
+
+    def scale(self, factor: float) -> None:
+        self.likes *= factor
+        self.dislikes *= factor
+        self.score_sum *= factor
+        self.score_weight *= factor
 
+
+@dataclass
+class LongTermProfile:
+    """Preferencias de un usuario a lo largo de todas sus sesiones, con decaimiento temporal.
+
+    Las sumas están expresadas a la fecha `last_update`: al llegar algo más
+    nuevo primero se envejecen (`decay_to`) y después se suma con peso 1; lo
+    más viejo que `last_update` entra ya envejecido. Se actualiza sumando
+    (`record`, `merge`), sin releer el historial, y se convierte en un
+    `UserPreferenceProfile` recorriendo solo sus géneros.
+    """
+
+    user_id: int
+    genres: Dict[str, GenreStats] = field(default_factory=dict)
+    rating_sum: float = 0.0
+    rating_weight: float = 0.0
+    last_update: Optional[datetime] = None
+
+    def add(self, interaction: Interaction, movie: Movie, weight: float = 1.0) -> None:
+        """Suma una interacción con peso `weight`: 4-5 es like, 1-2 dislike y 3 neutro."""
+        if not interaction.is_valid_rating() or not movie.genres:
+            return
+        delta = GenreStats()
+        score = interaction.score
+        liked_rating: Optional[float] = None
+        if score is not None:
+            delta.score_sum, delta.score_weight = score * weight, weight
+            if score >= 4:
+                delta.likes = weight
+                liked_rating = movie.rating * (score / 5) if movie.rating is not None else None
+            elif score <= 2:
+                delta.dislikes = weight
+        elif interaction.decision == Interaction.LIKE:
+            delta.likes = weight
+            liked_rating = movie.rating
+        elif interaction.decision == Interaction.DISLIKE:
+            delta.dislikes = weight
+
+        for genre in {raw.strip().lower() for raw in movie.genres}:
+            self.genres.setdefault(genre, GenreStats()).add(delta)
+        if liked_rating is not None:
+            self.rating_sum += liked_rating * weight
+            self.rating_weight += weight
+
+    def decay_to(self, when: datetime, half_life_days: float) -> None:
+        """Envejece lo acumulado hasta `when`; no hace nada si `when` no es posterior a `last_update`."""
+        if self.last_update is not None and when <= self.last_update:
+            return
+        if self.last_update is not None:
+            factor = decay_factor(when - self.last_update, half_life_days)
+            for stats in self.genres.values():
+                stats.scale(factor)
+            self.rating_sum *= factor
+            self.rating_weight *= factor
+        self.last_update = when
+
+    def record(self, interaction: Interaction, movie: Movie, half_life_days: float) -> None:
+        """Suma una interacción con el peso que le corresponde por su antigüedad."""
+        if not interaction.is_valid_rating() or not movie.genres:
+            return
+        self.decay_to(interaction.timestamp, half_life_days)
+        self.add(interaction, movie, decay_factor(self.last_update - interaction.timestamp, half_life_days))
+
+    def merge(self, other: "LongTermProfile", half_life_days: float) -> None:
+        """Acumula en este perfil lo sumado en `other` (del mismo usuario)."""
+        if other.last_update is None:
+            return
+        self.decay_to(other.last_update, half_life_days)
+        factor = decay_factor(self.last_update - other.last_update, half_life_days)
+        for genre, stats in other.genres.items():
+            self.genres.setdefault(genre, GenreStats()).add(stats, factor)
+        self.rating_sum += other.rating_sum * factor
+        self.rating_weight += other.rating_weight * factor
+
+    def subtract(self, other: "LongTermProfile", half_life_days: float) -> None:
+        """Quita lo sumado en `other` (p. ej. la sesión actual, que ya se cuenta aparte)."""
+        if other.last_update is None or self.last_update is None:
+            return
+        factor = decay_factor(self.last_update - other.last_update, half_life_days)
+        for genre, stats in other.genres.items():
+            if genre in self.genres:
+                self.genres[genre].subtract(stats, factor)
+        self.rating_sum = _minus(self.rating_sum, other.rating_sum * factor)
+        self.rating_weight = _minus(self.rating_weight, other.rating_weight * factor)
+
+    def to_preference_profile(self) -> UserPreferenceProfile:
+        """Afinidad por género: del puntaje medio si hay puntajes, si no de likes/(likes+dislikes).
+
+        Si el perfil tiene algún puntaje, solo los géneros con puntajes reciben
+        afinidad, igual que en `UserPreferenceProfile.update_from_interactions`.
+        """
         affinities: Dict[str, float] = {}
-        if score_count_by_genre:
-            for genre, total_score in score_sum_by_genre.items():
-                count = score_count_by_genre.get(genre, 1)
-                avg = total_score / count
-                # Solo contar afinidades desde 2 en adelante; 2 o menos -> 0, 5 -> 1
-                if avg <= 2.0:
-                    affinity = 0.0
-                elif avg >= 5.0:
-                    affinity = 1.0
-                else:
-                    affinity = (avg - 2.0) / 3.0
-                affinities[genre] = max(0.0, min(1.0, affinity))
+        if any(stats.score_weight > 0 for stats in self.genres.values()):
+            for genre, stats in self.genres.items():
+                if stats.score_weight > 0:
+                    affinities[genre] = _score_affinity(stats.score_sum / stats.score_weight)
         else:
-            for genre in set(likes_by_genre) | set(dislikes_by_genre):
-                likes = likes_by_genre.get(genre, 0)
-                dislikes = dislikes_by_genre.get(genre, 0)
-                total = likes + dislikes
-                if total > 0:
-                    affinities[genre] = likes / total
-
-        self.genre_affinities = affinities
-        self.preferred_rating = (
-            sum(liked_ratings) / len(liked_ratings) if liked_ratings else None
+            for genre, stats in self.genres.items():
+                if stats.likes + stats.dislikes > 0:
+                    affinities[genre] = stats.likes / (stats.likes + stats.dislikes)
+        return UserPreferenceProfile(
+            user_id=self.user_id,
+            genre_affinities=affinities,
+            preferred_rating=self.rating_sum / self.rating_weight if self.rating_weight > 0 else None,
         )
+
+
+def blend_profiles(
+    session: UserPreferenceProfile, long_term: UserPreferenceProfile, weight: float
+) -> UserPreferenceProfile:
+    """Mezcla el perfil de la sesión con el de largo plazo (`weight` es la parte del de largo plazo).
+
+    Un género que no aparece en uno de los dos cuenta 0 en ese lado: lo que
+    solo se conoce del historial suma poco y la sesión actual manda.
+    """
+    current, history = session.genre_affinities, long_term.genre_affinities
+    affinities = {
+        genre: (1 - weight) * current.get(genre, 0.0) + weight * history.get(genre, 0.0)
+        for genre in current.keys() | history.keys()
+    }
+    if session.preferred_rating is None or long_term.preferred_rating is None:
+        preferred = session.preferred_rating if session.preferred_rating is not None else long_term.preferred_rating
+    else:
+        preferred = (1 - weight) * session.preferred_rating + weight * long_term.preferred_rating
+    return UserPreferenceProfile(user_id=session.user_id, genre_affinities=affinities, preferred_rating=preferred)
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, MutableMapping, Optional, Set
+
+from movie_recommender_fuzzy.domain.models import Movie
+from movie_recommender_fuzzy.infra.catalog_snapshot import CatalogSnapshot, compile_snapshot, load_snapshot
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parents[1] / "data" / "movies.json"
+
+
+def movie_from_dict(item: Dict[str, object]) -> Movie:
+    """Convierte una entrada del JSON de catálogo en un `Movie` (géneros normalizados)."""
+    return Movie(
+        id=int(item["id"]),
+        title=str(item.get("title", "")),
+        year=int(item.get("year", 0)),
+        genres=[g.strip().lower() for g in (item.get("genres") or []) if g],
+        duration_minutes=item.get("duration_minutes"),
+        popularity=float(item.get("popularity", 0.0)),
+        rating=float(item["rating"]) if item.get("rating") is not None else None,
+        poster_url=item.get("poster_url"),
+        is_top_100=bool(item.get("is_top_100", False)),
+    )
+
+
+def load_movies(path: Path) -> List[Movie]:
+    """Carga películas desde el JSON generado por el loader de TMDb."""
+    if not path.exists():
+        raise FileNotFoundError(f"No se encontró el catálogo en {path}. Ejecuta el loader TMDb primero.")
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return [movie_from_dict(item) for item in data]
+
+
+def iter_catalog_items(path: Path, buffer_size: int = 1 << 16) -> Iterator[Dict[str, object]]:
+    """Recorre el arreglo JSON del catálogo elemento a elemento sin leerlo completo.
+
+    La memoria queda acotada por `buffer_size` más el tamaño del elemento más grande.
+    """
+    decoder = json.JSONDecoder()
+    with path.open("r", encoding="utf-8", buffering=buffer_size) as handle:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            chunk = handle.read(buffer_size)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip(chars: str) -> Optional[str]:
+            """Avanza sobre `chars` y devuelve el siguiente carácter significativo."""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not fill():
+                    return None
+
+        if skip(" \t\r\n") != "[":
+            raise ValueError(f"{path} no contiene un arreglo JSON")
+        pos += 1
+
+        expect_item = True
+        first = True
+        while True:
+            token = skip(" \t\r\n")
+            if token is None:
+                raise ValueError(f"{path}: arreglo JSON sin cerrar")
+            if token == "]":
+                if expect_item and not first:
+                    raise ValueError(f"{path}: coma sobrante antes de ']'")
+                return
+            if token == ",":
+                if expect_item:
+                    raise ValueError(f"{path}: coma inesperada")
+                pos += 1
+                expect_item = True
+                continue
+            if not expect_item:
+                raise ValueError(f"{path}: falta una coma entre elementos")
+
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof or not fill():
+                        raise
+                    continue
+                # El elemento podría estar truncado justo en el borde del buffer.
+                if end >= len(buffer) and not eof and fill():
+                    continue
+                break
+            pos = end
+            expect_item = False
+            first = False
+            yield item
+
+
+def iter_movies(path: Path, buffer_size: int = 1 << 16) -> Iterator[Movie]:
+    """Genera las películas del catálogo JSON a medida que se parsean."""
+    for item in iter_catalog_items(path, buffer_size=buffer_size):
+        yield movie_from_dict(item)
+
+
+def ingest_catalog(
+    path: Path,
+    movie_repository: MovieRepository,
+    chunk_size: int = 1000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Carga el catálogo en el repositorio por bloques; `progress` recibe el total acumulado."""
+    movies = iter_movies(path)
+    loaded = 0
+    while True:
+        chunk = list(islice(movies, chunk_size))
+        if not chunk:
+            break
+        movie_repository.add_movies(chunk)
+        loaded += len(chunk)
+        if progress is not None:
+            progress(loaded)
+    return loaded
+
+
+def snapshot_path_for(path: Path) -> Path:
+    """Ruta del snapshot binario asociado a un catálogo JSON."""
+    return path.with_suffix(".bin")
+
+
+def load_catalog(path: Path) -> MutableMapping[int, Movie]:
+    """Devuelve el catálogo `id → Movie`, usando el snapshot binario si está al día."""
+    snapshot = snapshot_path_for(path)
+    if snapshot.exists() and (not path.exists() or snapshot.stat().st_mtime >= path.stat().st_mtime):
+        try:
+            return load_snapshot(snapshot)
+        except ValueError:
+            # Snapshot de otra versión del formato u otro orden de bytes: se usa el JSON.
+            if not path.exists():
+                raise
+    if not path.exists():
+        raise FileNotFoundError(f"No se encontró el catálogo en {path}. Ejecuta el loader TMDb primero.")
+    return {movie.id: movie for movie in iter_movies(path)}
+
+
+def catalog_genres(catalog: MutableMapping[int, Movie]) -> List[str]:
+    """Lista ordenada de géneros del catálogo (sin materializar un snapshot)."""
+    if isinstance(catalog, CatalogSnapshot):
+        return sorted(catalog.genres())
+    found: Set[str] = {genre for movie in catalog.values() for genre in movie.genres}
+    return sorted(found)
+
+
+_COLD_START = {
+    "json": (
+        "from movie_recommender_fuzzy.infra.catalog import load_movies\n"
+        "catalog = {{m.id: m for m in load_movies(Path({path!r}))}}\n"
+    ),
+    "snapshot": (
+        "from movie_recommender_fuzzy.infra.catalog_snapshot import load_snapshot\n"
+        "catalog = load_snapshot(Path({path!r}))\n"
+    ),
+}
+
+
+def _cold_start_seconds(kind: str, path: Path) -> float:
+    """Mide en un proceso nuevo el tiempo de import + carga hasta servir la primera película."""
+    import subprocess
+    import sys
+
+    code = (
+        "import time\nstart = time.perf_counter()\nfrom pathlib import Path\n"
+        + _COLD_START[kind].format(path=str(path))
+        + "catalog[next(iter(catalog))]\nprint(time.perf_counter() - start)\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return float(output.stdout.strip())
+
+
+def benchmark_cold_start(json_path: Path, snapshot_path: Path, repeat: int = 5) -> Dict[str, float]:
+    """Compara el arranque en frío del loader JSON contra el snapshot (mediana en segundos)."""
+    import statistics
+
+    return {
+        kind: statistics.median(_cold_start_seconds(kind, path) for _ in range(repeat))
+        for kind, path in (("json", json_path), ("snapshot", snapshot_path))
+    }
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Herramientas del catálogo de películas.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compile_cmd = commands.add_parser("compile", help="Compila movies.json a un snapshot binario")
+    compile_cmd.add_argument("--input", default=str(DEFAULT_CATALOG_PATH), help="Catálogo JSON de entrada")
+    compile_cmd.add_argument("--output", default=None, help="Ruta del snapshot (por defecto, junto al JSON)")
+
+    bench_cmd = commands.add_parser("bench", help="Compara el arranque en frío JSON vs snapshot")
+    bench_cmd.add_argument("--input", default=str(DEFAULT_CATALOG_PATH), help="Catálogo JSON de entrada")
+    bench_cmd.add_argument("--repeat", type=int, default=5, help="Repeticiones por loader")
+
+    args = parser.parse_args()
+    json_path = Path(args.input)
+
+    if args.command == "compile":
+        output = Path(args.output) if args.output else snapshot_path_for(json_path)
+        count = compile_snapshot(iter_movies(json_path), output)
+        print(f"Snapshot con {count} películas guardado en {output}")
+        return
+
+    snapshot = snapshot_path_for(json_path)
+    if not snapshot.exists() or snapshot.stat().st_mtime < json_path.stat().st_mtime:
+        compile_snapshot(iter_movies(json_path), snapshot)
+    results = benchmark_cold_start(json_path, snapshot, repeat=args.repeat)
+    for kind, seconds in results.items():
+        print(f"{kind:>8}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, MutableMapping, Optional
+
+from movie_recommender_fuzzy.domain.models import Movie
+from movie_recommender_fuzzy.infra.catalog import iter_movies
+from movie_recommender_fuzzy.infra.catalog_snapshot import CatalogSnapshot
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+
+
+@dataclass
+class CatalogDiff:
+    """Diferencias entre el catálogo activo y uno nuevo."""
+
+    added: List[Movie] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    changed: List[Movie] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def size(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+
+@dataclass
+class ReloadResult:
+    """Resumen de una recarga: qué cambió, cómo se aplicó y cuánto tardó."""
+
+    diff: CatalogDiff
+    mode: str  # "noop", "delta" o "full"
+    build_seconds: float
+    swap_seconds: float
+    catalog_version: int
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "mode": self.mode,
+            "added": len(self.diff.added),
+            "removed": len(self.diff.removed),
+            "changed": len(self.diff.changed),
+            "build_ms": round(self.build_seconds * 1000, 3),
+            "swap_ms": round(self.swap_seconds * 1000, 3),
+            "catalog_version": self.catalog_version,
+        }
+
+
+def diff_catalogs(current: Mapping[int, Movie], new_movies: Mapping[int, Movie]) -> CatalogDiff:
+    """Compara dos catálogos `id → Movie` campo a campo.
+
+    Contra un `CatalogSnapshot` compara las columnas del archivo sin construir
+    las películas sin cambios.
+    """
+    diff = CatalogDiff()
+    snapshot = current if isinstance(current, CatalogSnapshot) else None
+    for movie_id, movie in new_movies.items():
+        if movie_id not in current:
+            diff.added.append(movie)
+        elif not (snapshot.matches(movie) if snapshot is not None else current[movie_id] == movie):
+            diff.changed.append(movie)
+    diff.removed = [movie_id for movie_id in current if movie_id not in new_movies]
+    return diff
+
+
+def apply_diff(current: Mapping[int, Movie], diff: CatalogDiff) -> MutableMapping[int, Movie]:
+    """Copia el catálogo aplicando el diff; las películas sin cambios conservan su instancia.
+
+    Un `CatalogSnapshot` no se copia: se deriva otro sobre el mismo archivo con
+    el diff en su capa en memoria, en O(diff). Un dict se copia (solo referencias).
+    """
+    if isinstance(current, CatalogSnapshot):
+        return current.with_changes(diff.added + diff.changed, diff.removed)
+    updated = dict(current)
+    for movie_id in diff.removed:
+        del updated[movie_id]
+    for movie in diff.added:
+        updated[movie.id] = movie
+    for movie in diff.changed:
+        updated[movie.id] = movie
+    return updated
+
+
+class CatalogReloader:
+    """Recarga `movies.json` en segundo plano y lo publica con un swap atómico.
+
+    El catálogo nuevo se construye fuera del camino de las peticiones. El
+    archivo se parsea completo siempre; si el cambio es acotado se aplica solo
+    el diff sobre el catálogo activo (ver `apply_diff`), y en cualquier caso el
+    reemplazo es una única asignación en `MovieRepository.swap_catalog`. Los `on_swap` se invocan tras cada swap
+    para reconstruir índices derivados.
+    """
+
+    def __init__(
+        self,
+        movie_repository: MovieRepository,
+        path: Path,
+        on_swap: Optional[Callable[[MutableMapping[int, Movie], ReloadResult], None]] = None,
+        full_rebuild_ratio: float = 0.5,
+    ):
+        self._movie_repository = movie_repository
+        self.path = Path(path)
+        self._on_swap = on_swap
+        self._full_rebuild_ratio = full_rebuild_ratio
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_mtime = self._mtime()
+        self.last_result: Optional[ReloadResult] = None
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return self.path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def reload(self) -> ReloadResult:
+        """Construye el catálogo nuevo y lo publica. Una recarga a la vez."""
+        with self._lock:
+            self._last_mtime = self._mtime()
+            started = time.perf_counter()
+            current = self._movie_repository.catalog()
+            fresh = {movie.id: movie for movie in iter_movies(self.path)}
+            diff = diff_catalogs(current, fresh)
+
+            if diff.is_empty():
+                result = ReloadResult(
+                    diff, "noop", time.perf_counter() - started, 0.0, self._movie_repository.catalog_version()
+                )
+                self.last_result = result
+                return result
+
+            if diff.size() <= self._full_rebuild_ratio * max(len(current), 1):
+                mode, updated = "delta", apply_diff(current, diff)
+            else:
+                mode, updated = "full", fresh
+            build_seconds = time.perf_counter() - started
+
+            swap_started = time.perf_counter()
+            self._movie_repository.swap_catalog(updated)
+            swap_seconds = time.perf_counter() - swap_started
+
+            result = ReloadResult(diff, mode, build_seconds, swap_seconds, self._movie_repository.catalog_version())
+            self.last_result = result
+            if self._on_swap is not None:
+                self._on_swap(updated, result)
+        return result
+
+    def reload_in_background(self) -> threading.Thread:
+        """Lanza la recarga en un hilo aparte y devuelve el hilo."""
+        thread = threading.Thread(target=self.reload, name="catalog-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def watch(self, interval: float = 5.0, ready: Optional[threading.Event] = None) -> None:
+        """Vigila el mtime del archivo y recarga cuando cambia.
+
+        Con `ready` empieza a vigilar recién cuando el evento se activa (p. ej.
+        al terminar la carga inicial del catálogo), para no competir con ella.
+        """
+        if self._watcher is not None:
+            return
+
+        def loop() -> None:
+            if ready is not None:
+                while not ready.wait(interval):
+                    if self._stop.is_set():
+                        return
+            while not self._stop.wait(interval):
+                mtime = self._mtime()
+                if mtime is not None and mtime != self._last_mtime:
+                    try:
+                        self.reload()
+                    except (OSError, ValueError):
+                        # Archivo a medio escribir o inválido: se mantiene el catálogo activo
+                        # y se reintenta en el próximo cambio de mtime.
+                        continue
+
+        self._watcher = threading.Thread(target=loop, name="catalog-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """Detiene el vigilante de archivo, si estaba activo."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def install_signal_handler(self, signum: Optional[int] = None, ready: Optional[threading.Event] = None) -> bool:
+        """Recarga al recibir la señal (SIGHUP por defecto). Solo posible en el hilo principal.
+
+        Con `ready`, las señales que llegan antes de que se active se ignoran.
+        """
+        signum = signum if signum is not None else getattr(signal, "SIGHUP", None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+
+        def handler(_signum, _frame) -> None:
+            if ready is None or ready.is_set():
+                self.reload_in_background()
+
+        signal.signal(signum, handler)
+        return True
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import copy
+import heapq
+import struct
+import sys
+from array import array
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from movie_recommender_fuzzy.domain.models import Movie
+
+# Formato binario del catálogo (todas las columnas en orden nativo de bytes):
+#   cabecera | ids q | years i | durations i | popularity d | rating d | flags B
+#   | title_sid I | poster_sid I | genre_offsets I (n+1) | genre_sids I
+#   | id_order I | popularity_order I | string_offsets I (m+1) | string_blob (utf-8)
+# Cada sección empieza alineada a 8 bytes. Los nulos se codifican como
+# -1 (enteros), NaN (flotantes) o NO_STRING (referencias a la tabla de cadenas).
+# `id_order` son las filas ordenadas por id (búsqueda binaria sin índice en
+# memoria) y `popularity_order` las filas por popularidad descendente
+# (empates en orden de fila), para servir el top sin recorrer el catálogo.
+MAGIC = b"MRFCAT02"
+NO_STRING = 0xFFFFFFFF
+FLAG_TOP_100 = 0x01
+
+_SECTIONS = (
+    ("ids", "q"),
+    ("years", "i"),
+    ("durations", "i"),
+    ("popularity", "d"),
+    ("rating", "d"),
+    ("flags", "B"),
+    ("title_sid", "I"),
+    ("poster_sid", "I"),
+    ("genre_offsets", "I"),
+    ("genre_sids", "I"),
+    ("id_order", "I"),
+    ("popularity_order", "I"),
+    ("string_offsets", "I"),
+    ("string_blob", "B"),
+)
+_HEADER = struct.Struct("<8sBxxxIII" + "Q" * len(_SECTIONS))
+_BYTEORDER = {"little": 0, "big": 1}
+
+
+class _StringTable:
+    """Tabla de cadenas internadas: cada texto distinto se guarda una sola vez."""
+
+    def __init__(self) -> None:
+        self._index: Dict[str, int] = {}
+        self._values: List[str] = []
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        sid = self._index.get(value)
+        if sid is None:
+            sid = len(self._values)
+            self._index[value] = sid
+            self._values.append(value)
+        return sid
+
+    def encode(self) -> tuple[array, bytes]:
+        offsets = array("I", [0])
+        chunks: List[bytes] = []
+        total = 0
+        for value in self._values:
+            raw = value.encode("utf-8")
+            chunks.append(raw)
+            total += len(raw)
+            offsets.append(total)
+        return offsets, b"".join(chunks)
+
+
+def compile_snapshot(movies: Iterable[Movie], target_path: Path) -> int:
+    """Escribe un snapshot binario del catálogo y devuelve la cantidad de películas."""
+    strings = _StringTable()
+    columns: Dict[str, array] = {name: array(code) for name, code in _SECTIONS if name != "string_blob"}
+    columns["genre_offsets"].append(0)
+
+    for movie in movies:
+        columns["ids"].append(int(movie.id))
+        columns["years"].append(int(movie.year))
+        columns["durations"].append(-1 if movie.duration_minutes is None else int(movie.duration_minutes))
+        columns["popularity"].append(float(movie.popularity))
+        columns["rating"].append(math.nan if movie.rating is None else float(movie.rating))
+        columns["flags"].append(FLAG_TOP_100 if movie.is_top_100 else 0)
+        columns["title_sid"].append(strings.intern(movie.title))
+        columns["poster_sid"].append(strings.intern(movie.poster_url))
+        columns["genre_sids"].extend(strings.intern(genre) for genre in movie.genres)
+        columns["genre_offsets"].append(len(columns["genre_sids"]))
+
+    ids, popularity = columns["ids"], columns["popularity"]
+    columns["id_order"] = array("I", sorted(range(len(ids)), key=ids.__getitem__))
+    columns["popularity_order"] = array("I", sorted(range(len(ids)), key=lambda row: -popularity[row]))
+    string_offsets, blob = strings.encode()
+    columns["string_offsets"] = string_offsets
+    payloads = [columns[name].tobytes() if name != "string_blob" else blob for name, _code in _SECTIONS]
+
+    offsets: List[int] = []
+    position = _HEADER.size
+    for payload in payloads:
+        position += -position % 8
+        offsets.append(position)
+        position += len(payload)
+
+    count = len(columns["ids"])
+    header = _HEADER.pack(
+        MAGIC, _BYTEORDER[sys.byteorder], count, len(columns["genre_sids"]), len(string_offsets) - 1, *offsets
+    )
+
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target_path.with_name(target_path.name + ".tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(header)
+        for offset, payload in zip(offsets, payloads):
+            handle.write(b"\0" * (offset - handle.tell()))
+            handle.write(payload)
+    os.replace(tmp_path, target_path)
+    return count
+
+
+class CatalogSnapshot(MutableMapping):
+    """Catálogo `id → Movie` respaldado por un snapshot mapeado en memoria.
+
+    Las columnas se leen directamente desde las páginas del archivo (compartidas
+    entre procesos vía caché del sistema operativo) y cada `Movie` se construye
+    recién al accederla. Abrirlo no recorre las filas: los ids se buscan por
+    búsqueda binaria sobre `id_order`. Las escrituras quedan en una capa en
+    memoria encima del snapshot, por lo que puede usarse como `InMemoryDB.movies`.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with self.path.open("rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byteorder, count, genre_total, string_count, *offsets = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{self.path} no es un snapshot de catálogo válido")
+        if byteorder != _BYTEORDER[sys.byteorder]:
+            self._mmap.close()
+            raise ValueError(f"{self.path} fue compilado con otro orden de bytes; recompílalo")
+
+        lengths = {
+            "genre_offsets": count + 1,
+            "genre_sids": genre_total,
+            "string_offsets": string_count + 1,
+        }
+        view = self._view = memoryview(self._mmap)
+        self._columns: Dict[str, memoryview] = {}
+        for index, (name, code) in enumerate(_SECTIONS):
+            start = offsets[index]
+            if name == "string_blob":
+                end = offsets[index] + self._columns["string_offsets"][string_count]
+                self._columns[name] = view[start:end]
+                continue
+            size = struct.calcsize(code) * lengths.get(name, count)
+            self._columns[name] = view[start : start + size].cast(code)
+
+        self._count = count
+        self._strings: Dict[int, str] = {}
+        self._materialized: Dict[int, Movie] = {}
+        self._overlay: Dict[int, Movie] = {}
+        self._deleted: Set[int] = set()
+
+    def _string(self, sid: int) -> Optional[str]:
+        if sid == NO_STRING:
+            return None
+        value = self._strings.get(sid)
+        if value is None:
+            offsets = self._columns["string_offsets"]
+            value = bytes(self._columns["string_blob"][offsets[sid] : offsets[sid + 1]]).decode("utf-8")
+            self._strings[sid] = value
+        return value
+
+    def _row(self, movie_id: object) -> Optional[int]:
+        """Fila del snapshot con ese id (sin mirar la capa en memoria), o None."""
+        if not isinstance(movie_id, int):
+            return None
+        ids, order = self._columns["ids"], self._columns["id_order"]
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if ids[order[middle]] < movie_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and ids[order[low]] == movie_id:
+            return order[low]
+        return None
+
+    def _build(self, row: int) -> Movie:
+        cols = self._columns
+        duration = cols["durations"][row]
+        rating = cols["rating"][row]
+        genre_sids = cols["genre_sids"][cols["genre_offsets"][row] : cols["genre_offsets"][row + 1]]
+        return Movie(
+            id=cols["ids"][row],
+            title=self._string(cols["title_sid"][row]) or "",
+            year=cols["years"][row],
+            genres=[self._string(sid) for sid in genre_sids],
+            duration_minutes=None if duration < 0 else duration,
+            popularity=cols["popularity"][row],
+            rating=None if math.isnan(rating) else rating,
+            poster_url=self._string(cols["poster_sid"][row]),
+            is_top_100=bool(cols["flags"][row] & FLAG_TOP_100),
+        )
+
+    def __getitem__(self, movie_id: int) -> Movie:
+        movie = self._overlay.get(movie_id)
+        if movie is not None:
+            return movie
+        if movie_id in self._deleted:
+            raise KeyError(movie_id)
+        movie = self._materialized.get(movie_id)
+        if movie is None:
+            row = self._row(movie_id)
+            if row is None:
+                raise KeyError(movie_id)
+            movie = self._build(row)
+            self._materialized[movie_id] = movie
+        return movie
+
+    def __setitem__(self, movie_id: int, movie: Movie) -> None:
+        self._overlay[movie_id] = movie
+        self._deleted.discard(movie_id)
+
+    def __delitem__(self, movie_id: int) -> None:
+        if movie_id in self._overlay:
+            del self._overlay[movie_id]
+            if self._row(movie_id) is not None:
+                self._deleted.add(movie_id)
+            return
+        if self._row(movie_id) is None or movie_id in self._deleted:
+            raise KeyError(movie_id)
+        self._deleted.add(movie_id)
+
+    def __contains__(self, movie_id: object) -> bool:
+        if movie_id in self._overlay:
+            return True
+        return movie_id not in self._deleted and self._row(movie_id) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        for movie_id in self._columns["ids"]:
+            if movie_id not in self._deleted:
+                yield movie_id
+        for movie_id in self._overlay:
+            if self._row(movie_id) is None:
+                yield movie_id
+
+    def __len__(self) -> int:
+        extra = sum(1 for movie_id in self._overlay if self._row(movie_id) is None)
+        return self._count - len(self._deleted) + extra
+
+    def matches(self, movie: Movie) -> bool:
+        """Indica si `movie` es igual a la guardada con su id, sin construir la de la fila."""
+        if movie.id in self._overlay:
+            return self._overlay[movie.id] == movie
+        if movie.id in self._deleted:
+            return False
+        built = self._materialized.get(movie.id)
+        if built is not None:
+            return built == movie
+        row = self._row(movie.id)
+        if row is None:
+            return False
+        cols = self._columns
+        duration, rating = cols["durations"][row], cols["rating"][row]
+        genre_sids = cols["genre_sids"][cols["genre_offsets"][row] : cols["genre_offsets"][row + 1]]
+        return (
+            cols["years"][row] == movie.year
+            and cols["popularity"][row] == movie.popularity
+            and (None if duration < 0 else duration) == movie.duration_minutes
+            and (None if math.isnan(rating) else rating) == movie.rating
+            and bool(cols["flags"][row] & FLAG_TOP_100) == movie.is_top_100
+            and (self._string(cols["title_sid"][row]) or "") == movie.title
+            and self._string(cols["poster_sid"][row]) == movie.poster_url
+            and [self._string(sid) for sid in genre_sids] == movie.genres
+        )
+
+    def with_changes(self, upserts: Iterable[Movie], removed: Iterable[int]) -> "CatalogSnapshot":
+        """Copia que comparte el archivo mapeado, con altas/cambios y bajas en su capa en memoria.
+
+        Cuesta O(cambios + capa en memoria), sin recorrer las filas; `self` no se modifica.
+        """
+        derived = copy.copy(self)
+        derived._overlay = dict(self._overlay)
+        derived._deleted = set(self._deleted)
+        for movie_id in removed:
+            del derived[movie_id]
+        for movie in upserts:
+            derived[movie.id] = movie
+        return derived
+
+    def iter_by_popularity(self) -> Iterator[Movie]:
+        """Películas por popularidad descendente, construyendo solo las que se consumen.
+
+        Mismo orden que `sorted(values(), key=popularidad, reverse=True)`: los
+        empates quedan en orden de iteración.
+        """
+        ids, popularity = self._columns["ids"], self._columns["popularity"]
+        overlay = self._overlay
+        from_rows = (
+            (-popularity[row], 0, row, ids[row])
+            for row in self._columns["popularity_order"]
+            if ids[row] not in self._deleted and ids[row] not in overlay
+        )
+        # Las reemplazadas ocupan su fila; las nuevas van detrás, en orden de alta.
+        pending = []
+        for index, (movie_id, movie) in enumerate(overlay.items()):
+            row = self._row(movie_id)
+            position = (0, row) if row is not None else (1, index)
+            pending.append((-movie.popularity, *position, movie_id))
+        pending.sort()
+        for *_key, movie_id in heapq.merge(from_rows, pending):
+            yield self[movie_id]
+
+    def genres(self) -> Set[str]:
+        """Géneros presentes en el catálogo, sin construir películas si no hubo bajas."""
+        if self._deleted:
+            return {genre for movie in self.values() for genre in movie.genres}
+        found = {self._string(sid) for sid in set(self._columns["genre_sids"])}
+        for movie in self._overlay.values():
+            found.update(movie.genres)
+        return found
+
+    def close(self) -> None:
+        """Libera el mapeo del archivo, compartido con sus copias `with_changes`.
+
+        Las películas ya construidas siguen válidas.
+        """
+        for column in self._columns.values():
+            column.release()
+        self._columns.clear()
+        self._view.release()
+        self._mmap.close()
+
+
+def load_snapshot(path: Path) -> CatalogSnapshot:
+    """Abre un snapshot compilado con `compile_snapshot`."""
+    return CatalogSnapshot(path)
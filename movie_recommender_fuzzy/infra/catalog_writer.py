@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+class CatalogWriter:
+    """Escribe el catálogo como arreglo JSON compacto a medida que llegan las películas.
+
+    Mientras se escribe, el contenido vive en `<archivo>.partial`, con una
+    película por línea, y `<archivo>.progress.json` guarda hasta qué byte del
+    parcial está confirmado junto con un estado libre (p. ej. la última página
+    completada). `finish` cierra el arreglo y lo renombra de forma atómica, así
+    que los lectores nunca ven un archivo a medias.
+    """
+
+    def __init__(self, target_path: Path):
+        self.target_path = Path(target_path)
+        self.partial_path = self.target_path.with_name(self.target_path.name + ".partial")
+        self.progress_path = self.target_path.with_name(self.target_path.name + ".progress.json")
+        self.count = 0
+        self._resume_key: Optional[Dict[str, object]] = None
+        self._handle = None
+
+    def open(self, resume_key: Optional[Dict[str, object]] = None) -> Optional[Dict[str, object]]:
+        """Abre el parcial; si hay progreso previo con la misma `resume_key`, lo retoma.
+
+        Devuelve el estado del último checkpoint o `None` si se empieza de cero.
+        """
+        self.target_path.parent.mkdir(parents=True, exist_ok=True)
+        self._resume_key = resume_key
+        progress = self._read_progress()
+        if progress is not None and progress.get("key") == resume_key and self.partial_path.exists():
+            self._handle = self.partial_path.open("r+b")
+            self._handle.truncate(int(progress["offset"]))
+            self._handle.seek(0, os.SEEK_END)
+            self.count = int(progress["count"])
+            return progress["state"]
+
+        self._handle = self.partial_path.open("wb")
+        self._handle.write(b"[")
+        self.count = 0
+        self.checkpoint(None)
+        return None
+
+    def _read_progress(self) -> Optional[Dict[str, object]]:
+        try:
+            progress = json.loads(self.progress_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return progress
+
+    def read_items(self) -> List[Dict[str, object]]:
+        """Películas ya confirmadas en el parcial (para reconstruir estado al retomar)."""
+        self._handle.flush()
+        items: List[Dict[str, object]] = []
+        with self.partial_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip().rstrip(",")
+                if line and line != "[":
+                    items.append(json.loads(line))
+        return items
+
+    def write(self, item: Dict[str, object]) -> None:
+        separator = b"\n" if self.count == 0 else b",\n"
+        self._handle.write(separator + json.dumps(item, separators=(",", ":")).encode("utf-8"))
+        self.count += 1
+
+    def write_all(self, items: Iterable[Dict[str, object]]) -> None:
+        for item in items:
+            self.write(item)
+
+    def checkpoint(self, state: Optional[Dict[str, object]]) -> None:
+        """Confirma en disco lo escrito hasta ahora y guarda `state` para retomar."""
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        progress = {"key": self._resume_key, "offset": self._handle.tell(), "count": self.count, "state": state}
+        tmp = self.progress_path.with_name(self.progress_path.name + ".tmp")
+        tmp.write_text(json.dumps(progress), encoding="utf-8")
+        os.replace(tmp, self.progress_path)
+
+    def finish(self) -> int:
+        """Cierra el arreglo, lo publica con un rename atómico y borra el progreso."""
+        self._handle.write(b"\n]\n")
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+        self._handle = None
+        os.replace(self.partial_path, self.target_path)
+        self.progress_path.unlink(missing_ok=True)
+        return self.count
+
+    def close(self) -> None:
+        """Cierra el parcial sin publicarlo (queda listo para retomar)."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def write_catalog(path: Path, items: Iterable[Dict[str, object]]) -> int:
+    """Escribe un catálogo completo en JSON compacto, reemplazando el archivo de forma atómica."""
+    writer = CatalogWriter(path)
+    writer.open()
+    try:
+        writer.write_all(items)
+        return writer.finish()
+    finally:
+        writer.close()
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from typing import Dict, List, MutableMapping
 
 from movie_recommender_fuzzy.domain.models import Interaction, Movie, Session
+from movie_recommender_fuzzy.domain.profile import LongTermProfile
 
 
 @dataclass
 class InMemoryDB:
     """Almacenamiento simple en memoria para entidades de dominio."""
 
-    movies: Dict[int, Movie] = field(default_factory=dict)
+    movies: MutableMapping[int, Movie] = field(default_factory=dict)
     sessions: Dict[int, Session] = field(default_factory=dict)
     interactions: Dict[int, Interaction] = field(default_factory=dict)
+    # Índices secundarios: ids de interacciones por sesión y por usuario (orden de alta).
+    interactions_by_session: Dict[int, List[int]] = field(default_factory=dict)
+    interactions_by_user: Dict[int, List[int]] = field(default_factory=dict)
+    long_term_profiles: Dict[int, LongTermProfile] = field(default_factory=dict)
+    catalog_version: int = 0
     _session_counter: int = 1
     _interaction_counter: int = 1
 
@@ -26,3 +33,15 @@ class InMemoryDB:
         current = self._interaction_counter
         self._interaction_counter += 1
         return current
+
+    def reserve_session_ids(self, count: int) -> range:
+        """Reserva de una vez un rango de ids de sesión consecutivos."""
+        start = self._session_counter
+        self._session_counter += max(0, count)
+        return range(start, self._session_counter)
+
+    def reserve_interaction_ids(self, count: int) -> range:
+        """Reserva de una vez un rango de ids de interacción consecutivos."""
+        start = self._interaction_counter
+        self._interaction_counter += max(0, count)
+        return range(start, self._interaction_counter)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    target_ratings INTEGER NOT NULL,
+    valid_ratings_count INTEGER NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_user ON sessions (user_id);
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    movie_id INTEGER NOT NULL,
+    session_id INTEGER NOT NULL,
+    decision TEXT NOT NULL,
+    score INTEGER,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS interactions_session ON interactions (session_id, id);
+CREATE INDEX IF NOT EXISTS interactions_user ON interactions (user_id, id);
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id INTEGER PRIMARY KEY,
+    rating_sum REAL NOT NULL,
+    rating_weight REAL NOT NULL,
+    last_update TEXT
+);
+CREATE TABLE IF NOT EXISTS user_genre_stats (
+    user_id INTEGER NOT NULL,
+    genre TEXT NOT NULL,
+    likes REAL NOT NULL,
+    dislikes REAL NOT NULL,
+    score_sum REAL NOT NULL,
+    score_weight REAL NOT NULL,
+    PRIMARY KEY (user_id, genre)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('session', 1), ('interaction', 1);
+"""
+
+
+class SQLiteDB:
+    """Sesiones, interacciones y perfiles de largo plazo en un archivo SQLite compartido entre procesos.
+
+    Cada hilo de cada proceso abre su propia conexión (también después de un
+    `fork`), en modo WAL para que las lecturas no bloqueen a las escrituras.
+    Los ids se reservan con un contador transaccional, así que dos workers
+    nunca entregan el mismo.
+    """
+
+    def __init__(self, path: Path, timeout: float = 10.0):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        # Conexiones heredadas de un `fork`: no se cierran en el hijo, SQLite no lo admite.
+        self._inherited = []
+        # `executescript` confirma por su cuenta; el esquema es idempotente.
+        self.connection().executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Pone al día las tablas creadas por versiones anteriores del esquema."""
+        with self.transaction() as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(user_profiles)")}
+            if "last_update" not in columns:
+                # Esos perfiles pesaban contra una época fija: se descartan y el arranque los reconstruye.
+                conn.execute("ALTER TABLE user_profiles ADD COLUMN last_update TEXT")
+                conn.execute("DELETE FROM user_genre_stats")
+                conn.execute("DELETE FROM user_profiles")
+
+    def connection(self) -> sqlite3.Connection:
+        """Conexión del hilo actual; se reabre si el proceso cambió (fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            if conn is not None:
+                self._inherited.append(conn)
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transacción de escritura (`BEGIN IMMEDIATE`): confirma al salir o revierte ante error."""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _reserve(self, name: str, count: int) -> range:
+        with self.transaction() as conn:
+            return self.reserve_in(conn, name, count)
+
+    def reserve_in(self, conn: sqlite3.Connection, name: str, count: int) -> range:
+        """Reserva `count` ids del contador `name` dentro de una transacción ya abierta."""
+        (start,) = conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        conn.execute("UPDATE counters SET value = ? WHERE name = ?", (start + max(0, count), name))
+        return range(start, start + max(0, count))
+
+    def next_session_id(self) -> int:
+        """Obtiene un nuevo identificador de sesión, único entre procesos."""
+        return self._reserve("session", 1)[0]
+
+    def next_interaction_id(self) -> int:
+        """Obtiene un nuevo identificador de interacción, único entre procesos."""
+        return self._reserve("interaction", 1)[0]
+
+    def reserve_session_ids(self, count: int) -> range:
+        """Reserva de una vez un rango de ids de sesión consecutivos."""
+        return self._reserve("session", count)
+
+    def reserve_interaction_ids(self, count: int) -> range:
+        """Reserva de una vez un rango de ids de interacción consecutivos."""
+        return self._reserve("interaction", count)
+
+    def close(self) -> None:
+        """Cierra la conexión del hilo actual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Fila de una carga masiva: (movie_id, decision, score, timestamp).
+NewInteraction = Tuple[int, str, Optional[int], datetime]
 
 from movie_recommender_fuzzy.domain.models import Interaction
 from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.db_sqlite import SQLiteDB
 
 
 class InteractionRepository:
@@ -18,29 +23,216 @@ class InteractionRepository:
 
     def add(self, interaction: Interaction) -> Interaction:
         """Almacena una interacción y devuelve la instancia guardada."""
-        self._db.interactions[interaction.id] = interaction
+        self._store(interaction)
         return interaction
 
+    def add_many(self, interactions: Iterable[Interaction]) -> List[Interaction]:
+        """Almacena varias interacciones de una vez y devuelve las guardadas."""
+        stored = list(interactions)
+        for interaction in stored:
+            self._store(interaction)
+        return stored
+
+    def create_many(self, user_id: int, session_id: int, rows: Iterable[NewInteraction]) -> List[Interaction]:
+        """Crea las interacciones de una sesión con ids consecutivos asignados aquí.
+
+        Los índices por sesión y usuario se extienden una vez por lote.
+        """
+        rows = list(rows)
+        ids = self._db.reserve_interaction_ids(len(rows))
+        created = [
+            Interaction(
+                id=interaction_id,
+                user_id=user_id,
+                movie_id=movie_id,
+                session_id=session_id,
+                decision=decision,
+                score=score,
+                timestamp=timestamp,
+            )
+            for interaction_id, (movie_id, decision, score, timestamp) in zip(ids, rows)
+        ]
+        self._db.interactions.update(zip(ids, created))
+        self._db.interactions_by_session.setdefault(session_id, []).extend(ids)
+        self._db.interactions_by_user.setdefault(user_id, []).extend(ids)
+        return created
+
     def get(self, interaction_id: int) -> Optional[Interaction]:
         """Obtiene una interacción por id."""
         return self._db.interactions.get(interaction_id)
 
     def list_by_session(self, session_id: int) -> List[Interaction]:
         """Devuelve las interacciones asociadas a una sesión."""
-        return [
-            interaction
-            for interaction in self._db.interactions.values()
-            if interaction.session_id == session_id
-        ]
+        ids = self._db.interactions_by_session.get(session_id, [])
+        return [self._db.interactions[interaction_id] for interaction_id in ids]
 
     def list_by_user(self, user_id: int) -> List[Interaction]:
         """Devuelve las interacciones realizadas por un usuario."""
+        ids = self._db.interactions_by_user.get(user_id, [])
+        return [self._db.interactions[interaction_id] for interaction_id in ids]
+
+    def list_user_ids(self) -> List[int]:
+        """Ids de los usuarios con al menos una interacción, en orden."""
+        return sorted(user_id for user_id, ids in self._db.interactions_by_user.items() if ids)
+
+    def iter_all(self) -> Iterator[Interaction]:
+        """Recorre todas las interacciones en orden de id."""
+        for interaction_id in sorted(self._db.interactions):
+            yield self._db.interactions[interaction_id]
+
+    def list_movie_ids_by_session(self, session_id: int) -> List[int]:
+        """Devuelve los ids de películas ya valoradas en la sesión."""
+        return [interaction.movie_id for interaction in self.list_by_session(session_id)]
+
+    def count_by_session(self, session_id: int) -> int:
+        """Cantidad de interacciones registradas en la sesión."""
+        return len(self._db.interactions_by_session.get(session_id, ()))
+
+    def count_by_user(self, user_id: int) -> int:
+        """Cantidad de interacciones registradas por el usuario."""
+        return len(self._db.interactions_by_user.get(user_id, ()))
+
+    def _store(self, interaction: Interaction) -> None:
+        """Guarda la interacción manteniendo los índices por sesión y usuario."""
+        previous = self._db.interactions.get(interaction.id)
+        if previous is not None:
+            self._db.interactions_by_session[previous.session_id].remove(previous.id)
+            self._db.interactions_by_user[previous.user_id].remove(previous.id)
+        self._db.interactions[interaction.id] = interaction
+        self._db.interactions_by_session.setdefault(interaction.session_id, []).append(interaction.id)
+        self._db.interactions_by_user.setdefault(interaction.user_id, []).append(interaction.id)
+
+
+_INTERACTION_COLUMNS = "id, user_id, movie_id, session_id, decision, score, timestamp"
+
+
+def _interaction_row(interaction: Interaction) -> Tuple[object, ...]:
+    return (
+        interaction.id,
+        interaction.user_id,
+        interaction.movie_id,
+        interaction.session_id,
+        interaction.decision,
+        interaction.score,
+        interaction.timestamp.isoformat(),
+    )
+
+
+def _interaction_from_row(row: Tuple[object, ...]) -> Interaction:
+    interaction_id, user_id, movie_id, session_id, decision, score, timestamp = row
+    return Interaction(
+        id=interaction_id,
+        user_id=user_id,
+        movie_id=movie_id,
+        session_id=session_id,
+        decision=decision,
+        score=score,
+        timestamp=datetime.fromisoformat(timestamp),
+    )
+
+
+class SQLiteInteractionRepository:
+    """Repositorio de interacciones sobre SQLite, compartido entre procesos.
+
+    Misma interfaz que `InteractionRepository`.
+    """
+
+    def __init__(self, db: SQLiteDB):
+        self._db = db
+
+    def next_id(self) -> int:
+        """Entrega un nuevo identificador para interacciones."""
+        return self._db.next_interaction_id()
+
+    def add(self, interaction: Interaction) -> Interaction:
+        """Almacena una interacción y devuelve la instancia guardada."""
+        self.add_many([interaction])
+        return interaction
+
+    def add_many(self, interactions: Iterable[Interaction]) -> List[Interaction]:
+        """Almacena varias interacciones en una sola transacción y devuelve las guardadas."""
+        stored = list(interactions)
+        with self._db.transaction() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO interactions ({_INTERACTION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [_interaction_row(interaction) for interaction in stored],
+            )
+        return stored
+
+    def create_many(self, user_id: int, session_id: int, rows: Iterable[NewInteraction]) -> List[Interaction]:
+        """Crea las interacciones de una sesión: reserva sus ids y las inserta en una sola transacción."""
+        rows = list(rows)
+        with self._db.transaction() as conn:
+            ids = self._db.reserve_in(conn, "interaction", len(rows))
+            conn.executemany(
+                f"INSERT INTO interactions ({_INTERACTION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (interaction_id, user_id, movie_id, session_id, decision, score, timestamp.isoformat())
+                    for interaction_id, (movie_id, decision, score, timestamp) in zip(ids, rows)
+                ],
+            )
         return [
-            interaction
-            for interaction in self._db.interactions.values()
-            if interaction.user_id == user_id
+            Interaction(
+                id=interaction_id,
+                user_id=user_id,
+                movie_id=movie_id,
+                session_id=session_id,
+                decision=decision,
+                score=score,
+                timestamp=timestamp,
+            )
+            for interaction_id, (movie_id, decision, score, timestamp) in zip(ids, rows)
         ]
 
+    def get(self, interaction_id: int) -> Optional[Interaction]:
+        """Obtiene una interacción por id."""
+        row = self._db.connection().execute(
+            f"SELECT {_INTERACTION_COLUMNS} FROM interactions WHERE id = ?", (interaction_id,)
+        ).fetchone()
+        return _interaction_from_row(row) if row else None
+
+    def list_by_session(self, session_id: int) -> List[Interaction]:
+        """Devuelve las interacciones asociadas a una sesión."""
+        rows = self._db.connection().execute(
+            f"SELECT {_INTERACTION_COLUMNS} FROM interactions WHERE session_id = ? ORDER BY id", (session_id,)
+        )
+        return [_interaction_from_row(row) for row in rows]
+
+    def list_by_user(self, user_id: int) -> List[Interaction]:
+        """Devuelve las interacciones realizadas por un usuario."""
+        rows = self._db.connection().execute(
+            f"SELECT {_INTERACTION_COLUMNS} FROM interactions WHERE user_id = ? ORDER BY id", (user_id,)
+        )
+        return [_interaction_from_row(row) for row in rows]
+
+    def list_user_ids(self) -> List[int]:
+        """Ids de los usuarios con al menos una interacción, en orden."""
+        rows = self._db.connection().execute("SELECT DISTINCT user_id FROM interactions ORDER BY user_id")
+        return [user_id for (user_id,) in rows]
+
+    def iter_all(self) -> Iterator[Interaction]:
+        """Recorre todas las interacciones en orden de id, sin cargarlas todas en memoria."""
+        rows = self._db.connection().execute(f"SELECT {_INTERACTION_COLUMNS} FROM interactions ORDER BY id")
+        for row in rows:
+            yield _interaction_from_row(row)
+
     def list_movie_ids_by_session(self, session_id: int) -> List[int]:
         """Devuelve los ids de películas ya valoradas en la sesión."""
-        return [interaction.movie_id for interaction in self.list_by_session(session_id)]
+        rows = self._db.connection().execute(
+            "SELECT movie_id FROM interactions WHERE session_id = ? ORDER BY id", (session_id,)
+        )
+        return [movie_id for (movie_id,) in rows]
+
+    def count_by_session(self, session_id: int) -> int:
+        """Cantidad de interacciones registradas en la sesión."""
+        (count,) = self._db.connection().execute(
+            "SELECT COUNT(*) FROM interactions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return count
+
+    def count_by_user(self, user_id: int) -> int:
+        """Cantidad de interacciones registradas por el usuario."""
+        (count,) = self._db.connection().execute(
+            "SELECT COUNT(*) FROM interactions WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return count
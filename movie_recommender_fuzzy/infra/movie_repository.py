@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Set
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, MutableMapping, Optional, Set
 
 from movie_recommender_fuzzy.domain.models import Movie
+from movie_recommender_fuzzy.infra.catalog_snapshot import CatalogSnapshot
 from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
 
 
@@ -16,42 +18,68 @@ class MovieRepository:
         """Carga un conjunto de películas en el almacenamiento."""
         for movie in movies:
             self._db.movies[movie.id] = movie
+        self._db.catalog_version += 1
 
     def add_movie(self, movie: Movie) -> None:
         """Agrega o reemplaza una película."""
         self._db.movies[movie.id] = movie
+        self._db.catalog_version += 1
+
+    def swap_catalog(self, movies: MutableMapping[int, Movie]) -> MutableMapping[int, Movie]:
+        """Reemplaza atómicamente el catálogo completo y devuelve el anterior.
+
+        Las lecturas en curso conservan la referencia al catálogo previo, por lo que
+        siempre ven una versión consistente.
+        """
+        previous = self._db.movies
+        self._db.movies = movies
+        self._db.catalog_version += 1
+        return previous
+
+    def catalog(self) -> MutableMapping[int, Movie]:
+        """Devuelve el catálogo activo (`id → Movie`) tal como está publicado."""
+        return self._db.movies
+
+    def catalog_version(self) -> int:
+        """Versión del catálogo; cambia con cada alta o reemplazo de películas."""
+        return self._db.catalog_version
 
     def get(self, movie_id: int) -> Optional[Movie]:
         """Obtiene una película por su identificador."""
         return self._db.movies.get(movie_id)
 
+    def get_many(self, movie_ids: Iterable[int]) -> Dict[int, Movie]:
+        """Obtiene de una vez las películas existentes para los ids dados."""
+        movies = self._db.movies
+        return {movie_id: movies[movie_id] for movie_id in set(movie_ids) if movie_id in movies}
+
     def list_all(self) -> List[Movie]:
         """Devuelve todas las películas conocidas."""
         return list(self._db.movies.values())
 
+    def _by_popularity(self) -> Iterator[Movie]:
+        """Películas por popularidad descendente; con un snapshot solo se construyen las que se consumen."""
+        movies = self._db.movies
+        if isinstance(movies, CatalogSnapshot):
+            return movies.iter_by_popularity()
+        return iter(sorted(movies.values(), key=lambda movie: movie.popularity, reverse=True))
+
     def list_catalog(self, limit: int = 1000) -> List[Movie]:
         """Devuelve el catálogo principal limitado a las más populares."""
-        ordered = sorted(self._db.movies.values(), key=lambda movie: movie.popularity, reverse=True)
-        return ordered[:limit]
+        return list(islice(self._by_popularity(), limit))
 
     def list_top_popular(self, limit: int = 100) -> List[Movie]:
         """Devuelve el pool de las películas más populares (top 100 por defecto)."""
-        flagged = sorted(
-            (movie for movie in self._db.movies.values() if movie.is_top_100),
-            key=lambda movie: movie.popularity,
-            reverse=True,
-        )
-        if len(flagged) >= limit:
-            return flagged[:limit]
-
-        remaining_slots = limit - len(flagged)
-        others = sorted(
-            (movie for movie in self._db.movies.values() if not movie.is_top_100),
-            key=lambda movie: movie.popularity,
-            reverse=True,
-        )
-        combined = flagged + others
-        return combined[:limit]
+        flagged: List[Movie] = []
+        others: List[Movie] = []
+        for movie in self._by_popularity():
+            if movie.is_top_100:
+                flagged.append(movie)
+                if len(flagged) >= limit:
+                    break
+            elif len(others) < limit:
+                others.append(movie)
+        return (flagged + others)[:limit]
 
     def list_excluding(self, excluded_ids: Set[int]) -> List[Movie]:
         """Devuelve películas cuyo id no se encuentra en el conjunto dado."""
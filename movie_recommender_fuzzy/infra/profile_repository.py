@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import copy
+import sqlite3
+from datetime import datetime
+from typing import Iterable, Optional
+
+from movie_recommender_fuzzy.domain.profile import GenreStats, LongTermProfile
+from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.db_sqlite import SQLiteDB
+
+
+class UserProfileRepository:
+    """Perfiles de largo plazo por usuario, en memoria."""
+
+    def __init__(self, db: InMemoryDB):
+        self._db = db
+
+    def get(self, user_id: int) -> Optional[LongTermProfile]:
+        """Copia del perfil del usuario, o None si todavía no tiene."""
+        profile = self._db.long_term_profiles.get(user_id)
+        return copy.deepcopy(profile) if profile is not None else None
+
+    def add_deltas(self, deltas: Iterable[LongTermProfile], half_life_days: float) -> None:
+        """Suma a cada perfil lo acumulado en su delta (crea el perfil si no existe)."""
+        for delta in deltas:
+            profile = self._db.long_term_profiles.setdefault(delta.user_id, LongTermProfile(user_id=delta.user_id))
+            profile.merge(delta, half_life_days)
+
+    def save(self, profile: LongTermProfile) -> LongTermProfile:
+        """Reemplaza el perfil completo del usuario (p. ej. al reconstruirlo desde el historial)."""
+        self._db.long_term_profiles[profile.user_id] = copy.deepcopy(profile)
+        return profile
+
+
+class SQLiteUserProfileRepository:
+    """Perfiles de largo plazo sobre SQLite, compartidos entre procesos.
+
+    Misma interfaz que `UserProfileRepository`. Los deltas se combinan con el
+    perfil guardado dentro de una transacción `BEGIN IMMEDIATE`, así que dos
+    workers que registran a la vez no pisan lo que sumó el otro.
+    """
+
+    def __init__(self, db: SQLiteDB):
+        self._db = db
+
+    def get(self, user_id: int) -> Optional[LongTermProfile]:
+        """Perfil del usuario, o None si todavía no tiene."""
+        return _read_profile(self._db.connection(), user_id)
+
+    def add_deltas(self, deltas: Iterable[LongTermProfile], half_life_days: float) -> None:
+        """Suma cada delta a su perfil en una sola transacción."""
+        with self._db.transaction() as conn:
+            for delta in deltas:
+                profile = _read_profile(conn, delta.user_id) or LongTermProfile(user_id=delta.user_id)
+                profile.merge(delta, half_life_days)
+                _write_profile(conn, profile)
+
+    def save(self, profile: LongTermProfile) -> LongTermProfile:
+        """Reemplaza el perfil completo del usuario (p. ej. al reconstruirlo desde el historial)."""
+        with self._db.transaction() as conn:
+            _write_profile(conn, profile)
+        return profile
+
+
+def _read_profile(conn: sqlite3.Connection, user_id: int) -> Optional[LongTermProfile]:
+    row = conn.execute(
+        "SELECT rating_sum, rating_weight, last_update FROM user_profiles WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    rating_sum, rating_weight, last_update = row
+    profile = LongTermProfile(
+        user_id=user_id,
+        rating_sum=rating_sum,
+        rating_weight=rating_weight,
+        last_update=datetime.fromisoformat(last_update) if last_update else None,
+    )
+    rows = conn.execute(
+        "SELECT genre, likes, dislikes, score_sum, score_weight FROM user_genre_stats WHERE user_id = ?", (user_id,)
+    )
+    for genre, likes, dislikes, score_sum, score_weight in rows:
+        profile.genres[genre] = GenreStats(likes, dislikes, score_sum, score_weight)
+    return profile
+
+
+def _write_profile(conn: sqlite3.Connection, profile: LongTermProfile) -> None:
+    conn.execute("DELETE FROM user_genre_stats WHERE user_id = ?", (profile.user_id,))
+    conn.execute(
+        "INSERT OR REPLACE INTO user_profiles (user_id, rating_sum, rating_weight, last_update) VALUES (?, ?, ?, ?)",
+        (
+            profile.user_id,
+            profile.rating_sum,
+            profile.rating_weight,
+            profile.last_update.isoformat() if profile.last_update else None,
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO user_genre_stats (user_id, genre, likes, dislikes, score_sum, score_weight) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (profile.user_id, genre, stats.likes, stats.dislikes, stats.score_sum, stats.score_weight)
+            for genre, stats in profile.genres.items()
+        ],
+    )
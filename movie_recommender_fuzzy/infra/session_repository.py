@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
 
 from movie_recommender_fuzzy.domain.models import Session
 from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.db_sqlite import SQLiteDB
 
 
 class SessionRepository:
@@ -28,6 +30,12 @@ class SessionRepository:
         self._db.sessions[session.id] = session
         return session
 
+    def add_many(self, sessions: Iterable[Session]) -> List[Session]:
+        """Guarda varias sesiones existentes en una sola operación."""
+        stored = list(sessions)
+        self._db.sessions.update((session.id, session) for session in stored)
+        return stored
+
     def get(self, session_id: int) -> Optional[Session]:
         """Obtiene una sesión por identificador."""
         return self._db.sessions.get(session_id)
@@ -40,3 +48,106 @@ class SessionRepository:
         """Persiste los cambios de una sesión."""
         self._db.sessions[session.id] = session
         return session
+
+    def add_valid_ratings(self, session_id: int, amount: int) -> Optional[Session]:
+        """Suma `amount` valoraciones válidas y marca la sesión completada si llegó al objetivo."""
+        session = self._db.sessions.get(session_id)
+        if session is not None:
+            session.increment_valid_ratings(amount)
+            if session.is_completed():
+                session.mark_completed()
+        return session
+
+
+_SESSION_COLUMNS = "id, user_id, started_at, finished_at, target_ratings, valid_ratings_count, status"
+
+
+def _session_row(session: Session) -> Tuple[object, ...]:
+    return (
+        session.id,
+        session.user_id,
+        session.started_at.isoformat(),
+        session.finished_at.isoformat() if session.finished_at else None,
+        session.target_ratings,
+        session.valid_ratings_count,
+        session.status,
+    )
+
+
+def _session_from_row(row: Tuple[object, ...]) -> Session:
+    session_id, user_id, started_at, finished_at, target_ratings, valid_ratings_count, status = row
+    return Session(
+        id=session_id,
+        user_id=user_id,
+        started_at=datetime.fromisoformat(started_at),
+        finished_at=datetime.fromisoformat(finished_at) if finished_at else None,
+        target_ratings=target_ratings,
+        valid_ratings_count=valid_ratings_count,
+        status=status,
+    )
+
+
+class SQLiteSessionRepository:
+    """Repositorio de sesiones sobre SQLite, compartido entre procesos.
+
+    Misma interfaz que `SessionRepository`, pero `get` devuelve siempre una
+    instancia nueva: los cambios se persisten con `update`.
+    """
+
+    def __init__(self, db: SQLiteDB):
+        self._db = db
+
+    def create(self, user_id: int, target_ratings: int = 20) -> Session:
+        """Crea y almacena una sesión nueva para el usuario."""
+        session = Session(id=self._db.next_session_id(), user_id=user_id, target_ratings=target_ratings)
+        return self.add(session)
+
+    def add(self, session: Session) -> Session:
+        """Guarda una sesión existente (útil para restaurar desde otro medio)."""
+        return self.add_many([session])[0]
+
+    def add_many(self, sessions: Iterable[Session]) -> List[Session]:
+        """Guarda varias sesiones existentes en una sola transacción."""
+        stored = list(sessions)
+        with self._db.transaction() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO sessions ({_SESSION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [_session_row(session) for session in stored],
+            )
+        return stored
+
+    def get(self, session_id: int) -> Optional[Session]:
+        """Obtiene una sesión por identificador."""
+        row = self._db.connection().execute(
+            f"SELECT {_SESSION_COLUMNS} FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        return _session_from_row(row) if row else None
+
+    def list_by_user(self, user_id: int) -> List[Session]:
+        """Devuelve las sesiones asociadas a un usuario."""
+        rows = self._db.connection().execute(
+            f"SELECT {_SESSION_COLUMNS} FROM sessions WHERE user_id = ? ORDER BY id", (user_id,)
+        )
+        return [_session_from_row(row) for row in rows]
+
+    def update(self, session: Session) -> Session:
+        """Persiste los cambios de una sesión."""
+        return self.add(session)
+
+    def add_valid_ratings(self, session_id: int, amount: int) -> Optional[Session]:
+        """Suma `amount` valoraciones válidas y marca la sesión completada si llegó al objetivo.
+
+        El incremento se hace en la base dentro de una transacción, así que dos
+        workers que registran a la vez en la misma sesión no pisan su contador.
+        """
+        with self._db.transaction() as conn:
+            conn.execute(
+                "UPDATE sessions SET valid_ratings_count = valid_ratings_count + ? WHERE id = ?", (amount, session_id)
+            )
+            conn.execute(
+                "UPDATE sessions SET status = ?, finished_at = COALESCE(finished_at, ?) "
+                "WHERE id = ? AND valid_ratings_count >= target_ratings",
+                (Session.COMPLETED, datetime.now().isoformat(), session_id),
+            )
+            row = conn.execute(f"SELECT {_SESSION_COLUMNS} FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return _session_from_row(row) if row else None
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    etag TEXT,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+@dataclass
+class CachedResponse:
+    """Respuesta guardada: cuerpo JSON, `ETag` y si sigue dentro del TTL."""
+
+    body: Dict[str, object]
+    etag: Optional[str]
+    fresh: bool
+
+
+class ResponseCache:
+    """Caché persistente de respuestas de TMDb en un único archivo SQLite.
+
+    La clave es el path más los parámetros ordenados, sin la API key. Los cuerpos
+    se guardan comprimidos con zlib; al superar `max_bytes` se eliminan las
+    entradas menos usadas recientemente.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: float = 24 * 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: str, params: Mapping[str, object]) -> str:
+        visible = {name: value for name, value in params.items() if name != "api_key"}
+        return path + "?" + json.dumps(visible, sort_keys=True, default=str)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        body, etag, fetched_at = row
+        fresh = time.time() - fetched_at < self.ttl_seconds
+        return CachedResponse(json.loads(zlib.decompress(body)), etag, fresh)
+
+    def put(self, key: str, body: Dict[str, object], etag: Optional[str] = None) -> None:
+        blob = zlib.compress(json.dumps(body, separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, fetched_at, last_access, size)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, blob, etag, now, now, len(blob)),
+            )
+            self._evict()
+
+    def touch(self, key: str) -> None:
+        """Marca como fresca una entrada revalidada (304 Not Modified)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ?, last_access = ? WHERE key = ?", (now, now, key)
+            )
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return int(total)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,27 +1,312 @@
 from __future__ import annotations
 
 import os
-from typing import Dict, Iterable, Iterator, Optional
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
-import requests
+from movie_recommender_fuzzy.infra.tmdb_cache import CachedResponse, ResponseCache
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_BASE_URL = "https://api.themoviedb.org/3"
+# TMDb documenta un límite aproximado de ~50 peticiones/segundo por IP.
+DEFAULT_RATE_PER_SECOND = 40.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Los listados de TMDb tienen tamaño de página fijo.
+PAGE_SIZE = 20
+
+
+class TokenBucket:
+    """Token bucket compartido entre hilos: `rate` tokens/segundo con ráfagas de `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Consume un token, esperando lo necesario. Devuelve los segundos esperados."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = max(self._paused_until - now, (1.0 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Frena a todos los hilos (p. ej. tras un 429 con `Retry-After`)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+@dataclass
+class RequestStats:
+    """Contadores del planificador de peticiones."""
+
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    failures: int = 0
+    cache_hits: int = 0
+    revalidated: int = 0
+    coalesced: int = 0
+    waited_seconds: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> Dict[str, float]:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "cache_hits": self.cache_hits,
+            "revalidated": self.revalidated,
+            "coalesced": self.coalesced,
+            "waited_seconds": round(self.waited_seconds, 3),
+            "requests_per_second": round(self.requests / elapsed, 2),
+        }
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Interpreta `Retry-After` en segundos o como fecha HTTP."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
 
 class TMDbClient:
-    """Cliente mínimo para la API de The Movie Database (TMDb)."""
+    """Cliente mínimo para la API de The Movie Database (TMDb).
+
+    Con `max_workers > 1` las páginas de un listado se piden en paralelo sobre la
+    misma `requests.Session` (como mucho `max_workers` en vuelo), pero se
+    entregan siempre en orden de página.
+    """
 
-    def __init__(self, api_key: Optional[str] = None, session: Optional[requests.Session] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        max_workers: int = 1,
+        base_url: str = DEFAULT_BASE_URL,
+        rate_per_second: Optional[float] = DEFAULT_RATE_PER_SECOND,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        cache: Optional[ResponseCache] = None,
+    ):
         self.api_key = api_key or os.getenv("TMDB_API_KEY")
         if not self.api_key:
             raise ValueError("TMDB_API_KEY no definido")
-        self.session = session or requests.Session()
-        self.base_url = "https://api.themoviedb.org/3"
+        self.max_workers = max(1, max_workers)
+        if session is None:
+            # Import diferido: `requests` solo se carga en procesos que hablan con TMDb.
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._bucket = TokenBucket(rate_per_second) if rate_per_second else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = cache
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.stats = RequestStats()
+        self._stats_lock = threading.Lock()
+
+    def _count(self, **deltas: float) -> None:
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                setattr(self.stats, name, getattr(self.stats, name) + delta)
+
+    def _backoff(self, attempt: int) -> float:
+        """Backoff exponencial con jitter completo."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
 
     def _get(self, path: str, params: Optional[Dict[str, object]] = None) -> Dict[str, object]:
-        params = params or {}
+        """GET con coalescing: peticiones idénticas simultáneas comparten una sola llamada."""
+        key = ResponseCache.key(path, params or {})
+        with self._inflight_lock:
+            shared = self._inflight.get(key)
+            owner = shared is None
+            if owner:
+                shared = Future()
+                self._inflight[key] = shared
+        if not owner:
+            self._count(coalesced=1)
+            return shared.result()
+
+        try:
+            result = self._fetch(path, params)
+        except BaseException as exc:
+            shared.set_exception(exc)
+            raise
+        else:
+            shared.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _get_or_missing(self, path: str, params: Optional[Dict[str, object]] = None) -> Optional[Dict[str, object]]:
+        """Como `_get`, pero un 404 (recurso borrado en TMDb) devuelve None en lugar de fallar."""
+        import requests
+
+        try:
+            return self._get(path, params)
+        except requests.HTTPError as exc:
+            if exc.response is not None and exc.response.status_code == 404:
+                return None
+            raise
+
+    def _fetch(self, path: str, params: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+        params = dict(params or {})
+        headers: Dict[str, str] = {}
+        cache_key: Optional[str] = None
+        cached: Optional[CachedResponse] = None
+        if self.cache is not None:
+            cache_key = self.cache.key(path, params)
+            cached = self.cache.get(cache_key)
+            if cached is not None and cached.fresh:
+                self._count(cache_hits=1)
+                return cached.body
+            if cached is not None and cached.etag:
+                headers["If-None-Match"] = cached.etag
+
         params["api_key"] = self.api_key
-        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        response = self._request(path, params, headers)
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(cache_key)
+            self._count(revalidated=1)
+            return cached.body
+
+        body = response.json()
+        if cache_key is not None:
+            self.cache.put(cache_key, body, response.headers.get("ETag"))
+        return body
+
+    def _request(self, path: str, params: Dict[str, object], headers: Dict[str, str]) -> requests.Response:
+        """Ejecuta la petición respetando el token bucket y reintentando 429/5xx."""
+        import requests
+
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                self._count(waited_seconds=self._bucket.acquire())
+            self._count(requests=1)
+            try:
+                response = self.session.get(f"{self.base_url}{path}", params=params, headers=headers, timeout=10)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    self._count(failures=1)
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    if response.status_code >= 400:
+                        self._count(failures=1)
+                    response.raise_for_status()
+                    return response
+                retry_after = _retry_after_seconds(response.headers.get("Retry-After"))
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                if response.status_code == 429:
+                    self._count(throttled=1)
+                    if self._bucket is not None:
+                        self._bucket.pause(delay)
+            self._count(retries=1, waited_seconds=delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _iter_ordered(
+        self, calls: Iterable[Tuple[str, Dict[str, object]]], get: Optional[Callable] = None
+    ) -> Iterator[Dict[str, object]]:
+        """Ejecuta `(path, params)` en paralelo (como mucho `max_workers` en vuelo) y entrega en orden."""
+        get = get or self._get
+        if self.max_workers == 1:
+            for path, params in calls:
+                yield get(path, params)
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tmdb")
+        pending: Deque[Future] = deque()
+        calls = iter(calls)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < self.max_workers:
+                    call = next(calls, None)
+                    if call is None:
+                        exhausted = True
+                        break
+                    pending.append(self._executor.submit(get, *call))
+                if not pending:
+                    return
+                yield pending.popleft().result()
+        finally:
+            # Si el consumidor corta antes (p. ej. ya alcanzó el total), no se piden más resultados.
+            for future in pending:
+                future.cancel()
+
+    def _iter_numbered_pages(
+        self, path: str, pages: int, params: Dict[str, object], first_page: int = 1
+    ) -> Iterator[Tuple[int, List[Dict[str, object]]]]:
+        """Itera `(número de página, resultados)` de first_page..pages en orden, con prefetch acotado.
+
+        El número es el de la página pedida a TMDb, aunque traiga menos de
+        `PAGE_SIZE` resultados; sirve para hacer checkpoint por página.
+        """
+        numbers = range(first_page, pages + 1)
+        calls = ((path, {**params, "page": page}) for page in numbers)
+        for page, data in zip(numbers, self._iter_ordered(calls)):
+            yield page, list(data.get("results", []))
+
+    def _iter_pages(
+        self, path: str, pages: int, params: Dict[str, object], first_page: int = 1
+    ) -> Iterator[Dict[str, object]]:
+        """Itera los resultados de las páginas first_page..pages en orden, con prefetch acotado."""
+        for _page, results in self._iter_numbered_pages(path, pages, params, first_page):
+            yield from results
+
+    def close(self) -> None:
+        """Libera el pool de hilos, la sesión HTTP y la caché."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
 
     def get_genres(self, language: str = "en-US") -> Dict[int, str]:
         """Devuelve el catálogo de géneros (id → nombre)."""
@@ -30,20 +315,25 @@ class TMDbClient:
 
     def get_popular(self, pages: int = 5, language: str = "en-US") -> Iterator[Dict[str, object]]:
         """Itera sobre películas populares (por páginas)."""
-        for page in range(1, pages + 1):
-            data = self._get("/movie/popular", {"page": page, "language": language})
-            for item in data.get("results", []):
-                yield item
+        return self._iter_pages("/movie/popular", pages, {"language": language})
 
-    def get_top_rated(self, pages: int = 5, language: str = "en-US", vote_count_gte: int = 500) -> Iterator[Dict[str, object]]:
+    def get_top_rated(
+        self, pages: int = 5, language: str = "en-US", vote_count_gte: int = 500, first_page: int = 1
+    ) -> Iterator[Dict[str, object]]:
         """Itera sobre películas mejor valoradas con umbral de votos para evitar rarezas."""
-        for page in range(1, pages + 1):
-            data = self._get(
-                "/movie/top_rated",
-                {"page": page, "language": language, "vote_count.gte": vote_count_gte},
-            )
-            for item in data.get("results", []):
-                yield item
+        for _page, results in self.iter_top_rated_pages(pages, language, vote_count_gte, first_page):
+            yield from results
+
+    def iter_top_rated_pages(
+        self, pages: int = 5, language: str = "en-US", vote_count_gte: int = 500, first_page: int = 1
+    ) -> Iterator[Tuple[int, List[Dict[str, object]]]]:
+        """Como `get_top_rated`, pero entrega `(número de página, resultados)`."""
+        return self._iter_numbered_pages(
+            "/movie/top_rated",
+            pages,
+            {"language": language, "vote_count.gte": vote_count_gte},
+            first_page=first_page,
+        )
 
     def discover_popular(
         self,
@@ -51,17 +341,55 @@ class TMDbClient:
         language: str = "en-US",
         sort_by: str = "popularity.desc",
         vote_count_gte: int = 50,
+        first_page: int = 1,
     ) -> Iterator[Dict[str, object]]:
         """Itera sobre resultados de discover ordenados por popularidad."""
-        for page in range(1, pages + 1):
-            data = self._get(
-                "/discover/movie",
-                {
-                    "page": page,
-                    "language": language,
-                    "sort_by": sort_by,
-                    "vote_count.gte": vote_count_gte,
-                },
-            )
-            for item in data.get("results", []):
-                yield item
+        for _page, results in self.iter_discover_pages(pages, language, sort_by, vote_count_gte, first_page):
+            yield from results
+
+    def iter_discover_pages(
+        self,
+        pages: int,
+        language: str = "en-US",
+        sort_by: str = "popularity.desc",
+        vote_count_gte: int = 50,
+        first_page: int = 1,
+    ) -> Iterator[Tuple[int, List[Dict[str, object]]]]:
+        """Como `discover_popular`, pero entrega `(número de página, resultados)`."""
+        return self._iter_numbered_pages(
+            "/discover/movie",
+            pages,
+            {
+                "language": language,
+                "sort_by": sort_by,
+                "vote_count.gte": vote_count_gte,
+            },
+            first_page=first_page,
+        )
+
+    def iter_changed_ids(self, start_date: str, end_date: Optional[str] = None) -> Iterator[int]:
+        """Itera los ids del feed de cambios de TMDb (`/movie/changes`, ventana de hasta 14 días)."""
+        params: Dict[str, object] = {"start_date": start_date}
+        if end_date:
+            params["end_date"] = end_date
+        first = self._get("/movie/changes", {**params, "page": 1})
+        for item in first.get("results", []):
+            yield int(item["id"])
+        total_pages = int(first.get("total_pages") or 1)
+        for item in self._iter_pages("/movie/changes", total_pages, params, first_page=2):
+            yield int(item["id"])
+
+    def get_movie_details(self, movie_id: int, language: str = "en-US") -> Dict[str, object]:
+        """Devuelve el detalle de una película (`/movie/{id}`), incluyendo `runtime`."""
+        return self._get(f"/movie/{movie_id}", {"language": language})
+
+    def iter_movie_details(
+        self, movie_ids: Iterable[int], language: str = "en-US", missing_ok: bool = False
+    ) -> Iterator[Optional[Dict[str, object]]]:
+        """Itera el detalle de varias películas, en paralelo y en el orden pedido.
+
+        Con `missing_ok` una película que TMDb ya no tiene (404) entrega None en
+        su lugar en vez de cortar la iteración.
+        """
+        calls = ((f"/movie/{movie_id}", {"language": language}) for movie_id in movie_ids)
+        return self._iter_ordered(calls, get=self._get_or_missing if missing_ok else None)
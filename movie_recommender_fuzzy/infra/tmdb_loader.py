@@ -3,10 +3,14 @@ from __future__ import annotations
 import json
 import math
 import os
+from dataclasses import dataclass
+from datetime import date, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
-from movie_recommender_fuzzy.infra.tmdb_client import TMDbClient
+from movie_recommender_fuzzy.infra.catalog_writer import CatalogWriter, write_catalog
+from movie_recommender_fuzzy.infra.tmdb_cache import ResponseCache
+from movie_recommender_fuzzy.infra.tmdb_client import DEFAULT_RATE_PER_SECOND, PAGE_SIZE, TMDbClient
 
 
 def _extract_year(release_date: str) -> int:
@@ -19,65 +23,392 @@ def _extract_year(release_date: str) -> int:
 
 
 def _map_tmdb_item(item: Dict[str, object], genre_map: Dict[int, str], is_top: bool) -> Dict[str, object]:
-    genre_ids = item.get("genre_ids") or []
+    # Los listados traen `genre_ids`; el detalle (`/movie/{id}`) trae `genres` y `runtime`.
+    genre_ids = item.get("genre_ids") or [genre["id"] for genre in item.get("genres") or []]
     genres = [genre_map.get(gid, str(gid)) for gid in genre_ids]
     return {
         "id": int(item["id"]),
         "title": str(item.get("title") or item.get("name") or ""),
         "year": _extract_year(str(item.get("release_date", ""))),
         "genres": genres,
-        "duration_minutes": None,
+        "duration_minutes": int(item["runtime"]) if item.get("runtime") else None,
         "popularity": float(item.get("popularity", 0.0)),
         "rating": float(item["vote_average"]) if item.get("vote_average") is not None else None,
         "poster_url": f"https://image.tmdb.org/t/p/w500{item['poster_path']}" if item.get("poster_path") else None,
         "is_top_100": is_top,
+        "fetched_at": date.today().isoformat(),
     }
 
 
+def _apply_listing_fields(entry: Dict[str, object], item: Dict[str, object]) -> bool:
+    """Actualiza en el lugar popularidad, rating, título y póster; indica si algo cambió."""
+    updated = {
+        "title": str(item.get("title") or entry.get("title") or ""),
+        "popularity": float(item.get("popularity", entry.get("popularity", 0.0))),
+        "rating": float(item["vote_average"]) if item.get("vote_average") is not None else entry.get("rating"),
+        "poster_url": (
+            f"https://image.tmdb.org/t/p/w500{item['poster_path']}" if item.get("poster_path") else entry.get("poster_url")
+        ),
+    }
+    changed = any(entry.get(key) != value for key, value in updated.items())
+    entry.update(updated)
+    entry["fetched_at"] = date.today().isoformat()
+    return changed
+
+
 def fetch_catalog(
     api_key: str,
     total: int = 1000,
     top_limit: int = 100,
     language: str = "en-US",
     vote_count_gte: int = 500,
+    max_workers: int = 8,
+    client: Optional[TMDbClient] = None,
 ) -> List[Dict[str, object]]:
-    """Obtiene catálogo (top valoradas + resto por rating) desde TMDb."""
-    client = TMDbClient(api_key=api_key)
-    genre_map = client.get_genres(language=language)
+    """Obtiene catálogo (top valoradas + resto por rating) desde TMDb.
+
+    Las páginas se piden en paralelo (hasta `max_workers`), pero se consumen en
+    orden, así que la deduplicación y el orden del resultado no cambian.
+    """
+    owns_client = client is None
+    if client is None:
+        client = TMDbClient(api_key=api_key, max_workers=max_workers)
+    try:
+        return _fetch_catalog(client, total, top_limit, language, vote_count_gte)
+    finally:
+        if owns_client:
+            client.close()
 
+
+def _fetch_catalog(
+    client: TMDbClient,
+    total: int,
+    top_limit: int,
+    language: str,
+    vote_count_gte: int,
+) -> List[Dict[str, object]]:
     movies: List[Dict[str, object]] = []
-    seen_ids: Set[int] = set()
+    for entries, _state in _iter_catalog_pages(client, total, top_limit, language, vote_count_gte):
+        movies.extend(entries)
+    return movies
 
-    # Top mejor valoradas (con mínimo de votos para evitar ruido)
-    top_pages = math.ceil(top_limit / 20)
-    for item in client.get_top_rated(pages=top_pages, language=language, vote_count_gte=vote_count_gte):
-        tmdb_id = int(item["id"])
-        if tmdb_id in seen_ids:
-            continue
-        movies.append(_map_tmdb_item(item, genre_map, is_top=True))
-        seen_ids.add(tmdb_id)
-        if len(movies) >= top_limit:
-            break
 
-    # Resto del catálogo por rating (no solo lo más reciente)
-    remaining = max(total - len(movies), 0)
-    discover_pages = math.ceil(remaining / 20)
-    if discover_pages > 0:
-        for item in client.discover_popular(
-            pages=discover_pages,
+def _iter_catalog_pages(
+    client: TMDbClient,
+    total: int,
+    top_limit: int,
+    language: str,
+    vote_count_gte: int,
+    state: Optional[Dict[str, object]] = None,
+    seen_ids: Optional[Set[int]] = None,
+    count: int = 0,
+) -> Iterator[Tuple[List[Dict[str, object]], Dict[str, object]]]:
+    """Recorre top + discover página a página: entrega las entradas nuevas y el estado para retomar.
+
+    El estado indica la etapa (`top` o `discover`) y el número de página de
+    TMDb de su última página completa (aunque haya traído menos de `PAGE_SIZE`
+    resultados); con `state`, `seen_ids` y `count` de una corrida anterior se
+    sigue desde la página siguiente.
+    """
+    state = dict(state or {"stage": "top", "page": 0})
+    seen_ids = seen_ids if seen_ids is not None else set()
+    genre_map = client.get_genres(language=language)
+
+    # Top mejor valoradas (con mínimo de votos para evitar ruido)
+    if state["stage"] == "top":
+        listing = client.iter_top_rated_pages(
+            pages=math.ceil(top_limit / PAGE_SIZE),
             language=language,
             vote_count_gte=vote_count_gte,
-            sort_by="vote_average.desc",
-        ):
+            first_page=int(state["page"]) + 1,
+        )
+        for page, items in listing:
+            entries = []
+            for item in items:
+                tmdb_id = int(item["id"])
+                if count >= top_limit or tmdb_id in seen_ids:
+                    continue
+                entries.append(_map_tmdb_item(item, genre_map, is_top=True))
+                seen_ids.add(tmdb_id)
+                count += 1
+            yield entries, {"stage": "top", "page": page}
+            if count >= top_limit:
+                break
+        state = {"stage": "discover", "page": 0, "top_count": count}
+        yield [], state
+
+    # Resto del catálogo por rating (no solo lo más reciente)
+    remaining = max(total - int(state["top_count"]), 0)
+    discover_pages = math.ceil(remaining / PAGE_SIZE)
+    if discover_pages <= int(state["page"]) or count >= total:
+        return
+    listing = client.iter_discover_pages(
+        pages=discover_pages,
+        language=language,
+        vote_count_gte=vote_count_gte,
+        sort_by="vote_average.desc",
+        first_page=int(state["page"]) + 1,
+    )
+    for page, items in listing:
+        entries = []
+        for item in items:
             tmdb_id = int(item["id"])
-            if tmdb_id in seen_ids:
+            if count >= total or tmdb_id in seen_ids:
                 continue
-            movies.append(_map_tmdb_item(item, genre_map, is_top=False))
+            entries.append(_map_tmdb_item(item, genre_map, is_top=False))
             seen_ids.add(tmdb_id)
-            if len(movies) >= total:
+            count += 1
+        yield entries, {"stage": "discover", "page": page, "top_count": state["top_count"]}
+        if count >= total:
+            break
+
+
+def stream_catalog(
+    writer: CatalogWriter,
+    client: TMDbClient,
+    total: int = 1000,
+    top_limit: int = 100,
+    language: str = "en-US",
+    vote_count_gte: int = 500,
+) -> int:
+    """Descarga el catálogo escribiéndolo página a página en `writer`; devuelve cuántas películas escribió.
+
+    Misma selección y orden que `fetch_catalog`, pero en memoria solo quedan los
+    ids vistos. Tras cada página completa se hace checkpoint; si la corrida se
+    corta, al relanzarla con los mismos parámetros se retoma desde la página
+    siguiente a la última confirmada.
+    """
+    key = {"total": total, "top_limit": top_limit, "language": language, "vote_count_gte": vote_count_gte}
+    state = writer.open(resume_key=key)
+    seen_ids = {int(item["id"]) for item in writer.read_items()} if writer.count else set()
+    try:
+        pages = _iter_catalog_pages(
+            client, total, top_limit, language, vote_count_gte, state=state, seen_ids=seen_ids, count=writer.count
+        )
+        for entries, page_state in pages:
+            writer.write_all(entries)
+            writer.checkpoint(page_state)
+        return writer.finish()
+    finally:
+        writer.close()
+
+
+# El feed `/movie/changes` de TMDb solo admite ventanas de hasta 14 días.
+CHANGES_WINDOW_DAYS = 14
+
+
+@dataclass
+class RefreshReport:
+    """Resultado de un refresco incremental del catálogo."""
+
+    checked: int = 0
+    updated: int = 0
+    added: int = 0
+    # Ids del feed de cambios que no estaban en el catálogo y se consultaron para sumarlos.
+    candidates: int = 0
+    top_changed: int = 0
+    # Películas que TMDb ya no tiene (404 en el detalle); se conservan como estaban.
+    missing: int = 0
+    full_recheck: bool = False
+
+
+def _fetched_on(entry: Dict[str, object]) -> Optional[date]:
+    raw = entry.get("fetched_at")
+    try:
+        return date.fromisoformat(str(raw)) if raw else None
+    except ValueError:
+        return None
+
+
+def catalog_last_refresh(entries: List[Dict[str, object]], path: Optional[Path] = None) -> Optional[date]:
+    """Fecha del último refresco: el `fetched_at` más reciente o, si falta, el mtime del archivo."""
+    dates = [fetched for fetched in (_fetched_on(entry) for entry in entries) if fetched is not None]
+    if dates:
+        return max(dates)
+    if path is not None and path.exists():
+        return date.fromtimestamp(path.stat().st_mtime)
+    return None
+
+
+def refresh_catalog(
+    entries: List[Dict[str, object]],
+    client: TMDbClient,
+    since: Optional[date],
+    top_limit: int = 100,
+    language: str = "en-US",
+    vote_count_gte: int = 500,
+    max_age_days: Optional[int] = None,
+    today: Optional[date] = None,
+) -> RefreshReport:
+    """Actualiza `entries` en el lugar consultando solo lo que cambió desde `since`.
+
+    Se piden las páginas del feed de cambios, las del top (cantidad fija) y el
+    detalle de las películas del catálogo que cambiaron o cuyo `fetched_at` es
+    anterior a `max_age_days`. Las películas del feed que no están en el
+    catálogo también se consultan y se agregan si tienen al menos
+    `vote_count_gte` votos, así que las altas nuevas entran sin re-descargar
+    los listados. Si `since` cae fuera de la ventana del feed se revisan todas
+    las del catálogo.
+    """
+    today = today or date.today()
+    report = RefreshReport()
+    by_id = {int(entry["id"]): entry for entry in entries}
+
+    to_check: Set[int] = set()
+    new_ids: Set[int] = set()
+    if since is None or (today - since).days > CHANGES_WINDOW_DAYS:
+        report.full_recheck = True
+        to_check = set(by_id)
+    else:
+        for movie_id in client.iter_changed_ids(since.isoformat(), today.isoformat()):
+            (to_check if movie_id in by_id else new_ids).add(movie_id)
+    if max_age_days is not None:
+        cutoff = today - timedelta(days=max_age_days)
+        to_check |= {movie_id for movie_id, entry in by_id.items() if (_fetched_on(entry) or date.min) < cutoff}
+
+    # El pool top se recalcula siempre: son pocas páginas y traen popularidad/rating frescos.
+    genre_map = client.get_genres(language=language)
+    top_items: List[Dict[str, object]] = []
+    top_ids: Set[int] = set()
+    for item in client.get_top_rated(pages=math.ceil(top_limit / PAGE_SIZE), language=language, vote_count_gte=vote_count_gte):
+        tmdb_id = int(item["id"])
+        if tmdb_id in top_ids:
+            continue
+        top_items.append(item)
+        top_ids.add(tmdb_id)
+        if len(top_items) >= top_limit:
+            break
+
+    for item in top_items:
+        tmdb_id = int(item["id"])
+        entry = by_id.get(tmdb_id)
+        if entry is None:
+            entry = _map_tmdb_item(item, genre_map, is_top=True)
+            entries.append(entry)
+            by_id[tmdb_id] = entry
+            report.added += 1
+            continue
+        if _apply_listing_fields(entry, item):
+            report.updated += 1
+        to_check.discard(tmdb_id)
+
+    for movie_id, entry in by_id.items():
+        is_top = movie_id in top_ids
+        if bool(entry.get("is_top_100")) != is_top:
+            entry["is_top_100"] = is_top
+            report.top_changed += 1
+
+    # Las nuevas que ya llegaron por el top no hace falta pedirlas de nuevo.
+    new_ids -= top_ids
+    report.checked = len(to_check)
+    report.candidates = len(new_ids)
+    ordered = sorted(to_check | new_ids)
+    for movie_id, details in zip(ordered, client.iter_movie_details(ordered, language=language, missing_ok=True)):
+        entry = by_id.get(movie_id)
+        if entry is None:
+            if details is not None and int(details.get("vote_count") or 0) >= vote_count_gte:
+                entry = _map_tmdb_item(details, genre_map, is_top=False)
+                entries.append(entry)
+                by_id[movie_id] = entry
+                report.added += 1
+            continue
+        if details is None:
+            report.missing += 1
+            continue
+        if _apply_listing_fields(entry, details):
+            report.updated += 1
+    return report
+
+
+@dataclass
+class EnrichReport:
+    """Resultado del enriquecimiento con detalles por película."""
+
+    requested: int = 0
+    resumed: int = 0
+    with_runtime: int = 0
+    # Películas que TMDb ya no tiene (404); quedan sin duración.
+    missing: int = 0
+
+
+def _read_checkpoint(path: Path) -> Dict[int, Dict[str, object]]:
+    """Lee el checkpoint JSON Lines; una última línea truncada (caída a mitad) se ignora."""
+    done: Dict[int, Dict[str, object]] = {}
+    if not path.exists():
+        return done
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
                 break
+            done[int(record["id"])] = record
+    return done
 
-    return movies
+
+def _apply_details(entry: Dict[str, object], record: Dict[str, object]) -> bool:
+    runtime = record.get("runtime")
+    # TMDb devuelve 0 cuando no conoce la duración.
+    entry["duration_minutes"] = int(runtime) if runtime else None
+    if record.get("genres") and not entry.get("genres"):
+        entry["genres"] = list(record["genres"])
+    return entry["duration_minutes"] is not None
+
+
+def enrich_catalog(
+    entries: List[Dict[str, object]],
+    client: TMDbClient,
+    checkpoint_path: Optional[Path] = None,
+    language: str = "en-US",
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> EnrichReport:
+    """Completa `duration_minutes` (y géneros faltantes) pidiendo el detalle de cada película.
+
+    Los detalles se piden con la concurrencia del cliente y cada resultado se
+    agrega al checkpoint JSON Lines antes de seguir; al relanzar tras una caída
+    solo se piden las películas que faltan. Una película borrada en TMDb (404)
+    se anota en el checkpoint sin duración, para no volver a pedirla.
+    `progress(hechas, total)` se invoca por cada película resuelta.
+    """
+    report = EnrichReport()
+    done = _read_checkpoint(checkpoint_path) if checkpoint_path else {}
+    pending: List[int] = []
+    for entry in entries:
+        if entry.get("duration_minutes") is not None:
+            continue
+        record = done.get(int(entry["id"]))
+        if record is not None:
+            report.resumed += 1
+            report.with_runtime += _apply_details(entry, record)
+        else:
+            pending.append(int(entry["id"]))
+
+    by_id = {int(entry["id"]): entry for entry in entries}
+    report.requested = len(pending)
+    total = report.resumed + len(pending)
+    handle = checkpoint_path.open("a", encoding="utf-8") if checkpoint_path else None
+    try:
+        fetched = zip(pending, client.iter_movie_details(pending, language=language, missing_ok=True))
+        for index, (movie_id, details) in enumerate(fetched, start=1):
+            if details is None:
+                report.missing += 1
+                record = {"id": movie_id, "runtime": None, "genres": []}
+            else:
+                record = {
+                    "id": movie_id,
+                    "runtime": details.get("runtime"),
+                    "genres": [genre["name"] for genre in details.get("genres") or []],
+                }
+            if handle is not None:
+                handle.write(json.dumps(record) + "\n")
+                handle.flush()
+            report.with_runtime += _apply_details(by_id[record["id"]], record)
+            if progress is not None:
+                progress(report.resumed + index, total)
+    finally:
+        if handle is not None:
+            handle.close()
+    return report
 
 
 def save_catalog_to_file(
@@ -87,21 +418,70 @@ def save_catalog_to_file(
     top_limit: int = 100,
     language: str = "en-US",
     vote_count_gte: int = 50,
-) -> None:
-    """Descarga y guarda el catálogo en un archivo JSON."""
+    max_workers: int = 8,
+    rate_per_second: Optional[float] = DEFAULT_RATE_PER_SECOND,
+    cache_path: Optional[Path] = None,
+    cache_ttl_seconds: float = 24 * 3600,
+    incremental: bool = False,
+    max_age_days: Optional[int] = None,
+    enrich: bool = False,
+) -> Dict[str, float]:
+    """Descarga y guarda el catálogo en un archivo JSON; devuelve las métricas del cliente.
+
+    La descarga completa se escribe a medida que llegan las páginas y se retoma
+    si una corrida anterior se cortó (ver `stream_catalog`). Con `incremental`
+    y un archivo previo, solo se consulta lo que cambió (ver `refresh_catalog`).
+    Con `enrich` se completan las duraciones (ver `enrich_catalog`), con un
+    checkpoint junto al archivo de salida que se borra al terminar. El archivo
+    final siempre se publica con un rename atómico.
+    """
     key = api_key or os.getenv("TMDB_API_KEY")
     if not key:
         raise ValueError("TMDB_API_KEY no definido y no se proporcionó api_key")
 
-    movies = fetch_catalog(
-        api_key=key,
-        total=total,
-        top_limit=top_limit,
-        language=language,
-        vote_count_gte=vote_count_gte,
-    )
     target_path.parent.mkdir(parents=True, exist_ok=True)
-    target_path.write_text(json.dumps(movies, indent=2), encoding="utf-8")
+    checkpoint = target_path.with_name(target_path.name + ".enrich.jsonl")
+    # Con `enrich`, la descarga se publica primero aquí; si la corrida se cae
+    # enriqueciendo, la siguiente reutiliza este archivo en vez de descargar de nuevo.
+    fetched = target_path.with_name(target_path.name + ".fetched")
+    cache = ResponseCache(cache_path, ttl_seconds=cache_ttl_seconds) if cache_path else None
+    client = TMDbClient(api_key=key, max_workers=max_workers, rate_per_second=rate_per_second, cache=cache)
+    movies: Optional[List[Dict[str, object]]] = None
+    try:
+        if incremental and target_path.exists():
+            movies = json.loads(target_path.read_text(encoding="utf-8"))
+            refresh_catalog(
+                movies,
+                client,
+                since=catalog_last_refresh(movies, target_path),
+                top_limit=top_limit,
+                language=language,
+                vote_count_gte=vote_count_gte,
+                max_age_days=max_age_days,
+            )
+        else:
+            writer = CatalogWriter(fetched if enrich else target_path)
+            if not (enrich and fetched.exists() and not writer.progress_path.exists()):
+                stream_catalog(
+                    writer,
+                    client,
+                    total=total,
+                    top_limit=top_limit,
+                    language=language,
+                    vote_count_gte=vote_count_gte,
+                )
+            if enrich:
+                movies = json.loads(fetched.read_text(encoding="utf-8"))
+        if enrich:
+            enrich_catalog(movies, client, checkpoint_path=checkpoint, language=language)
+    finally:
+        client.close()
+    if movies is not None:
+        write_catalog(target_path, movies)
+    if enrich:
+        checkpoint.unlink(missing_ok=True)
+        fetched.unlink(missing_ok=True)
+    return client.stats.as_dict()
 
 
 def main() -> None:
@@ -113,6 +493,19 @@ def main() -> None:
     parser.add_argument("--top-limit", type=int, default=100, help="Cantidad de películas top populares")
     parser.add_argument("--language", default="en-US", help="Idioma de los resultados")
     parser.add_argument("--vote-count-gte", type=int, default=50, help="Votos mínimos para discover")
+    parser.add_argument("--workers", type=int, default=8, help="Páginas pedidas en paralelo")
+    parser.add_argument(
+        "--rate", type=float, default=DEFAULT_RATE_PER_SECOND, help="Peticiones por segundo (0 = sin límite)"
+    )
+    parser.add_argument("--cache", default=None, help="Archivo SQLite para cachear respuestas de TMDb")
+    parser.add_argument("--cache-ttl", type=float, default=24.0, help="Vigencia de la caché en horas")
+    parser.add_argument(
+        "--incremental", action="store_true", help="Actualiza el archivo existente consultando solo los cambios"
+    )
+    parser.add_argument(
+        "--max-age-days", type=int, default=None, help="Con --incremental, revisa también entradas más viejas"
+    )
+    parser.add_argument("--enrich", action="store_true", help="Pide el detalle de cada película (duración)")
     parser.add_argument(
         "--output",
         default=str(Path(__file__).resolve().parents[2] / "data" / "movies.json"),
@@ -123,15 +516,27 @@ def main() -> None:
     if not args.api_key:
         raise SystemExit("TMDB_API_KEY no definido. Usa --api-key o exporta la variable de entorno.")
 
-    save_catalog_to_file(
+    stats = save_catalog_to_file(
         target_path=Path(args.output),
         api_key=args.api_key,
         total=args.total,
         top_limit=args.top_limit,
         language=args.language,
         vote_count_gte=args.vote_count_gte,
+        max_workers=args.workers,
+        rate_per_second=args.rate or None,
+        cache_path=Path(args.cache) if args.cache else None,
+        cache_ttl_seconds=args.cache_ttl * 3600,
+        incremental=args.incremental,
+        max_age_days=args.max_age_days,
+        enrich=args.enrich,
     )
     print(f"Catálogo guardado en {args.output}")
+    print(
+        f"Peticiones: {stats['requests']} ({stats['requests_per_second']}/s), "
+        f"reintentos: {stats['retries']}, 429: {stats['throttled']}, "
+        f"caché: {stats['cache_hits']} aciertos / {stats['revalidated']} revalidadas"
+    )
 
 
 if __name__ == "__main__":
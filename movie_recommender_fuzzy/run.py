@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
 from typing import Iterable, List
 
 from movie_recommender_fuzzy.domain.models import Interaction, Movie
+from movie_recommender_fuzzy.infra.catalog import load_movies
 from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
 from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
 from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
@@ -15,27 +15,6 @@ from movie_recommender_fuzzy.services.recommendation_service import Recommendati
 from movie_recommender_fuzzy.services.session_service import SessionService
 
 
-def load_movies(path: Path) -> List[Movie]:
-    """Carga películas desde un JSON compatible con el modelo Movie."""
-    data = json.loads(path.read_text(encoding="utf-8"))
-    movies: List[Movie] = []
-    for item in data:
-        movies.append(
-            Movie(
-                id=int(item["id"]),
-                title=str(item.get("title", "")),
-                year=int(item.get("year", 0)),
-                genres=list(item.get("genres") or []),
-                duration_minutes=item.get("duration_minutes"),
-                popularity=float(item.get("popularity", 0.0)),
-                rating=float(item["rating"]) if item.get("rating") is not None else None,
-                poster_url=item.get("poster_url"),
-                is_top_100=bool(item.get("is_top_100", False)),
-            )
-        )
-    return movies
-
-
 def bootstrap_repositories(movies: Iterable[Movie]) -> tuple[MovieRepository, SessionRepository, InteractionRepository]:
     """Inicializa repositorios en memoria y carga películas."""
     db = InMemoryDB()
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from movie_recommender_fuzzy.domain.models import Interaction
+
+
+def is_positive(interaction: Interaction) -> bool:
+    """Cuenta como co-like un LIKE sin puntaje o un puntaje de 4 o 5."""
+    if interaction.score is not None:
+        return interaction.score >= 4
+    return interaction.decision == Interaction.LIKE
+
+
+class CoOccurrenceIndex:
+    """Índice ítem-ítem de co-likes: películas que gustan en la misma sesión.
+
+    Por película se guardan a lo sumo `2 * neighbors` vecinos con su cuenta de
+    co-likes; al llenarse, un vecino nuevo reemplaza al de menor cuenta y la
+    hereda (space-saving), así que los frecuentes sobreviven. Cada like nuevo
+    se cruza solo con los últimos `history` likes de su sesión y se recuerdan
+    como mucho `max_sessions` sesiones: el costo por interacción está acotado.
+
+    `version` aumenta con cada lote que suma algún like (y con cada
+    `rebuild`), para saber si un cálculo hecho con el índice quedó viejo.
+    """
+
+    def __init__(self, neighbors: int = 50, history: int = 50, max_sessions: int = 10000, shrinkage: float = 1.0):
+        self.neighbors = neighbors
+        self.history = history
+        self.max_sessions = max_sessions
+        self.shrinkage = shrinkage
+        self._capacity = 2 * neighbors
+        self._likes: Dict[int, int] = {}
+        self._co_likes: Dict[int, Dict[int, float]] = {}
+        self._recent: OrderedDict[int, Deque[int]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Likes registrados mientras corre un `rebuild`, para no perderlos en el reemplazo.
+        self._pending: Optional[List[Interaction]] = None
+        self.version = 0
+
+    def record(self, interactions: Iterable[Interaction]) -> None:
+        """Suma los likes de `interactions` al índice (las demás decisiones se ignoran)."""
+        with self._lock:
+            added = False
+            for interaction in interactions:
+                if is_positive(interaction):
+                    self._add_like(interaction.session_id, interaction.movie_id)
+                    if self._pending is not None:
+                        self._pending.append(interaction)
+                    added = True
+            if added:
+                self.version += 1
+
+    def rebuild(self, interactions: Iterable[Interaction]) -> None:
+        """Reemplaza el contenido por uno armado desde cero con `interactions` (en orden de id).
+
+        El índice nuevo se arma fuera del lock, así que las consultas siguen
+        respondiendo con el anterior. Los likes que llegan por `record` mientras
+        tanto y cuyo id es mayor que el último leído se vuelven a aplicar antes
+        del reemplazo.
+        """
+        with self._lock:
+            self._pending = []
+        fresh = CoOccurrenceIndex(self.neighbors, self.history, self.max_sessions, self.shrinkage)
+        last_id = 0
+
+        def tracked() -> Iterator[Interaction]:
+            nonlocal last_id
+            for interaction in interactions:
+                last_id = max(last_id, interaction.id)
+                yield interaction
+
+        try:
+            fresh.record(tracked())
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending or [], None
+        with self._lock:
+            for interaction in pending:
+                if interaction.id > last_id:
+                    fresh._add_like(interaction.session_id, interaction.movie_id)
+            self._likes, self._co_likes, self._recent = fresh._likes, fresh._co_likes, fresh._recent
+            self.version += 1
+
+    def _add_like(self, session_id: int, movie_id: int) -> None:
+        recent = self._recent.get(session_id)
+        if recent is None:
+            recent = self._recent[session_id] = deque(maxlen=self.history)
+            while len(self._recent) > self.max_sessions:
+                self._recent.popitem(last=False)
+        else:
+            self._recent.move_to_end(session_id)
+        if movie_id in recent:
+            return
+        self._likes[movie_id] = self._likes.get(movie_id, 0) + 1
+        for other in recent:
+            self._bump(movie_id, other)
+            self._bump(other, movie_id)
+        recent.append(movie_id)
+
+    def _bump(self, movie_id: int, neighbor: int) -> None:
+        counts = self._co_likes.setdefault(movie_id, {})
+        if neighbor in counts:
+            counts[neighbor] += 1
+            return
+        if len(counts) < self._capacity:
+            counts[neighbor] = 1
+            return
+        evicted = min(counts, key=counts.__getitem__)
+        counts[neighbor] = counts.pop(evicted) + 1
+
+    def _similarity(self, co_likes: float, movie_id: int, neighbor: int) -> float:
+        # Coseno entre los vectores de likes, encogido cuando hay pocos co-likes.
+        norm = math.sqrt(self._likes.get(movie_id, 1) * self._likes.get(neighbor, 1))
+        return min(1.0, co_likes / norm) * co_likes / (co_likes + self.shrinkage)
+
+    def neighbors_of(self, movie_id: int) -> Dict[int, float]:
+        """Los `neighbors` vecinos más parecidos a la película, con su similitud en [0, 1]."""
+        with self._lock:
+            similar = [
+                (neighbor, self._similarity(count, movie_id, neighbor))
+                for neighbor, count in self._co_likes.get(movie_id, {}).items()
+            ]
+        similar.sort(key=lambda item: item[1], reverse=True)
+        return dict(similar[: self.neighbors])
+
+    def similarities(self, liked_ids: Iterable[int]) -> Dict[int, float]:
+        """Similitud colaborativa de cada película con las que gustaron: la mayor contra alguna de ellas.
+
+        Recorre solo los vecinos guardados de `liked_ids` (O(likes × vecinos));
+        una película que no aparece tiene similitud 0.
+        """
+        scores: Dict[int, float] = {}
+        with self._lock:
+            for liked in liked_ids:
+                for neighbor, count in self._co_likes.get(liked, {}).items():
+                    similarity = self._similarity(count, liked, neighbor)
+                    if similarity > scores.get(neighbor, 0.0):
+                        scores[neighbor] = similarity
+        return scores
+
+
+class CoOccurrenceRebuilder:
+    """Rearma un `CoOccurrenceIndex` desde el historial guardado cada `interval` segundos.
+
+    Con varios workers (`serve`) cada proceso suma a su índice solo el tráfico
+    que atiende, así que los índices se van separando; rearmarlos desde el
+    almacén compartido los vuelve a alinear. Los hilos no sobreviven al `fork`,
+    por eso no hay un hilo propio: `maybe_rebuild()` se llama en cada petición
+    y, si ya venció el plazo, lanza el rearmado en segundo plano (uno a la vez
+    por proceso).
+    """
+
+    def __init__(
+        self,
+        index: CoOccurrenceIndex,
+        source: Callable[[], Iterable[Interaction]],
+        interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._index = index
+        self._source = source
+        self.interval = interval
+        self._clock = clock
+        self._due = clock() + interval
+        self._running = threading.Lock()
+        self.rebuilds = 0
+
+    def maybe_rebuild(self) -> Optional[threading.Thread]:
+        """Si venció el plazo y no hay otro en curso, lanza el rearmado y devuelve su hilo."""
+        if self._clock() < self._due or not self._running.acquire(blocking=False):
+            return None
+        thread = threading.Thread(target=self._run, name="co-occurrence-rebuild", daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self) -> None:
+        try:
+            self._index.rebuild(self._source())
+            self.rebuilds += 1
+        finally:
+            self._due = self._clock() + self.interval
+            self._running.release()
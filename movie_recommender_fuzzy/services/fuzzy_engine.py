@@ -1,6 +1,57 @@
 from __future__ import annotations
 
-from typing import Dict
+import json
+from dataclasses import dataclass, field
+from itertools import repeat
+from operator import mul
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+Triangle = Tuple[float, float, float]
+
+# Entradas del motor, en el orden de los argumentos de `compute_relevance`.
+INPUTS = ("affinity", "popularity", "rating_similarity", "collaborative")
+OUTPUT_LABELS = ("verylow", "low", "med", "high", "veryhigh")
+
+DEFAULT_INPUT_SETS: Dict[str, Triangle] = {
+    "low": (0.0, 0.0, 0.4),
+    "med": (0.2, 0.5, 0.8),
+    "high": (0.6, 1.0, 1.0),
+}
+DEFAULT_OUTPUT_SETS: Dict[str, Triangle] = {
+    "verylow": (0.0, 0.0, 0.2),
+    "low": (0.1, 0.25, 0.4),
+    "med": (0.35, 0.5, 0.65),
+    "high": (0.6, 0.75, 0.9),
+    "veryhigh": (0.8, 1.0, 1.0),
+}
+
+# Base de reglas: (conclusión, antecedentes unidos con AND). Un conjunto
+# `not_<x>` es el complemento de `<x>`.
+RULES: Tuple[Tuple[str, Tuple[Tuple[str, str], ...]], ...] = (
+    ("veryhigh", (("affinity", "high"), ("rating_similarity", "high"))),
+    # Una similitud colaborativa alta le quita fuerza a las conclusiones tibias
+    # (NOT col alta); con similitud 0 las reglas quedan como sin esta entrada.
+    ("high", (("affinity", "high"), ("popularity", "high"), ("collaborative", "not_high"))),
+    ("high", (("affinity", "med"), ("rating_similarity", "high"), ("collaborative", "not_high"))),
+    ("high", (("affinity", "high"), ("popularity", "med"), ("collaborative", "not_high"))),
+    ("med", (("affinity", "med"), ("popularity", "med"), ("collaborative", "not_high"))),
+    ("med", (("affinity", "low"), ("popularity", "high"), ("collaborative", "not_high"))),
+    ("med", (("affinity", "high"), ("popularity", "low"), ("collaborative", "not_high"))),
+    ("low", (("affinity", "low"), ("rating_similarity", "med"), ("collaborative", "not_high"))),
+    ("low", (("affinity", "low"), ("rating_similarity", "low"), ("collaborative", "not_high"))),
+    (
+        "verylow",
+        (("affinity", "low"), ("popularity", "low"), ("rating_similarity", "low"), ("collaborative", "not_high")),
+    ),
+    # Similitud colaborativa: gustó junto con lo que ya le gustó al usuario.
+    ("veryhigh", (("affinity", "high"), ("collaborative", "high"))),
+    ("high", (("affinity", "med"), ("collaborative", "high"))),
+    ("med", (("affinity", "low"), ("collaborative", "high"))),
+)
+
+# Desfuzzificación por centroide muestreado: 0.00 a 1.00 con paso 0.005.
+GRID = [i / 200 for i in range(0, 201)]
 
 
 def _clamp_01(value: float) -> float:
@@ -31,92 +82,245 @@ def _triangular(x: float, a: float, b: float, c: float) -> float:
     return (c - x) / (c - b)
 
 
+@dataclass
+class FuzzyConfig:
+    """Conjuntos borrosos y pesos de las reglas del motor.
+
+    `inputs` tiene los triángulos (a, b, c) de low/med/high por entrada y
+    `outputs` los de las cinco etiquetas de salida; `rule_weights` escala la
+    fuerza de cada regla de `RULES`, en el mismo orden. Los valores por
+    defecto son los del motor original.
+    """
+
+    inputs: Dict[str, Dict[str, Triangle]] = field(
+        default_factory=lambda: {name: dict(DEFAULT_INPUT_SETS) for name in INPUTS}
+    )
+    outputs: Dict[str, Triangle] = field(default_factory=lambda: dict(DEFAULT_OUTPUT_SETS))
+    rule_weights: List[float] = field(default_factory=lambda: [1.0] * len(RULES))
+
+    def to_dict(self) -> dict:
+        return {
+            "inputs": {name: {label: list(tri) for label, tri in sets.items()} for name, sets in self.inputs.items()},
+            "outputs": {label: list(tri) for label, tri in self.outputs.items()},
+            "rule_weights": list(self.rule_weights),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FuzzyConfig":
+        """Arma la configuración; lo que falta en `data` queda con el valor por defecto."""
+        config = cls()
+        for name, sets in data.get("inputs", {}).items():
+            if name not in config.inputs:
+                raise ValueError(f"Entrada desconocida: {name}")
+            for label, tri in sets.items():
+                config.inputs[name][label] = _triangle(tri)
+        for label, tri in data.get("outputs", {}).items():
+            if label not in config.outputs:
+                raise ValueError(f"Etiqueta de salida desconocida: {label}")
+            config.outputs[label] = _triangle(tri)
+        if "rule_weights" in data:
+            if len(data["rule_weights"]) != len(RULES):
+                raise ValueError(f"Se esperaban {len(RULES)} pesos de reglas, llegaron {len(data['rule_weights'])}")
+            config.rule_weights = [float(weight) for weight in data["rule_weights"]]
+        return config
+
+    @classmethod
+    def load(cls, path: Path) -> "FuzzyConfig":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def save(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+
+
+def _triangle(values) -> Triangle:
+    a, b, c = (float(value) for value in values)
+    if not 0.0 <= a <= b <= c <= 1.0:
+        raise ValueError(f"Triángulo inválido: {(a, b, c)}")
+    return a, b, c
+
+
+def _antecedent(name: str, fuzzy_set: str) -> Tuple[str, str, bool]:
+    if fuzzy_set.startswith("not_"):
+        return name, fuzzy_set[len("not_") :], True
+    return name, fuzzy_set, False
+
+
+@dataclass
+class _Segment:
+    """Tramo de `GRID` donde son distintas de cero las mismas etiquetas de salida.
+
+    `mass` y `moment` son, por etiqueta, la suma de su tabla y de x · tabla en
+    el tramo: si solo una de ellas está activa, su aporte al centroide es
+    fuerza · suma, sin recorrer los puntos.
+    """
+
+    labels: Tuple[str, ...]
+    xs: List[float]
+    columns: Dict[str, List[float]]
+    mass: Dict[str, float]
+    moment: Dict[str, float]
+
+
+def _segments(table: Dict[str, List[float]]) -> List[_Segment]:
+    segments: List[_Segment] = []
+    previous: Tuple[str, ...] = ()
+    for index, x in enumerate(GRID):
+        labels = tuple(label for label in OUTPUT_LABELS if table[label][index] > 0)
+        if not labels:
+            previous = labels
+            continue
+        if labels != previous:
+            segments.append(_Segment(labels, [], {label: [] for label in labels}, {}, {}))
+            previous = labels
+        segment = segments[-1]
+        segment.xs.append(x)
+        for label in labels:
+            segment.columns[label].append(table[label][index])
+    for segment in segments:
+        for label, column in segment.columns.items():
+            segment.mass[label] = sum(column)
+            segment.moment[label] = sum(map(mul, segment.xs, column))
+    return segments
+
+
 class FuzzyEngine:
-    """Motor difuso (Mamdani) para calcular la relevancia de una película."""
+    """Motor difuso (Mamdani) para calcular la relevancia de una película.
 
-    @staticmethod
-    def compute_relevance(affinity: float, popularity: float, rating_similarity: float) -> float:
+    Los conjuntos y pesos salen de `config` (por defecto, los originales). Las
+    funciones de pertenencia de salida se muestrean sobre `GRID` una sola vez,
+    al crear el motor, y se parten en tramos (`_Segment`) para desfuzzificar
+    recorriendo solo los puntos donde se solapan dos etiquetas activas.
+    `DEFAULT_ENGINE` es un motor compartido con la configuración por defecto.
+    """
+
+    def __init__(self, config: Optional[FuzzyConfig] = None):
+        self.config = config or FuzzyConfig()
+        self._rules = [
+            (label, weight, tuple(_antecedent(name, fuzzy_set) for name, fuzzy_set in antecedents))
+            for (label, antecedents), weight in zip(RULES, self.config.rule_weights)
+        ]
+        self._output_table = {
+            label: [_triangular(x, *self.config.outputs[label]) for x in GRID] for label in OUTPUT_LABELS
+        }
+        self._segments = _segments(self._output_table)
+
+    def compute_relevance(
+        self, affinity: float, popularity: float, rating_similarity: float, collaborative: float = 0.0
+    ) -> float:
         """Devuelve solo la puntuación de relevancia."""
-        score, _ = FuzzyEngine.compute_relevance_with_breakdown(affinity, popularity, rating_similarity)
+        score, _ = self.compute_relevance_with_breakdown(affinity, popularity, rating_similarity, collaborative)
         return score
 
-    @staticmethod
+    def compute_relevance_many(self, inputs: Iterable[Sequence[float]]) -> List[float]:
+        """`compute_relevance` de muchas entradas (affinity, popularity, rating_similarity[, collaborative]).
+
+        Da los mismos valores sin armar el desglose. Trabaja por columnas: cada
+        grado de pertenencia y cada regla se calculan para todo el lote de una
+        vez, y se desfuzzifica una sola vez por combinación distinta de fuerzas.
+        """
+        rows = [(*values, 0.0)[: len(INPUTS)] for values in inputs]
+        if not rows:
+            return []
+        degrees: Dict[Tuple[str, str, bool], List[float]] = {}
+        for name, column in zip(INPUTS, zip(*rows)):
+            column = list(map(_clamp_01, column))
+            for fuzzy_set, (a, b, c) in self.config.inputs[name].items():
+                degrees[name, fuzzy_set, False] = [_triangular(value, a, b, c) for value in column]
+        strengths: Dict[str, List[List[float]]] = {label: [] for label in OUTPUT_LABELS}
+        for label, weight, antecedents in self._rules:
+            for name, fuzzy_set, negated in antecedents:
+                if negated and (name, fuzzy_set, True) not in degrees:
+                    degrees[name, fuzzy_set, True] = [1.0 - degree for degree in degrees[name, fuzzy_set, False]]
+            strength = map(min, *(degrees[antecedent] for antecedent in antecedents))
+            strengths[label].append(list(map(mul, strength, repeat(weight, len(rows)))))
+
+        zeros = [0.0] * len(rows)
+        columns = [list(map(max, zeros, *strengths[label])) for label in OUTPUT_LABELS]
+        centroids: Dict[Tuple[float, ...], float] = {}
+        scores: List[float] = []
+        for key in zip(*columns):
+            score = centroids.get(key)
+            if score is None:
+                score = centroids[key] = self._centroid(dict(zip(OUTPUT_LABELS, key)))
+            scores.append(score)
+        return scores
+
     def compute_relevance_with_breakdown(
-        affinity: float, popularity: float, rating_similarity: float
+        self, affinity: float, popularity: float, rating_similarity: float, collaborative: float = 0.0
     ) -> tuple[float, dict]:
-        """Motor Mamdani paso a paso: fuzzificación, reglas, agregación y desfuzzificación (centroide)."""
+        """Motor Mamdani paso a paso: fuzzificación, reglas, agregación y desfuzzificación (centroide).
+
+        `collaborative` es la similitud por co-likes con lo que ya gustó en la
+        sesión. Sus reglas solo se activan cuando es alta (las demás piden que no
+        lo sea), así que con 0 el resultado es el mismo que con tres entradas.
+        """
         # 1) Fuzzificación de entradas (triangulares)
-        affinity = _clamp_01(affinity)
-        popularity = _clamp_01(popularity)
-        rating_similarity = _clamp_01(rating_similarity)
-
-        def fuzzify(x: float) -> Dict[str, float]:
-            return {
-                "low": _triangular(x, 0.0, 0.0, 0.4),
-                "med": _triangular(x, 0.2, 0.5, 0.8),
-                "high": _triangular(x, 0.6, 1.0, 1.0),
-            }
-
-        f_aff = fuzzify(affinity)
-        f_pop = fuzzify(popularity)
-        f_rat = fuzzify(rating_similarity)
-
-        # 2) Base de reglas (min para AND). Etiquetas de salida: verylow, low, med, high, veryhigh.
-        output_strengths: Dict[str, float] = {
-            "verylow": 0.0,
-            "low": 0.0,
-            "med": 0.0,
-            "high": 0.0,
-            "veryhigh": 0.0,
+        values = {
+            "affinity": _clamp_01(affinity),
+            "popularity": _clamp_01(popularity),
+            "rating_similarity": _clamp_01(rating_similarity),
+            "collaborative": _clamp_01(collaborative),
+        }
+        fuzzy = {
+            name: {label: _triangular(values[name], *tri) for label, tri in self.config.inputs[name].items()}
+            for name in INPUTS
         }
 
-        def apply(label: str, *vals: float) -> None:
-            output_strengths[label] = max(output_strengths[label], min(vals))
-
-        apply("veryhigh", f_aff["high"], f_rat["high"])
-        apply("high", f_aff["high"], f_pop["high"])
-        apply("high", f_aff["med"], f_rat["high"])
-        apply("high", f_aff["high"], f_pop["med"])
-        apply("med", f_aff["med"], f_pop["med"])
-        apply("med", f_aff["low"], f_pop["high"])
-        apply("med", f_aff["high"], f_pop["low"])
-        apply("low", f_aff["low"], f_rat["med"])
-        apply("low", f_aff["low"], f_rat["low"])
-        apply("verylow", f_aff["low"], f_pop["low"], f_rat["low"])
-
-        # 3) Agregación de salidas: conjuntos triangulares para relevancia
-        def out_membership(label: str, x: float) -> float:
-            if label == "verylow":
-                return _triangular(x, 0.0, 0.0, 0.2)
-            if label == "low":
-                return _triangular(x, 0.1, 0.25, 0.4)
-            if label == "med":
-                return _triangular(x, 0.35, 0.5, 0.65)
-            if label == "high":
-                return _triangular(x, 0.6, 0.75, 0.9)
-            if label == "veryhigh":
-                return _triangular(x, 0.8, 1.0, 1.0)
-            return 0.0
+        # 2) Base de reglas (min para AND, escalado por el peso de la regla).
+        output_strengths = self._strengths(fuzzy)
 
-        # 4) Desfuzzificación por centroide (muestreado)
-        xs = [i / 200 for i in range(0, 201)]  # 0.00 a 1.00 con paso 0.005
-        num = 0.0
-        den = 0.0
-        for x in xs:
-            mu = max(output_strengths[label] * out_membership(label, x) for label in output_strengths)
-            num += x * mu
-            den += mu
-        final = num / den if den > 0 else 0.0
+        # 3) Agregación (máximo de los conjuntos de salida escalados) y
+        # 4) desfuzzificación por centroide sobre la grilla.
+        final = self._centroid(output_strengths)
 
         breakdown = {
-            "affinity": affinity,
-            "rating_similarity": rating_similarity,
-            "popularity": popularity,
-            "fuzzy_affinity": f_aff,
-            "fuzzy_popularity": f_pop,
-            "fuzzy_rating": f_rat,
+            "affinity": values["affinity"],
+            "rating_similarity": values["rating_similarity"],
+            "popularity": values["popularity"],
+            "collaborative": values["collaborative"],
+            "fuzzy_affinity": fuzzy["affinity"],
+            "fuzzy_popularity": fuzzy["popularity"],
+            "fuzzy_rating": fuzzy["rating_similarity"],
+            "fuzzy_collaborative": fuzzy["collaborative"],
             "output_strengths": output_strengths,
             "penalty": 1.0,  # sin penalización adicional en esta versión
             "final": final,
         }
         return final, breakdown
+
+    def _strengths(self, fuzzy: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+        # Grado de cada antecedente posible: (entrada, conjunto, negado).
+        degrees: Dict[Tuple[str, str, bool], float] = {}
+        for name, sets in fuzzy.items():
+            for fuzzy_set, degree in sets.items():
+                degrees[name, fuzzy_set, False] = degree
+                degrees[name, fuzzy_set, True] = 1.0 - degree
+        output_strengths: Dict[str, float] = dict.fromkeys(OUTPUT_LABELS, 0.0)
+        for label, weight, antecedents in self._rules:
+            strength = weight * min(map(degrees.__getitem__, antecedents))
+            if strength > output_strengths[label]:
+                output_strengths[label] = strength
+        return output_strengths
+
+    def _centroid(self, output_strengths: Dict[str, float]) -> float:
+        num = den = 0.0
+        for segment in self._segments:
+            active = [label for label in segment.labels if output_strengths[label] > 0]
+            if len(active) == 1:
+                strength = output_strengths[active[0]]
+                num += strength * segment.moment[active[0]]
+                den += strength * segment.mass[active[0]]
+            elif active:
+                # Agregación: máximo de los conjuntos de salida escalados, punto a punto.
+                scaled = [
+                    map(mul, segment.columns[label], repeat(output_strengths[label], len(segment.xs)))
+                    for label in active
+                ]
+                aggregated = list(map(max, *scaled))
+                num += sum(map(mul, segment.xs, aggregated))
+                den += sum(aggregated)
+        return num / den if den > 0 else 0.0
+
+
+# Motor compartido con la configuración por defecto.
+DEFAULT_ENGINE = FuzzyEngine()
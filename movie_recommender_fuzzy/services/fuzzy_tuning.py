@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from movie_recommender_fuzzy.domain.models import Interaction
+from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.services.co_occurrence import CoOccurrenceIndex, is_positive
+from movie_recommender_fuzzy.services.fuzzy_engine import INPUTS, OUTPUT_LABELS, RULES, FuzzyConfig, FuzzyEngine
+from movie_recommender_fuzzy.services.offline_evaluation import (
+    interaction_from_json,
+    iter_sessions,
+    load_movie_repository,
+    ranking_metrics,
+    split_by_time,
+)
+from movie_recommender_fuzzy.services.preference_service import PreferenceService
+from movie_recommender_fuzzy.services.recommendation_service import RecommendationService
+
+# (afinidad, popularidad, similitud de rating, similitud colaborativa, gustó)
+Sample = Tuple[float, float, float, float, bool]
+SessionSamples = List[Sample]
+# Coordenada libre de la configuración: ("inputs", entrada, conjunto, vértice),
+# ("outputs", etiqueta, vértice) o ("rules", índice).
+Coordinate = Tuple
+
+# Separación mínima entre vértices de un triángulo interior, para que no
+# degenere en un hombro.
+_MIN_GAP = 1e-4
+
+
+def build_dataset(
+    log_path: Path,
+    catalog_path: Path,
+    holdout: float = 0.3,
+    min_profile: int = 5,
+    max_sessions: int = 2000,
+    max_open: int = 10000,
+) -> List[SessionSamples]:
+    """Entradas del motor difuso de las películas del holdout de cada sesión del log.
+
+    Como en `offline_evaluation`, el comienzo de la sesión arma el perfil; cada
+    película valorada en el resto da una muestra con las mismas entradas que
+    usaría `RecommendationService` y si gustó. La similitud colaborativa sale
+    de un `CoOccurrenceIndex` alimentado con las sesiones anteriores del log.
+    Solo quedan las sesiones con holdout mixto (algo que gustó y algo que no),
+    que son las únicas donde el orden importa.
+    """
+    movie_repo = load_movie_repository(catalog_path)
+    # Solo para `fuzzy_inputs`, que no usa los repositorios de interacciones.
+    empty = InteractionRepository(InMemoryDB())
+    features = RecommendationService(movie_repo, empty, PreferenceService(empty, movie_repo), FuzzyEngine())
+    index = CoOccurrenceIndex()
+    dataset: List[SessionSamples] = []
+    with Path(log_path).open(encoding="utf-8") as handle:
+        interactions = (interaction_from_json(line) for line in handle if line.strip())
+        for session_id, rows in iter_sessions(interactions, max_open=max_open):
+            if len(dataset) >= max_sessions:
+                break
+            profile_rows, holdout_rows = split_by_time(rows, holdout)
+            if sum(row.is_valid_rating() for row in profile_rows) >= min_profile:
+                samples = _session_samples(movie_repo, features, index, session_id, profile_rows, holdout_rows)
+                if len({sample[4] for sample in samples}) == 2:
+                    dataset.append(samples)
+            index.record(rows)
+    return dataset
+
+
+def _session_samples(
+    movie_repo: MovieRepository,
+    features: RecommendationService,
+    index: CoOccurrenceIndex,
+    session_id: int,
+    profile_rows: List[Interaction],
+    holdout_rows: List[Interaction],
+) -> SessionSamples:
+    interaction_repo = InteractionRepository(InMemoryDB())
+    interaction_repo.add_many(profile_rows)
+    profile = PreferenceService(interaction_repo, movie_repo).build_user_profile(profile_rows[0].user_id, session_id)
+    collaborative = index.similarities(row.movie_id for row in profile_rows if is_positive(row))
+    seen = {row.movie_id for row in profile_rows}
+    samples: SessionSamples = []
+    for row in holdout_rows:
+        movie = movie_repo.get(row.movie_id)
+        if movie is None or row.movie_id in seen or not row.is_valid_rating():
+            continue
+        seen.add(row.movie_id)
+        samples.append((*features.fuzzy_inputs(movie, profile), collaborative.get(movie.id, 0.0), is_positive(row)))
+    return samples
+
+
+def score_config(engine: FuzzyEngine, dataset: Sequence[SessionSamples]) -> float:
+    """NDCG promedio de cada sesión al ordenar su holdout como lo haría el recomendador.
+
+    El orden es por afinidad y luego relevancia difusa (empates: orden del
+    holdout), igual que `RecommendationService`. Las muestras de todas las
+    sesiones se evalúan en un solo lote (`FuzzyEngine.compute_relevance_many`).
+    """
+    if not dataset:
+        return 0.0
+    relevances = iter(engine.compute_relevance_many(sample[:4] for samples in dataset for sample in samples))
+    total = 0.0
+    for samples in dataset:
+        keys = [(sample[0], next(relevances), -pos) for pos, sample in enumerate(samples)]
+        ranked = sorted(range(len(samples)), key=keys.__getitem__, reverse=True)
+        relevant = {position for position, sample in enumerate(samples) if sample[4]}
+        total += ranking_metrics(ranked, relevant, len(samples))[2]
+    return total / len(dataset)
+
+
+def free_coordinates(rule_weights: bool = False) -> List[Coordinate]:
+    """Vértices que mueve la búsqueda y, opcionalmente, los pesos de las reglas.
+
+    Los hombros (low/verylow, high/veryhigh) quedan pegados a 0 y 1: solo se
+    mueve su vértice interior.
+    """
+    coordinates: List[Coordinate] = []
+    for name in INPUTS:
+        coordinates.append(("inputs", name, "low", 2))
+        coordinates.extend(("inputs", name, "med", vertex) for vertex in range(3))
+        coordinates.append(("inputs", name, "high", 0))
+    coordinates.append(("outputs", "verylow", 2))
+    for label in OUTPUT_LABELS[1:-1]:
+        coordinates.extend(("outputs", label, vertex) for vertex in range(3))
+    coordinates.append(("outputs", "veryhigh", 0))
+    if rule_weights:
+        coordinates.extend(("rules", index) for index in range(len(RULES)))
+    return coordinates
+
+
+def _triangle_of(config: FuzzyConfig, coordinate: Coordinate) -> Tuple[Dict[str, Tuple], str]:
+    if coordinate[0] == "inputs":
+        return config.inputs[coordinate[1]], coordinate[2]
+    return config.outputs, coordinate[1]
+
+
+def encode(config: FuzzyConfig, coordinates: Sequence[Coordinate]) -> List[float]:
+    vector = []
+    for coordinate in coordinates:
+        if coordinate[0] == "rules":
+            vector.append(config.rule_weights[coordinate[1]])
+        else:
+            sets, label = _triangle_of(config, coordinate)
+            vector.append(sets[label][coordinate[-1]])
+    return vector
+
+
+def decode(vector: Sequence[float], coordinates: Sequence[Coordinate], base: FuzzyConfig) -> FuzzyConfig:
+    """Aplica `vector` sobre `base` y lo repara: todo en [0, 1] y triángulos ordenados.
+
+    Un triángulo conserva la forma que tiene en `base` (hombro izquierdo,
+    derecho o interior).
+    """
+    config = FuzzyConfig.from_dict(base.to_dict())
+    for value, coordinate in zip(vector, coordinates):
+        value = min(1.0, max(0.0, value))
+        if coordinate[0] == "rules":
+            config.rule_weights[coordinate[1]] = value
+            continue
+        sets, label = _triangle_of(config, coordinate)
+        vertices = list(sets[label])
+        vertices[coordinate[-1]] = value
+        sets[label] = tuple(vertices)
+    pairs = [(config.inputs[name], base.inputs[name]) for name in INPUTS] + [(config.outputs, base.outputs)]
+    for sets, base_sets in pairs:
+        for label, triangle in sets.items():
+            sets[label] = _repair(triangle, base_sets[label])
+    return config
+
+
+def _repair(triangle: Tuple[float, float, float], shape: Tuple[float, float, float]) -> Tuple[float, float, float]:
+    a, b, c = triangle
+    if shape[0] == shape[1]:
+        return a, a, max(c, a + _MIN_GAP)
+    if shape[1] == shape[2]:
+        return min(a, c - _MIN_GAP), c, c
+    a, b, c = sorted(min(1.0 - 2 * _MIN_GAP, max(_MIN_GAP, value)) for value in (a, b, c))
+    b = max(b, a + _MIN_GAP)
+    return a, b, max(c, b + _MIN_GAP)
+
+
+@dataclass
+class TuningResult:
+    """Mejor configuración encontrada, su puntaje, el de la inicial y la evolución por generación."""
+
+    config: FuzzyConfig
+    score: float
+    baseline: float
+    evaluations: int
+    history: List[Dict[str, float]]
+
+
+# Muestras de entrenamiento de cada proceso del pool (las carga `_init_worker`).
+_worker_dataset: List[SessionSamples] = []
+_worker_coordinates: List[Coordinate] = []
+_worker_base: Optional[FuzzyConfig] = None
+
+
+def _init_worker(dataset: List[SessionSamples], coordinates: List[Coordinate], base: dict) -> None:
+    global _worker_dataset, _worker_coordinates, _worker_base
+    _worker_dataset, _worker_coordinates, _worker_base = dataset, coordinates, FuzzyConfig.from_dict(base)
+
+
+def _score_vector(vector: List[float]) -> float:
+    return score_config(FuzzyEngine(decode(vector, _worker_coordinates, _worker_base)), _worker_dataset)
+
+
+def tune(
+    dataset: List[SessionSamples],
+    start: Optional[FuzzyConfig] = None,
+    generations: int = 20,
+    population: int = 16,
+    sigma: float = 0.1,
+    search: str = "es",
+    rule_weights: bool = False,
+    workers: int = 1,
+    seed: int = 0,
+    progress: Optional[Callable[[Dict[str, float]], None]] = None,
+) -> TuningResult:
+    """Busca conjuntos (y pesos de reglas) que maximicen `score_config` sobre `dataset`.
+
+    `search="es"` es una estrategia evolutiva (1+λ): cada generación muestrea
+    `population` candidatas alrededor de la mejor con ruido gaussiano de escala
+    `sigma`, que crece tras una mejora y se achica si no la hubo (regla de 1/5,
+    sin adaptar covarianzas como CMA-ES). `search="random"` muestrea uniforme en
+    todo el espacio. Las candidatas se generan en este proceso y se puntúan en
+    `workers` procesos; el resultado no depende de la cantidad de workers.
+    """
+    if search not in ("es", "random"):
+        raise ValueError(f"Búsqueda desconocida: {search}")
+    rng = random.Random(seed)
+    base = start or FuzzyConfig()
+    coordinates = free_coordinates(rule_weights)
+    best_vector = encode(base, coordinates)
+    baseline = best = score_config(FuzzyEngine(base), dataset)
+    history: List[Dict[str, float]] = []
+    evaluations = 0
+    started = time.perf_counter()
+
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(dataset, coordinates, base.to_dict())
+        )
+    else:
+        _init_worker(dataset, coordinates, base.to_dict())
+    try:
+        for generation in range(1, generations + 1):
+            if search == "es":
+                candidates = [[value + rng.gauss(0.0, sigma) for value in best_vector] for _ in range(population)]
+            else:
+                candidates = [[rng.random() for _ in coordinates] for _ in range(population)]
+            if pool is None:
+                scores = [_score_vector(candidate) for candidate in candidates]
+            else:
+                scores = list(pool.map(_score_vector, candidates, chunksize=max(1, population // (4 * workers))))
+            evaluations += len(candidates)
+
+            winner = max(range(len(candidates)), key=scores.__getitem__)
+            improved = scores[winner] > best
+            if improved:
+                best, best_vector = scores[winner], candidates[winner]
+            sigma = min(0.5, sigma * 1.5) if improved else max(0.005, sigma * 0.85)
+
+            elapsed = time.perf_counter() - started
+            entry = {
+                "generation": generation,
+                "evaluations": evaluations,
+                "elapsed_s": round(elapsed, 2),
+                "evals_per_s": round(evaluations / elapsed, 2) if elapsed else 0.0,
+                "best": round(best, 6),
+                "sigma": round(sigma, 4),
+            }
+            history.append(entry)
+            if progress is not None:
+                progress(entry)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return TuningResult(
+        config=decode(best_vector, coordinates, base),
+        score=best,
+        baseline=baseline,
+        evaluations=evaluations,
+        history=history,
+    )
+
+
+def main() -> None:
+    import argparse
+    import os
+
+    from movie_recommender_fuzzy.infra.catalog import DEFAULT_CATALOG_PATH
+
+    parser = argparse.ArgumentParser(
+        description="Ajusta conjuntos borrosos y pesos de reglas del motor contra un log de interacciones."
+    )
+    parser.add_argument("log", help="Log de interacciones (JSONL ordenado por tiempo, como el de `offline_evaluation`)")
+    parser.add_argument("--catalog", default=str(DEFAULT_CATALOG_PATH), help="Catálogo JSON")
+    parser.add_argument("--output", default="fuzzy_config.json", help="Dónde guardar la mejor configuración")
+    parser.add_argument("--start", help="Configuración inicial (por defecto, la del motor)")
+    parser.add_argument("--search", choices=("es", "random"), default="es", help="Estrategia de búsqueda")
+    parser.add_argument("--generations", type=int, default=20, help="Generaciones")
+    parser.add_argument("--population", type=int, default=16, help="Candidatas por generación")
+    parser.add_argument("--sigma", type=float, default=0.1, help="Escala inicial de las mutaciones (es)")
+    parser.add_argument("--rule-weights", action="store_true", help="Ajustar también los pesos de las reglas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos que puntúan candidatas")
+    parser.add_argument("--max-sessions", type=int, default=2000, help="Sesiones del log usadas como muestras")
+    parser.add_argument("--validation", type=float, default=0.2, help="Fracción final de sesiones para validar")
+    parser.add_argument("--holdout", type=float, default=0.3, help="Fracción final de cada sesión que se oculta")
+    parser.add_argument("--min-profile", type=int, default=5, help="Valoraciones válidas mínimas en el perfil")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de la búsqueda")
+    args = parser.parse_args()
+
+    dataset = build_dataset(
+        Path(args.log), Path(args.catalog), args.holdout, args.min_profile, max_sessions=args.max_sessions
+    )
+    cut = len(dataset) - int(len(dataset) * args.validation)
+    train, validation = dataset[:cut], dataset[cut:]
+    samples = sum(len(samples) for samples in train)
+    print(f"{len(train)} sesiones de entrenamiento ({samples} muestras), {len(validation)} de validación")
+
+    def report(entry: Dict[str, float]) -> None:
+        print(
+            f"gen {entry['generation']:>3}  {entry['evaluations']:>5} candidatas  "
+            f"{entry['evals_per_s']:>7.2f} cand/s  {entry['evals_per_s'] * samples:>9.0f} eval/s  "
+            f"mejor {entry['best']:.4f}  sigma {entry['sigma']:.3f}"
+        )
+
+    result = tune(
+        train,
+        start=FuzzyConfig.load(Path(args.start)) if args.start else None,
+        generations=args.generations,
+        population=args.population,
+        sigma=args.sigma,
+        search=args.search,
+        rule_weights=args.rule_weights,
+        workers=args.workers,
+        seed=args.seed,
+        progress=report,
+    )
+    result.config.save(Path(args.output))
+    start_engine = FuzzyEngine(FuzzyConfig.load(Path(args.start)) if args.start else None)
+    summary = {
+        "output": args.output,
+        "train_ndcg": {"start": round(result.baseline, 6), "best": round(result.score, 6)},
+        "validation_ndcg": {
+            "start": round(score_config(start_engine, validation), 6),
+            "best": round(score_config(FuzzyEngine(result.config), validation), 6),
+        },
+        "evaluations": result.evaluations,
+        "candidates_per_s": result.history[-1]["evals_per_s"] if result.history else 0.0,
+    }
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import heapq
+import random
+from collections import defaultdict
+from typing import DefaultDict, Dict, Iterable, List, Optional, Set, Tuple
+
+from movie_recommender_fuzzy.domain.models import Interaction, Movie
+
+
+def rating_outcome(interaction: Interaction) -> Optional[Tuple[float, float]]:
+    """Aporte `(like, dislike)` de una interacción, con los mismos umbrales que el perfil."""
+    if interaction.score is not None:
+        if interaction.score >= 4:
+            return 1.0, 0.0
+        if interaction.score <= 2:
+            return 0.0, 1.0
+        return 0.5, 0.5
+    if interaction.decision == Interaction.LIKE:
+        return 1.0, 0.0
+    if interaction.decision == Interaction.DISLIKE:
+        return 0.0, 1.0
+    return None
+
+
+def genre_gain(likes: float, dislikes: float) -> float:
+    """Reducción esperada de la varianza de la afinidad de un género al sumar una valoración.
+
+    La afinidad se modela como Beta(1 + likes, 1 + dislikes); la reducción
+    esperada es la varianza de la media posterior, `ab / (n² (n+1)²)`.
+    """
+    a, b = likes + 1.0, dislikes + 1.0
+    n = a + b
+    return a * b / (n * n * (n + 1.0) * (n + 1.0))
+
+
+class InformationGainPool:
+    """Candidatas ordenadas por cuánto reduciría su valoración la incertidumbre del perfil.
+
+    El puntaje de una película es el promedio, sobre sus géneros, de
+    `genre_gain` ponderado por la fracción del pool que tiene ese género: una
+    valoración se acredita a todos los géneros de la película, así que es
+    evidencia más débil para cada uno cuantos más géneros tenga, y conviene
+    resolver primero los géneros que más candidatas afectan.
+
+    Se mantiene un heap con invalidación perezosa: al registrar una valoración
+    solo se recalculan las candidatas que comparten algún género con la
+    película valorada, en lugar de recorrer todo el pool. Los empates se
+    resuelven con un orden aleatorio fijo (tomado de `rng`).
+    """
+
+    def __init__(
+        self,
+        movies: Iterable[Movie],
+        filter_key: object,
+        catalog_version: int,
+        rng: random.Random,
+        rated: Optional[Set[int]] = None,
+        history: Iterable[Tuple[Interaction, Movie]] = (),
+    ):
+        self.filter_key = filter_key
+        self.catalog_version = catalog_version
+        self.rated: Set[int] = set(rated or ())
+        self.recorded = 0
+        self._counts: DefaultDict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])
+        self._genres: Dict[int, Tuple[str, ...]] = {}
+        self._by_genre: DefaultDict[str, List[int]] = defaultdict(list)
+        self._weights: Dict[str, float] = {}
+        self._tiebreak: Dict[int, float] = {}
+        self._stamp: Dict[int, int] = {}
+        self._heap: List[Tuple[float, float, int, int]] = []
+
+        for interaction, movie in history:
+            self._observe(interaction, movie)
+        for movie in movies:
+            if movie.id in self.rated or movie.id in self._genres:
+                continue
+            genres = tuple(sorted({g.strip().lower() for g in movie.genres if g}))
+            self._genres[movie.id] = genres
+            self._tiebreak[movie.id] = rng.random()
+            self._stamp[movie.id] = 0
+            for genre in genres:
+                self._by_genre[genre].append(movie.id)
+        pool_size = max(len(self._genres), 1)
+        self._weights = {genre: len(movie_ids) / pool_size for genre, movie_ids in self._by_genre.items()}
+        self._heap = [self._entry(movie_id) for movie_id in self._genres]
+        heapq.heapify(self._heap)
+
+    def score(self, movie_id: int) -> float:
+        genres = self._genres.get(movie_id, ())
+        if not genres:
+            return 0.0
+        return sum(genre_gain(*self._counts[genre]) * self._weights[genre] for genre in genres) / len(genres)
+
+    def _entry(self, movie_id: int) -> Tuple[float, float, int, int]:
+        return (-self.score(movie_id), self._tiebreak[movie_id], movie_id, self._stamp[movie_id])
+
+    def _observe(self, interaction: Interaction, movie: Movie) -> Set[str]:
+        outcome = rating_outcome(interaction)
+        if outcome is None:
+            return set()
+        touched = {g.strip().lower() for g in movie.genres if g}
+        for genre in touched:
+            counts = self._counts[genre]
+            counts[0] += outcome[0]
+            counts[1] += outcome[1]
+        return touched
+
+    def current(self) -> Optional[int]:
+        """Candidata sin valorar con mayor ganancia esperada (sin sacarla del pool)."""
+        heap = self._heap
+        while heap:
+            _score, _tie, movie_id, stamp = heap[0]
+            if movie_id in self.rated or stamp != self._stamp[movie_id]:
+                heapq.heappop(heap)
+                continue
+            return movie_id
+        return None
+
+    def upcoming(self, count: int) -> List[int]:
+        """Las `count` candidatas de mayor ganancia con los conteos actuales."""
+        valid = (
+            entry for entry in self._heap if entry[2] not in self.rated and entry[3] == self._stamp[entry[2]]
+        )
+        return [movie_id for _score, _tie, movie_id, _stamp in heapq.nsmallest(count, valid)]
+
+    def record(self, interaction: Interaction, movie: Movie) -> None:
+        """Registra una valoración y actualiza solo las candidatas de los géneros afectados."""
+        self.rated.add(movie.id)
+        self.recorded += 1
+        stale = {
+            movie_id
+            for genre in self._observe(interaction, movie)
+            for movie_id in self._by_genre.get(genre, ())
+            if movie_id not in self.rated
+        }
+        for movie_id in stale:
+            self._stamp[movie_id] += 1
+            heapq.heappush(self._heap, self._entry(movie_id))
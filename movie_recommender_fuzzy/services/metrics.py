@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# Límites (en segundos) de los buckets de los histogramas de latencia.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+# Tipo y descripción de cada métrica conocida, para el `# HELP`/`# TYPE` de Prometheus.
+DESCRIPTIONS: Dict[str, Tuple[str, str]] = {
+    "http_requests_total": ("counter", "Peticiones HTTP atendidas, por endpoint, método y estado."),
+    "http_request_duration_seconds": ("histogram", "Duración de las peticiones HTTP, por endpoint."),
+    "stage_duration_seconds": ("histogram", "Duración de cada etapa de una petición."),
+    "fuzzy_evaluations_total": ("counter", "Evaluaciones del motor difuso."),
+    "ranking_state_total": ("counter", "Rankings por sesión reutilizados (incremental) o reconstruidos (rebuild)."),
+    "recommendation_warm_total": ("counter", "Recomendaciones precalculadas reutilizadas (hit) o lanzadas (miss)."),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Histograma de buckets fijos, acumulativo al exportarse."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # Un contador por bucket más el de `+Inf`.
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class _StageTimer:
+    __slots__ = ("_metrics", "_key", "_started")
+
+    def __init__(self, metrics: "Metrics", key: Tuple[str, LabelKey]):
+        self._metrics = metrics
+        self._key = key
+
+    def __enter__(self) -> "_StageTimer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._metrics._observe_key(self._key, time.perf_counter() - self._started)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Contadores e histogramas en memoria del proceso, exportables en formato de texto de Prometheus.
+
+    Con `enabled=False` todas las operaciones vuelven de inmediato y `stage`
+    entrega un temporizador vacío compartido, así que instrumentar no cuesta
+    nada. Con varios workers cada proceso lleva sus propias métricas.
+    `records` cuenta los `inc` y `observe` registrados, para estimar cuánto
+    cuesta la instrumentación por petición.
+    """
+
+    def __init__(self, enabled: bool = True, prefix: str = "movie_recs"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._lock = threading.Lock()
+        # Clave de `stage_duration_seconds` por etapa, para no armarla en cada `stage`.
+        self._stage_keys: Dict[str, Tuple[str, LabelKey]] = {}
+        self.records = 0
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        """Suma `amount` al contador `name` con esas etiquetas."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+            self.records += 1
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Registra `value` en el histograma `name` con esas etiquetas."""
+        if not self.enabled:
+            return
+        self._observe_key((name, tuple(sorted(labels.items()))), value)
+
+    def _observe_key(self, key: Tuple[str, LabelKey], value: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+            self.records += 1
+
+    def stage(self, stage: str):
+        """Temporizador (`with metrics.stage("scoring"): ...`) que alimenta `stage_duration_seconds`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        key = self._stage_keys.get(stage)
+        if key is None:
+            key = self._stage_keys[stage] = ("stage_duration_seconds", (("stage", stage),))
+        return _StageTimer(self, key)
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0.0)
+
+    def histogram_count(self, name: str, **labels: str) -> int:
+        with self._lock:
+            histogram = self._histograms.get((name, tuple(sorted(labels.items()))))
+            return histogram.count if histogram is not None else 0
+
+    def render(self) -> str:
+        """Exporta todo en el formato de texto de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, list(histogram.counts), histogram.total, histogram.count, histogram.buckets)
+                for key, histogram in self._histograms.items()
+            )
+
+        lines: List[str] = []
+        described = set()
+
+        def header(name: str, kind: str) -> None:
+            if name in described:
+                return
+            described.add(name)
+            help_text = DESCRIPTIONS.get(name, (kind, name))[1]
+            lines.append(f"# HELP {self.prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {self.prefix}_{name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{self.prefix}_{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), counts, total, count, buckets in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(
+                    f"{self.prefix}_{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}"
+                )
+            lines.append(f"{self.prefix}_{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.prefix}_{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+# Instancia deshabilitada que usan los servicios cuando no se les pasa otra.
+DISABLED = Metrics(enabled=False)
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from movie_recommender_fuzzy.domain.models import Interaction
+from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.services.co_occurrence import is_positive
+from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyConfig, FuzzyEngine
+from movie_recommender_fuzzy.services.preference_service import PreferenceService
+from movie_recommender_fuzzy.services.recommendation_service import RecommendationService
+
+# Sesiones por tarea enviada a un worker. Fijo (no depende de la cantidad de
+# workers) para que el orden de las sumas, y por lo tanto el resultado, tampoco.
+CHUNK_SIZE = 200
+
+SessionLog = Tuple[int, List[Interaction]]
+
+
+def interaction_from_json(line: str) -> Interaction:
+    """Una línea del log (`interactions.jsonl`, el formato de `benchmarks generate`)."""
+    row = json.loads(line)
+    return Interaction(
+        id=row["id"],
+        user_id=row["user_id"],
+        movie_id=row["movie_id"],
+        session_id=row["session_id"],
+        decision=row["decision"],
+        score=row.get("score"),
+        timestamp=datetime.fromisoformat(row["timestamp"]),
+    )
+
+
+def iter_sessions(interactions: Iterable[Interaction], max_open: int = 10000) -> Iterator[SessionLog]:
+    """Agrupa un log ordenado por tiempo en sesiones, con memoria acotada.
+
+    Se mantienen abiertas a lo sumo `max_open` sesiones; la que lleva más
+    tiempo sin interacciones se cierra y se entrega. Si una sesión cerrada
+    reaparece más adelante, su resto se evalúa como otra sesión.
+    """
+    open_sessions: "OrderedDict[int, List[Interaction]]" = OrderedDict()
+    for interaction in interactions:
+        rows = open_sessions.get(interaction.session_id)
+        if rows is None:
+            rows = open_sessions[interaction.session_id] = []
+            if len(open_sessions) > max_open:
+                yield open_sessions.popitem(last=False)
+        else:
+            open_sessions.move_to_end(interaction.session_id)
+        rows.append(interaction)
+    while open_sessions:
+        yield open_sessions.popitem(last=False)
+
+
+def split_by_time(interactions: Sequence[Interaction], holdout: float) -> Tuple[List[Interaction], List[Interaction]]:
+    """Parte la sesión en perfil (lo primero) y holdout (la fracción `holdout` final)."""
+    ordered = sorted(interactions, key=lambda interaction: (interaction.timestamp, interaction.id))
+    cut = max(1, min(len(ordered) - 1, round(len(ordered) * (1 - holdout))))
+    return ordered[:cut], ordered[cut:]
+
+
+def ranking_metrics(recommended: Sequence[int], relevant: Iterable[int], k: int) -> Tuple[float, float, float]:
+    """(precision@k, recall@k, NDCG@k) con relevancia binaria."""
+    relevant = set(relevant)
+    if not relevant:
+        return 0.0, 0.0, 0.0
+    top = list(recommended)[:k]
+    hits = [movie_id in relevant for movie_id in top]
+    dcg = sum(1.0 / math.log2(position + 2) for position, hit in enumerate(hits) if hit)
+    ideal = sum(1.0 / math.log2(position + 2) for position in range(min(k, len(relevant))))
+    return sum(hits) / k, sum(hits) / len(relevant), dcg / ideal
+
+
+@dataclass
+class EvaluationTotals:
+    """Sumas de las métricas por sesión; se combinan en el orden del log."""
+
+    sessions: int = 0
+    skipped: int = 0
+    precision: float = 0.0
+    recall: float = 0.0
+    ndcg: float = 0.0
+
+    def add(self, other: "EvaluationTotals") -> None:
+        self.sessions += other.sessions
+        self.skipped += other.skipped
+        self.precision += other.precision
+        self.recall += other.recall
+        self.ndcg += other.ndcg
+
+
+class SessionEvaluator:
+    """Repite sesiones del log contra `PreferenceService` y `RecommendationService`.
+
+    Cada sesión se reproduce con repositorios de interacciones propios, así que
+    su resultado no depende de qué otras sesiones evaluó el mismo proceso.
+    """
+
+    def __init__(
+        self,
+        movie_repository: MovieRepository,
+        k: int = 10,
+        holdout: float = 0.3,
+        min_profile: int = 5,
+        fuzzy_engine: Optional[FuzzyEngine] = None,
+    ):
+        self.movie_repository = movie_repository
+        self.k = k
+        self.holdout = holdout
+        self.min_profile = min_profile
+        self.fuzzy_engine = fuzzy_engine or FuzzyEngine()
+
+    def evaluate(self, sessions: Iterable[SessionLog]) -> EvaluationTotals:
+        totals = EvaluationTotals()
+        for session_id, interactions in sessions:
+            profile, holdout = split_by_time(interactions, self.holdout)
+            relevant = {interaction.movie_id for interaction in holdout if is_positive(interaction)}
+            relevant -= {interaction.movie_id for interaction in profile}
+            if sum(interaction.is_valid_rating() for interaction in profile) < self.min_profile or not relevant:
+                totals.skipped += 1
+                continue
+            interaction_repo = InteractionRepository(InMemoryDB())
+            interaction_repo.add_many(profile)
+            recommender = RecommendationService(
+                movie_repository=self.movie_repository,
+                interaction_repository=interaction_repo,
+                preference_service=PreferenceService(interaction_repo, self.movie_repository),
+                fuzzy_engine=self.fuzzy_engine,
+            )
+            user_id = profile[0].user_id
+            recommended = [movie.id for movie, _score in recommender.recommend_movies(user_id, session_id, k=self.k)]
+            precision, recall, ndcg = ranking_metrics(recommended, relevant, self.k)
+            totals.sessions += 1
+            totals.precision += precision
+            totals.recall += recall
+            totals.ndcg += ndcg
+        return totals
+
+
+# Evaluador de cada proceso del pool (lo arma `_init_worker` una sola vez).
+_worker_evaluator: Optional[SessionEvaluator] = None
+
+
+def load_movie_repository(catalog_path: Path) -> MovieRepository:
+    from movie_recommender_fuzzy.infra.catalog import load_catalog
+
+    movie_repo = MovieRepository(InMemoryDB())
+    movie_repo.swap_catalog(load_catalog(catalog_path))
+    return movie_repo
+
+
+def _build_evaluator(
+    catalog_path: Path, k: int, holdout: float, min_profile: int, fuzzy_config_path: Optional[Path]
+) -> SessionEvaluator:
+    fuzzy_engine = FuzzyEngine(FuzzyConfig.load(fuzzy_config_path)) if fuzzy_config_path else None
+    return SessionEvaluator(
+        load_movie_repository(catalog_path), k=k, holdout=holdout, min_profile=min_profile, fuzzy_engine=fuzzy_engine
+    )
+
+
+def _init_worker(
+    catalog_path: Path, k: int, holdout: float, min_profile: int, fuzzy_config_path: Optional[Path]
+) -> None:
+    global _worker_evaluator
+    _worker_evaluator = _build_evaluator(catalog_path, k, holdout, min_profile, fuzzy_config_path)
+
+
+def _evaluate_chunk(chunk: List[SessionLog]) -> EvaluationTotals:
+    return _worker_evaluator.evaluate(chunk)
+
+
+def _chunks(sessions: Iterator[SessionLog], size: int) -> Iterator[List[SessionLog]]:
+    chunk: List[SessionLog] = []
+    for session in sessions:
+        chunk.append(session)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def evaluate_log(
+    log_path: Path,
+    catalog_path: Path,
+    k: int = 10,
+    holdout: float = 0.3,
+    min_profile: int = 5,
+    workers: int = 1,
+    max_open: int = 10000,
+    chunk_size: int = CHUNK_SIZE,
+    fuzzy_config_path: Optional[Path] = None,
+) -> Dict[str, object]:
+    """Evalúa todas las sesiones de `log_path` y devuelve precision@k, recall@k y NDCG@k promedio.
+
+    El log se lee en streaming y las sesiones se reparten en tareas de
+    `chunk_size` entre `workers` procesos, con a lo sumo dos tareas pendientes
+    por worker. Los resultados se suman en el orden del log, así que el
+    reporte es el mismo con cualquier cantidad de workers. Con
+    `fuzzy_config_path` el motor difuso usa esa configuración (ver `fuzzy_tuning`).
+    """
+    started = time.perf_counter()
+    totals = EvaluationTotals()
+    with Path(log_path).open(encoding="utf-8") as handle:
+        interactions = (interaction_from_json(line) for line in handle if line.strip())
+        chunks = _chunks(iter_sessions(interactions, max_open=max_open), chunk_size)
+        if workers <= 1:
+            evaluator = _build_evaluator(Path(catalog_path), k, holdout, min_profile, fuzzy_config_path)
+            for chunk in chunks:
+                totals.add(evaluator.evaluate(chunk))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(Path(catalog_path), k, holdout, min_profile, fuzzy_config_path),
+            ) as pool:
+                pending: Deque[Future] = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_evaluate_chunk, chunk))
+                    if len(pending) >= 2 * workers:
+                        totals.add(pending.popleft().result())
+                while pending:
+                    totals.add(pending.popleft().result())
+
+    elapsed = time.perf_counter() - started
+    evaluated = max(1, totals.sessions)
+    return {
+        "k": k,
+        "holdout": holdout,
+        "workers": workers,
+        "sessions": totals.sessions,
+        "skipped": totals.skipped,
+        f"precision@{k}": totals.precision / evaluated,
+        f"recall@{k}": totals.recall / evaluated,
+        f"ndcg@{k}": totals.ndcg / evaluated,
+        "elapsed_s": round(elapsed, 2),
+        "sessions_per_s": round(totals.sessions / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main() -> None:
+    import argparse
+    import os
+
+    from movie_recommender_fuzzy.infra.catalog import DEFAULT_CATALOG_PATH
+
+    parser = argparse.ArgumentParser(
+        description="Evaluación offline: repite sesiones del log y mide precision@k, recall@k y NDCG@k."
+    )
+    parser.add_argument("log", help="Log de interacciones (JSONL, una interacción por línea, ordenado por tiempo)")
+    parser.add_argument("--catalog", default=str(DEFAULT_CATALOG_PATH), help="Catálogo JSON")
+    parser.add_argument("--k", type=int, default=10, help="Tamaño del top evaluado")
+    parser.add_argument("--holdout", type=float, default=0.3, help="Fracción final de cada sesión que se oculta")
+    parser.add_argument("--min-profile", type=int, default=5, help="Valoraciones válidas mínimas en el perfil")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos evaluadores")
+    parser.add_argument("--max-open", type=int, default=10000, help="Sesiones abiertas a la vez al leer el log")
+    parser.add_argument("--fuzzy-config", help="Configuración del motor difuso (JSON de `fuzzy_tuning`)")
+    args = parser.parse_args()
+
+    report = evaluate_log(
+        Path(args.log),
+        Path(args.catalog),
+        k=args.k,
+        holdout=args.holdout,
+        min_profile=args.min_profile,
+        workers=args.workers,
+        max_open=args.max_open,
+        fuzzy_config_path=Path(args.fuzzy_config) if args.fuzzy_config else None,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
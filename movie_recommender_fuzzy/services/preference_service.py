@@ -1,33 +1,145 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from movie_recommender_fuzzy.domain.models import Interaction, Movie
-from movie_recommender_fuzzy.domain.profile import UserPreferenceProfile
+from movie_recommender_fuzzy.domain.profile import LongTermProfile, UserPreferenceProfile, blend_profiles
 from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
 from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.infra.profile_repository import UserProfileRepository
+from movie_recommender_fuzzy.services.metrics import DISABLED, Metrics
 
 
 class PreferenceService:
-    """Construye perfiles de preferencias a partir de interacciones."""
+    """Construye perfiles de preferencias a partir de interacciones.
+
+    Con `profile_repository` además lleva un perfil de largo plazo por usuario
+    (`LongTermProfile`), que se actualiza con cada interacción registrada
+    (`record_interactions`) y se mezcla con el de la sesión al recomendar. Una
+    interacción pierde la mitad de su peso cada `half_life_days` días.
+    """
 
     def __init__(
         self,
         interaction_repository: InteractionRepository,
         movie_repository: MovieRepository,
+        metrics: Optional[Metrics] = None,
+        profile_repository: Optional[UserProfileRepository] = None,
+        long_term_weight: float = 0.3,
+        half_life_days: float = 180.0,
     ):
         self._interaction_repository = interaction_repository
         self._movie_repository = movie_repository
+        self._metrics = metrics or DISABLED
+        self._profile_repository = profile_repository
+        self.long_term_weight = long_term_weight
+        self.half_life_days = half_life_days
 
     def build_user_profile(self, user_id: int, session_id: Optional[int] = None) -> UserPreferenceProfile:
-        """Genera un perfil de preferencias usando las interacciones disponibles."""
-        interactions: List[Interaction]
-        if session_id is not None:
-            interactions = self._interaction_repository.list_by_session(session_id)
-        else:
-            interactions = self._interaction_repository.list_by_user(user_id)
-
-        movies_by_id: Dict[int, Movie] = {movie.id: movie for movie in self._movie_repository.list_all()}
-        profile = UserPreferenceProfile(user_id=user_id)
-        profile.update_from_interactions(interactions, movies_by_id)
+        """Genera un perfil de preferencias usando las interacciones disponibles.
+
+        Sin `session_id` usa el perfil de largo plazo si lo hay (sin recorrer el
+        historial); si no, todas las interacciones del usuario.
+        """
+        with self._metrics.stage("profile"):
+            interactions: List[Interaction]
+            if session_id is not None:
+                interactions = self._interaction_repository.list_by_session(session_id)
+            else:
+                long_term = self._long_term_profile(user_id)
+                if long_term is not None:
+                    return long_term.to_preference_profile()
+                interactions = self._interaction_repository.list_by_user(user_id)
+
+            movies_by_id: Dict[int, Movie] = {movie.id: movie for movie in self._movie_repository.list_all()}
+            profile = UserPreferenceProfile(user_id=user_id)
+            profile.update_from_interactions(interactions, movies_by_id)
+            return profile
+
+    def build_recommendation_profile(self, user_id: int, session_id: int) -> UserPreferenceProfile:
+        """Perfil de la sesión mezclado con el de largo plazo del usuario (`long_term_weight`).
+
+        Las interacciones de la sesión ya están sumadas al largo plazo: se le
+        restan antes de mezclar para no contarlas dos veces. Sin perfil de largo
+        plazo es exactamente el de la sesión.
+        """
+        profile = self.build_user_profile(user_id, session_id=session_id)
+        if self.long_term_weight <= 0:
+            return profile
+        with self._metrics.stage("long_term_profile"):
+            long_term = self._long_term_profile(user_id)
+            if long_term is None:
+                return profile
+            current = self._aggregate(user_id, self._interaction_repository.list_by_session(session_id))
+            long_term.subtract(current, self.half_life_days)
+            return blend_profiles(profile, long_term.to_preference_profile(), self.long_term_weight)
+
+    def long_term_version(self, user_id: int) -> int:
+        """Cambia cada vez que puede cambiar el perfil de largo plazo del usuario (0 si no se usa).
+
+        El perfil solo se mueve al registrar interacciones del usuario, así que
+        alcanza con contarlas.
+        """
+        if self._profile_repository is None or self.long_term_weight <= 0:
+            return 0
+        return self._interaction_repository.count_by_user(user_id)
+
+    def record_interactions(self, rated: Iterable[Tuple[Interaction, Movie]]) -> None:
+        """Suma interacciones recién registradas a los perfiles de largo plazo de sus usuarios.
+
+        El costo es proporcional a los géneros de las películas del lote, no al
+        historial del usuario.
+        """
+        if self._profile_repository is None:
+            return
+        deltas: Dict[int, LongTermProfile] = {}
+        for interaction, movie in rated:
+            delta = deltas.setdefault(interaction.user_id, LongTermProfile(user_id=interaction.user_id))
+            delta.record(interaction, movie, self.half_life_days)
+        if deltas:
+            self._profile_repository.add_deltas(deltas.values(), self.half_life_days)
+
+    def rebuild_long_term_profile(self, user_id: int) -> Optional[LongTermProfile]:
+        """Reconstruye el perfil de largo plazo desde todo el historial del usuario.
+
+        Sirve para poblarlo la primera vez o tras cambiar `half_life_days`; en
+        uso normal se mantiene con `record_interactions`.
+        """
+        if self._profile_repository is None:
+            return None
+        return self._profile_repository.save(
+            self._aggregate(user_id, self._interaction_repository.list_by_user(user_id))
+        )
+
+    def backfill_long_term_profiles(self) -> int:
+        """Reconstruye el perfil de largo plazo de los usuarios con historial que aún no lo tienen.
+
+        Pensado para el arranque: al activar el perfil sobre un almacén que ya
+        tenía interacciones, sin esto el primer swipe crearía un perfil con solo
+        esa interacción. Devuelve cuántos perfiles creó.
+        """
+        if self._profile_repository is None:
+            return 0
+        missing = [
+            user_id
+            for user_id in self._interaction_repository.list_user_ids()
+            if self._profile_repository.get(user_id) is None
+        ]
+        for user_id in missing:
+            self.rebuild_long_term_profile(user_id)
+        return len(missing)
+
+    def _aggregate(self, user_id: int, interactions: List[Interaction]) -> LongTermProfile:
+        """Suma `interactions` en un `LongTermProfile` con el decaimiento del servicio."""
+        movies = self._movie_repository.get_many(interaction.movie_id for interaction in interactions)
+        profile = LongTermProfile(user_id=user_id)
+        for interaction in interactions:
+            movie = movies.get(interaction.movie_id)
+            if movie is not None:
+                profile.record(interaction, movie, self.half_life_days)
         return profile
+
+    def _long_term_profile(self, user_id: int) -> Optional[LongTermProfile]:
+        if self._profile_repository is None:
+            return None
+        return self._profile_repository.get(user_id)
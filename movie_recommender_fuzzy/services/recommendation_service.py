@@ -1,17 +1,107 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+import heapq
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import DefaultDict, Dict, List, Optional, Set, Tuple
 
 from movie_recommender_fuzzy.domain.models import Movie
 from movie_recommender_fuzzy.domain.profile import UserPreferenceProfile
 from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
 from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.services.co_occurrence import CoOccurrenceIndex, is_positive
 from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyEngine
+from movie_recommender_fuzzy.services.metrics import DISABLED, Metrics
 from movie_recommender_fuzzy.services.preference_service import PreferenceService
 
 
+def _matches_filters(movie: Movie, filters: Optional[dict]) -> bool:
+    if not filters:
+        return True
+    genres = [g.strip().lower() for g in filters.get("genres", []) if g]
+    duration = filters.get("duration") or ""
+    if genres and not any(g in movie.genres for g in genres):
+        return False
+    if duration and movie.duration_minutes is not None:
+        if duration == "short" and movie.duration_minutes >= 100:
+            return False
+        if duration == "medium" and not (100 <= movie.duration_minutes <= 140):
+            return False
+        if duration == "long" and movie.duration_minutes <= 140:
+            return False
+    return True
+
+
+@dataclass
+class RankingState:
+    """Candidatas puntuadas de una sesión, guardadas para re-rankear de forma incremental.
+
+    La afinidad se guarda para todas las candidatas; la relevancia difusa solo
+    para las que hizo falta comparar (se calcula bajo demanda). `position` es
+    el orden de la película en el catálogo, que desempata igual que el orden
+    estable del cálculo completo.
+    """
+
+    user_id: int
+    filter_key: str
+    catalog_version: int
+    profile: UserPreferenceProfile
+    rated: Set[int]
+    candidates: Dict[int, Movie]
+    position: Dict[int, int]
+    by_genre: DefaultDict[str, List[int]]
+    affinity: Dict[int, float]
+    relevance: Dict[int, Tuple[float, Optional[dict]]] = field(default_factory=dict)
+    # Similitud colaborativa de las películas que tienen alguna (el resto vale 0).
+    collaborative: Dict[int, float] = field(default_factory=dict)
+    # Evaluaciones del motor difuso hechas con este estado.
+    evaluations: int = 0
+    # El plazo venció armándolo: faltan candidatas y no se guarda para reusar.
+    truncated: bool = False
+
+
+class RankedRecommendations(list):
+    """Top-k de `recommend_movies(..., deadline_ms=...)`, con cuánto se llegó a puntuar.
+
+    `complete` indica si se puntuaron todas las candidatas que competían por el
+    top (el resultado es entonces el mismo que sin plazo); `evaluated` cuenta
+    las puntuadas y `candidates` las que competían. Si el plazo venció antes de
+    recorrer el catálogo, `complete` es falso y `candidates` cuenta solo las
+    recorridas.
+    """
+
+    def __init__(self, items: List, complete: bool, evaluated: int, candidates: int):
+        super().__init__(items)
+        self.complete = complete
+        self.evaluated = evaluated
+        self.candidates = candidates
+
+
 class RecommendationService:
-    """Genera recomendaciones de películas usando lógica difusa."""
+    """Genera recomendaciones de películas usando lógica difusa.
+
+    Por sesión se conserva el último conjunto de candidatas puntuadas
+    (`RankingState`). En la siguiente llamada se compara el perfil nuevo con el
+    guardado y solo se recalcula la afinidad de las películas de los géneros
+    que cambiaron; si cambió el rating preferido, las relevancias se descartan
+    y se recalculan bajo demanda. El resultado es idéntico al de un cálculo
+    completo.
+
+    Con `co_occurrence` la similitud por co-likes con lo que gustó en la sesión
+    entra al motor difuso como cuarta variable; las relevancias de las películas
+    cuya similitud cambió se descartan igual que las afectadas por el perfil.
+
+    Con `deadline_ms` la puntuación difusa es "anytime": las candidatas se
+    puntúan por prioridad y al vencer el plazo se ordena lo puntuado hasta ahí.
+    Si el plazo vence mientras se arma el estado de una sesión sin caché, se
+    sigue solo con las candidatas ya recorridas (las más populares).
+    """
+
+    # Sesiones con estado de ranking guardado (las menos recientes se descartan).
+    MAX_CACHED_SESSIONS = 256
 
     def __init__(
         self,
@@ -19,11 +109,22 @@ class RecommendationService:
         interaction_repository: InteractionRepository,
         preference_service: PreferenceService,
         fuzzy_engine: FuzzyEngine,
+        metrics: Optional[Metrics] = None,
+        co_occurrence: Optional[CoOccurrenceIndex] = None,
     ):
         self._movie_repository = movie_repository
         self._interaction_repository = interaction_repository
         self._preference_service = preference_service
         self._fuzzy_engine = fuzzy_engine
+        self._metrics = metrics or DISABLED
+        self._co_occurrence = co_occurrence
+        self._states: OrderedDict[int, RankingState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def state_version(self, user_id: int) -> Tuple[int, int]:
+        """Versión del estado compartido que usa el ranking además de la sesión: co-likes y largo plazo."""
+        co_likes = self._co_occurrence.version if self._co_occurrence is not None else 0
+        return co_likes, self._preference_service.long_term_version(user_id)
 
     def recommend_movies(
         self,
@@ -32,61 +133,233 @@ class RecommendationService:
         k: int = 10,
         include_breakdown: bool = False,
         filters: Optional[dict] = None,
+        deadline_ms: Optional[float] = None,
     ) -> List[Tuple[Movie, float] | Tuple[Movie, float, dict]]:
-        """Calcula las k mejores películas para el usuario en la sesión dada."""
-        rated_ids = set(self._interaction_repository.list_movie_ids_by_session(session_id))
-        profile = self._preference_service.build_user_profile(user_id, session_id=session_id)
-        catalog = self._movie_repository.list_catalog(limit=1000)
-        candidates = [movie for movie in catalog if movie.id not in rated_ids]
-
-        def matches_filters(movie: Movie) -> bool:
-            if not filters:
-                return True
-            genres = [g.strip().lower() for g in filters.get("genres", []) if g]
-            duration = filters.get("duration") or ""
-            if genres and not any(g in movie.genres for g in genres):
-                return False
-            if duration and movie.duration_minutes is not None:
-                if duration == "short" and movie.duration_minutes >= 100:
-                    return False
-                if duration == "medium" and not (100 <= movie.duration_minutes <= 140):
-                    return False
-                if duration == "long" and movie.duration_minutes <= 140:
-                    return False
-            return True
-
-        candidates = [m for m in candidates if matches_filters(m)]
-
-        scored_with_affinity: List[Tuple[Movie, float, float, dict | None]] = []
-        for movie in candidates:
-            affinity = self._compute_affinity(movie, profile)
-            popularity = self._normalize_popularity(movie.popularity)
-            rating_similarity = self._rating_similarity(movie, profile)
-            if include_breakdown:
-                relevance, detail = self._fuzzy_engine.compute_relevance_with_breakdown(
-                    affinity, popularity, rating_similarity
+        """Calcula las k mejores películas para el usuario en la sesión dada.
+
+        Con `deadline_ms` (contado desde la llamada) devuelve un
+        `RankedRecommendations` que dice si el top está completo y cuántas
+        candidatas se puntuaron (ver `_select`). El plazo se revisa al armar el
+        estado (`_build_state`) y al puntuar; armar el perfil y consultar los
+        co-likes no se cortan, aunque su tiempo cuenta contra el plazo.
+        """
+        deadline = time.perf_counter() + deadline_ms / 1000 if deadline_ms is not None else None
+        if self._co_occurrence is not None:
+            interactions = self._interaction_repository.list_by_session(session_id)
+            rated_ids = {interaction.movie_id for interaction in interactions}
+            with self._metrics.stage("collaborative"):
+                collaborative = self._co_occurrence.similarities(
+                    interaction.movie_id for interaction in interactions if is_positive(interaction)
                 )
-                detail.update(
-                    {
-                        "affinity": affinity,
-                        "popularity_norm": popularity,
-                        "rating_similarity": rating_similarity,
-                    }
+        else:
+            rated_ids = set(self._interaction_repository.list_movie_ids_by_session(session_id))
+            collaborative = {}
+        profile = self._preference_service.build_recommendation_profile(user_id, session_id)
+        filter_key = json.dumps(filters or {}, sort_keys=True)
+        catalog_version = self._movie_repository.catalog_version()
+
+        # El estado se saca del caché mientras se usa: dos cálculos simultáneos de
+        # la misma sesión no lo comparten (el segundo arranca de cero).
+        with self._lock:
+            state = self._states.pop(session_id, None)
+        if (
+            state is None
+            or state.user_id != user_id
+            or state.filter_key != filter_key
+            or state.catalog_version != catalog_version
+            or not state.rated <= rated_ids
+        ):
+            state = self._build_state(
+                user_id, filter_key, catalog_version, profile, rated_ids, filters, deadline=deadline, min_candidates=k
+            )
+            self._metrics.inc("ranking_state_total", result="partial" if state.truncated else "rebuild")
+        else:
+            with self._metrics.stage("affinity"):
+                self._update_state(state, profile, rated_ids)
+            self._metrics.inc("ranking_state_total", result="incremental")
+        self._update_collaborative(state, collaborative)
+
+        selected = self._select(state, k, include_breakdown, deadline)
+        if state.truncated:
+            return selected
+        with self._lock:
+            self._states[session_id] = state
+            while len(self._states) > self.MAX_CACHED_SESSIONS:
+                self._states.popitem(last=False)
+        return selected
+
+    def _build_state(
+        self,
+        user_id: int,
+        filter_key: str,
+        catalog_version: int,
+        profile: UserPreferenceProfile,
+        rated_ids: Set[int],
+        filters: Optional[dict],
+        deadline: Optional[float] = None,
+        min_candidates: int = 0,
+    ) -> RankingState:
+        """Estado nuevo con la afinidad de todas las candidatas, en orden de catálogo.
+
+        Con `deadline`, al vencer se corta (con al menos `min_candidates`
+        recorridas) y el estado queda marcado como `truncated`.
+        """
+        with self._metrics.stage("catalog"):
+            catalog = self._movie_repository.list_catalog(limit=1000)
+        with self._metrics.stage("filtering"):
+            candidates = [
+                (position, movie)
+                for position, movie in enumerate(catalog)
+                if movie.id not in rated_ids and _matches_filters(movie, filters)
+            ]
+        state = RankingState(
+            user_id=user_id,
+            filter_key=filter_key,
+            catalog_version=catalog_version,
+            profile=profile,
+            rated=set(rated_ids),
+            candidates={},
+            position={},
+            by_genre=defaultdict(list),
+            affinity={},
+        )
+        with self._metrics.stage("affinity"):
+            for position, movie in candidates:
+                if deadline is not None and len(state.candidates) >= min_candidates and time.perf_counter() >= deadline:
+                    state.truncated = True
+                    break
+                state.candidates[movie.id] = movie
+                state.position[movie.id] = position
+                state.affinity[movie.id] = self._compute_affinity(movie, profile)
+                for genre in {g.strip().lower() for g in movie.genres if g}:
+                    state.by_genre[genre].append(movie.id)
+        return state
+
+    def _update_state(self, state: RankingState, profile: UserPreferenceProfile, rated_ids: Set[int]) -> None:
+        """Aplica al estado un perfil y un conjunto de valoradas nuevos, recalculando solo lo afectado."""
+        for movie_id in rated_ids - state.rated:
+            if state.candidates.pop(movie_id, None) is not None:
+                del state.affinity[movie_id]
+                state.relevance.pop(movie_id, None)
+        state.rated = set(rated_ids)
+
+        old, new = state.profile.genre_affinities, profile.genre_affinities
+        changed = {genre for genre in old.keys() | new.keys() if old.get(genre, 0.0) != new.get(genre, 0.0)}
+        if state.profile.preferred_rating != profile.preferred_rating:
+            state.relevance.clear()
+        state.profile = profile
+        for movie_id in {movie_id for genre in changed for movie_id in state.by_genre.get(genre, ())}:
+            movie = state.candidates.get(movie_id)
+            if movie is not None:
+                state.affinity[movie_id] = self._compute_affinity(movie, profile)
+                state.relevance.pop(movie_id, None)
+
+    def _update_collaborative(self, state: RankingState, collaborative: Dict[int, float]) -> None:
+        """Guarda la similitud colaborativa nueva y descarta las relevancias de las películas que cambiaron."""
+        previous = state.collaborative
+        for movie_id in previous.keys() | collaborative.keys():
+            if previous.get(movie_id, 0.0) != collaborative.get(movie_id, 0.0):
+                state.relevance.pop(movie_id, None)
+        state.collaborative = collaborative
+
+    def _relevance(self, state: RankingState, movie: Movie, include_breakdown: bool) -> Tuple[float, Optional[dict]]:
+        if self._has_relevance(state, movie.id, include_breakdown):
+            return state.relevance[movie.id]
+        state.evaluations += 1
+        affinity = state.affinity[movie.id]
+        popularity = self._normalize_popularity(movie.popularity)
+        rating_similarity = self._rating_similarity(movie, state.profile)
+        collaborative = state.collaborative.get(movie.id, 0.0)
+        if include_breakdown:
+            relevance, detail = self._fuzzy_engine.compute_relevance_with_breakdown(
+                affinity, popularity, rating_similarity, collaborative
+            )
+            detail.update(
+                {
+                    "affinity": affinity,
+                    "popularity_norm": popularity,
+                    "rating_similarity": rating_similarity,
+                    "collaborative_similarity": collaborative,
+                }
+            )
+            entry = (relevance, detail)
+        else:
+            entry = (
+                self._fuzzy_engine.compute_relevance(affinity, popularity, rating_similarity, collaborative),
+                None,
+            )
+        state.relevance[movie.id] = entry
+        return entry
+
+    def _select(
+        self, state: RankingState, k: int, include_breakdown: bool, deadline: Optional[float] = None
+    ) -> List[Tuple[Movie, float] | Tuple[Movie, float, dict]]:
+        """Top-k ordenado por afinidad y luego relevancia.
+
+        Solo compiten por el top las candidatas con afinidad mayor o igual a la
+        k-ésima mejor, así que la relevancia se calcula únicamente para ellas.
+
+        Con `deadline` se puntúan primero las que ya tienen relevancia guardada
+        (no cuestan nada) y después por afinidad y popularidad (orden del
+        catálogo); vencido el plazo no se evalúa el motor para ninguna más. Las
+        k primeras se puntúan siempre, para devolver un top lleno.
+        """
+        if k <= 0 or not state.candidates:
+            return [] if deadline is None else RankedRecommendations([], not state.truncated, 0, 0)
+        threshold = heapq.nlargest(k, state.affinity.values())[-1]
+        contenders = [
+            (movie_id, affinity) for movie_id, affinity in state.affinity.items() if affinity >= threshold
+        ]
+        if deadline is not None:
+            contenders.sort(
+                key=lambda item: (
+                    not self._has_relevance(state, item[0], include_breakdown),
+                    -item[1],
+                    state.position[item[0]],
                 )
-                scored_with_affinity.append((movie, relevance, affinity, detail))
-            else:
-                relevance = self._fuzzy_engine.compute_relevance(affinity, popularity, rating_similarity)
-                scored_with_affinity.append((movie, relevance, affinity, None))
+            )
+        evaluated = state.evaluations
+        with self._metrics.stage("fuzzy_scoring"):
+            scored = []
+            for index, (movie_id, affinity) in enumerate(contenders):
+                if (
+                    deadline is not None
+                    and index >= k
+                    and not self._has_relevance(state, movie_id, include_breakdown)
+                    and time.perf_counter() >= deadline
+                ):
+                    break
+                movie = state.candidates[movie_id]
+                relevance, detail = self._relevance(state, movie, include_breakdown)
+                scored.append((affinity, relevance, -state.position[movie_id], movie, detail))
+        self._metrics.inc("fuzzy_evaluations_total", state.evaluations - evaluated)
 
-        # Ordenar priorizando afinidad, luego relevancia.
-        scored_with_affinity.sort(key=lambda item: (item[2], item[1]), reverse=True)
+        # Ordenar priorizando afinidad, luego relevancia (empates: orden del catálogo).
+        with self._metrics.stage("sorting"):
+            scored.sort(key=lambda item: item[:3], reverse=True)
 
         selected: List[Tuple[Movie, float] | Tuple[Movie, float, dict]] = []
-        for movie, relevance, affinity, detail in scored_with_affinity[:k]:
-            entry = (movie, relevance, detail) if include_breakdown else (movie, relevance)
+        for _affinity, relevance, _position, movie, detail in scored[:k]:
+            entry = (movie, relevance, dict(detail)) if include_breakdown else (movie, relevance)
             selected.append(entry)
+        if deadline is None:
+            return selected
+        complete = not state.truncated and len(scored) == len(contenders)
+        self._metrics.inc("recommendation_deadline_total", result="complete" if complete else "partial")
+        return RankedRecommendations(selected, complete, len(scored), len(contenders))
 
-        return selected
+    @staticmethod
+    def _has_relevance(state: RankingState, movie_id: int, include_breakdown: bool) -> bool:
+        cached = state.relevance.get(movie_id)
+        return cached is not None and (cached[1] is not None or not include_breakdown)
+
+    def fuzzy_inputs(self, movie: Movie, profile: UserPreferenceProfile) -> Tuple[float, float, float]:
+        """Afinidad, popularidad normalizada y similitud de rating de `movie`: las entradas del motor difuso."""
+        return (
+            self._compute_affinity(movie, profile),
+            self._normalize_popularity(movie.popularity),
+            self._rating_similarity(movie, profile),
+        )
 
     def _compute_affinity(self, movie: Movie, profile: UserPreferenceProfile) -> float:
         """Calcula afinidad ponderando solo géneros presentes en el perfil (normalizados)."""
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.services.metrics import DISABLED, Metrics
+from movie_recommender_fuzzy.services.recommendation_service import RecommendationService
+
+WarmKey = Tuple[int, int, Tuple[int, int], str, int, bool]
+
+
+class RecommendationWarmer:
+    """Precalcula en segundo plano las recomendaciones de una sesión.
+
+    Cada resultado queda asociado a la cantidad de interacciones de la sesión,
+    la versión del catálogo, la del estado compartido del ranking (índice de
+    co-likes y perfil de largo plazo) y los parámetros pedidos; si algo de eso
+    cambia se recalcula. `warm` reutiliza el cálculo vigente (terminado o en
+    curso) en lugar de repetirlo, y un cálculo que quedó viejo antes de empezar
+    se cancela, así que por sesión nunca se acumulan más de dos.
+
+    `get` no espera detrás de la cola del pool: si no hay un cálculo vigente
+    terminado o corriendo, calcula en el hilo de la petición.
+
+    Se guardan a lo sumo `MAX_ENTRIES` sesiones (las menos usadas se
+    descartan) y `forget` suelta la de una sesión terminada.
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(
+        self,
+        recommendation_service: RecommendationService,
+        interaction_repository: InteractionRepository,
+        movie_repository: MovieRepository,
+        max_workers: int = 2,
+        metrics: Optional[Metrics] = None,
+    ):
+        self._recommendation_service = recommendation_service
+        self._interaction_repository = interaction_repository
+        self._movie_repository = movie_repository
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recs-warmup")
+        self._entries: OrderedDict[int, Tuple[WarmKey, Future]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = metrics or DISABLED
+
+    def _key(
+        self, user_id: int, session_id: int, k: int, include_breakdown: bool, filters: Optional[dict]
+    ) -> WarmKey:
+        return (
+            self._interaction_repository.count_by_session(session_id),
+            self._movie_repository.catalog_version(),
+            self._recommendation_service.state_version(user_id),
+            json.dumps(filters or {}, sort_keys=True),
+            k,
+            include_breakdown,
+        )
+
+    def _store(self, session_id: int, key: WarmKey, future: Future) -> None:
+        # Llamar con `_lock` tomado.
+        self._entries[session_id] = (key, future)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.MAX_ENTRIES:
+            self._entries.popitem(last=False)[1][1].cancel()
+
+    def warm(
+        self,
+        user_id: int,
+        session_id: int,
+        k: int = 10,
+        include_breakdown: bool = True,
+        filters: Optional[dict] = None,
+    ) -> Future:
+        """Lanza el cálculo si no hay uno vigente y devuelve su `Future`."""
+        key = self._key(user_id, session_id, k, include_breakdown, filters)
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                if entry[0] == key and not entry[1].cancelled():
+                    self._entries.move_to_end(session_id)
+                    self._metrics.inc("recommendation_warm_total", result="hit")
+                    return entry[1]
+                entry[1].cancel()
+            future = self._executor.submit(
+                self._recommendation_service.recommend_movies,
+                user_id=user_id,
+                session_id=session_id,
+                k=k,
+                include_breakdown=include_breakdown,
+                filters=filters,
+            )
+            self._store(session_id, key, future)
+        self._metrics.inc("recommendation_warm_total", result="miss")
+        return future
+
+    def get(
+        self,
+        user_id: int,
+        session_id: int,
+        k: int = 10,
+        include_breakdown: bool = True,
+        filters: Optional[dict] = None,
+    ) -> List:
+        """Recomendaciones vigentes: las precalculadas (o en curso) si sirven, si no se calculan ahora.
+
+        Un cálculo vigente que todavía espera en la cola se cancela y se hace
+        aquí, sin esperar a que se libere un hilo del pool.
+        """
+        key = self._key(user_id, session_id, k, include_breakdown, filters)
+        with self._lock:
+            entry = self._entries.get(session_id)
+            current: Optional[Future] = None
+            if entry is not None:
+                # `cancel` falla si el cálculo ya arrancó o terminó: entonces sirve si la clave coincide.
+                if not entry[1].cancel() and entry[0] == key and not entry[1].cancelled():
+                    current = entry[1]
+                    self._entries.move_to_end(session_id)
+        if current is not None:
+            self._metrics.inc("recommendation_warm_total", result="hit")
+            return current.result()
+
+        self._metrics.inc("recommendation_warm_total", result="inline")
+        recommendations = self._recommendation_service.recommend_movies(
+            user_id=user_id, session_id=session_id, k=k, include_breakdown=include_breakdown, filters=filters
+        )
+        done: Future = Future()
+        done.set_result(recommendations)
+        with self._lock:
+            self._store(session_id, key, done)
+        return recommendations
+
+    def forget(self, session_id: int) -> None:
+        """Descarta lo precalculado para una sesión que ya no va a pedir más."""
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -1,67 +1,257 @@
 from __future__ import annotations
 
 import random
-from typing import Optional
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Set, Tuple, Union
 
 from movie_recommender_fuzzy.domain.models import Interaction, Movie, Session
 from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
 from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
 from movie_recommender_fuzzy.infra.session_repository import SessionRepository
+from movie_recommender_fuzzy.services.co_occurrence import CoOccurrenceIndex
+from movie_recommender_fuzzy.services.information_gain import InformationGainPool
+from movie_recommender_fuzzy.services.metrics import DISABLED, Metrics
+from movie_recommender_fuzzy.services.preference_service import PreferenceService
+
+
+FilterKey = Tuple[Tuple[str, ...], str]
+
+
+def _filter_key(filters: Optional[dict]) -> FilterKey:
+    """Forma normalizada de los filtros (géneros en minúsculas y ordenados, duración)."""
+    if not filters:
+        return (), ""
+    genres = tuple(sorted({g.strip().lower() for g in filters.get("genres", []) if g}))
+    return genres, filters.get("duration") or ""
+
+
+def _matches_filters(movie: Movie, key: FilterKey) -> bool:
+    genres, duration = key
+    if genres and not any(g in movie.genres for g in genres):
+        return False
+    if not duration:
+        return True
+    if movie.duration_minutes is None:
+        return False
+    if duration == "short":
+        return movie.duration_minutes < 100
+    if duration == "medium":
+        return 100 <= movie.duration_minutes <= 140
+    if duration == "long":
+        return movie.duration_minutes > 140
+    return True
+
+
+@dataclass
+class CandidatePool:
+    """Orden aleatorio de candidatas de una sesión, recorrido con un cursor.
+
+    Se construye para unos filtros y una versión del catálogo; si alguno cambia
+    hay que reconstruirlo. `rated` guarda lo ya valorado en la sesión y
+    `recorded` cuántas interacciones de la sesión conoce el pool.
+    """
+
+    movie_ids: List[int]
+    filter_key: FilterKey
+    catalog_version: int
+    rated: Set[int] = field(default_factory=set)
+    recorded: int = 0
+    cursor: int = 0
+
+    def current(self) -> Optional[int]:
+        """Primera candidata sin valorar; avanza el cursor sobre las ya valoradas."""
+        while self.cursor < len(self.movie_ids) and self.movie_ids[self.cursor] in self.rated:
+            self.cursor += 1
+        if self.cursor >= len(self.movie_ids):
+            return None
+        return self.movie_ids[self.cursor]
+
+    def upcoming(self, count: int) -> List[int]:
+        """Próximas `count` candidatas sin valorar, en orden, sin consumirlas."""
+        first = self.current()
+        if first is None:
+            return []
+        upcoming: List[int] = []
+        for movie_id in self.movie_ids[self.cursor :]:
+            if len(upcoming) >= count:
+                break
+            if movie_id not in self.rated:
+                upcoming.append(movie_id)
+        return upcoming
+
+    def record(self, _interaction: Interaction, movie: Movie) -> None:
+        self.rated.add(movie.id)
+        self.recorded += 1
 
 
 class SessionService:
-    """Gestiona el ciclo de vida de una sesión de valoración."""
+    """Gestiona el ciclo de vida de una sesión de valoración.
+
+    Cada sesión tiene su propio generador aleatorio (derivado de `seed` si se
+    indica, para secuencias reproducibles) y un pool de candidatas que se crea
+    en la primera petición y se reutiliza mientras no cambien filtros ni
+    catálogo. Con `strategy="random"` el pool es un `CandidatePool` barajado;
+    con `"information_gain"`, un `InformationGainPool` que prioriza las
+    películas cuyos géneros más incertidumbre le quitan al perfil.
+
+    Pools y generadores se descartan al completarse la sesión; los de sesiones
+    abandonadas salen por LRU (`MAX_CACHED_SESSIONS`) y, si la sesión vuelve,
+    el pool se reconstruye desde sus interacciones.
+    """
+
+    TOP_POOL_SIZE = 100
+    # Sesiones con pool y generador en memoria (las menos recientes se descartan).
+    MAX_CACHED_SESSIONS = 1024
+    STRATEGIES = ("random", "information_gain")
+    DECISIONS = (Interaction.LIKE, Interaction.DISLIKE, Interaction.NOT_SEEN)
 
     def __init__(
         self,
         session_repository: SessionRepository,
         interaction_repository: InteractionRepository,
         movie_repository: MovieRepository,
+        seed: Optional[int] = None,
+        strategy: str = "random",
+        metrics: Optional[Metrics] = None,
+        preference_service: Optional[PreferenceService] = None,
+        co_occurrence: Optional[CoOccurrenceIndex] = None,
     ):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Estrategia desconocida: {strategy}")
         self._session_repository = session_repository
         self._interaction_repository = interaction_repository
         self._movie_repository = movie_repository
+        self._seed = seed
+        self._strategy = strategy
+        self._rngs: OrderedDict[int, random.Random] = OrderedDict()
+        self._pools: OrderedDict[int, Union[CandidatePool, InformationGainPool]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._top_pool: Tuple[int, List[Movie]] = (-1, [])
+        self._metrics = metrics or DISABLED
+        # Reciben cada interacción registrada: perfil de largo plazo e índice de co-likes.
+        self._preference_service = preference_service
+        self._co_occurrence = co_occurrence
 
     def start_session(self, user_id: int, target_ratings: int = 20) -> Session:
         """Crea una nueva sesión para el usuario."""
         return self._session_repository.create(user_id=user_id, target_ratings=target_ratings)
 
+    def _cached(self, cache: OrderedDict, session_id: int):
+        with self._cache_lock:
+            value = cache.get(session_id)
+            if value is not None:
+                cache.move_to_end(session_id)
+            return value
+
+    def _cache(self, cache: OrderedDict, session_id: int, value) -> None:
+        with self._cache_lock:
+            cache[session_id] = value
+            cache.move_to_end(session_id)
+            while len(cache) > self.MAX_CACHED_SESSIONS:
+                cache.popitem(last=False)
+
+    def _rng(self, session_id: int) -> random.Random:
+        rng = self._cached(self._rngs, session_id)
+        if rng is None:
+            rng = random.Random(f"{self._seed}:{session_id}") if self._seed is not None else random.Random()
+            self._cache(self._rngs, session_id, rng)
+        return rng
+
+    def _top_movies(self, version: int) -> List[Movie]:
+        """Pool top del catálogo, ordenado una sola vez por versión de catálogo."""
+        cached_version, movies = self._top_pool
+        if cached_version != version:
+            movies = self._movie_repository.list_top_popular(limit=self.TOP_POOL_SIZE)
+            self._top_pool = (version, movies)
+        return movies
+
+    def _pool(self, session_id: int, filters: Optional[dict]) -> Union[CandidatePool, InformationGainPool]:
+        key = _filter_key(filters)
+        version = self._movie_repository.catalog_version()
+        pool = self._cached(self._pools, session_id)
+        # Con un almacén compartido entre procesos, otro worker pudo registrar decisiones.
+        if (
+            pool is not None
+            and pool.filter_key == key
+            and pool.catalog_version == version
+            and pool.recorded == self._interaction_repository.count_by_session(session_id)
+        ):
+            return pool
+
+        with self._metrics.stage("candidate_pool"):
+            interactions = self._interaction_repository.list_by_session(session_id)
+            rated = {interaction.movie_id for interaction in interactions}
+            eligible = [
+                movie for movie in self._top_movies(version) if movie.id not in rated and _matches_filters(movie, key)
+            ]
+            if self._strategy == "information_gain":
+                movies = self._movie_repository.get_many(rated)
+                history = [
+                    (interaction, movies[interaction.movie_id])
+                    for interaction in interactions
+                    if interaction.movie_id in movies
+                ]
+                pool = InformationGainPool(eligible, key, version, self._rng(session_id), rated=rated, history=history)
+            else:
+                movie_ids = [movie.id for movie in eligible]
+                self._rng(session_id).shuffle(movie_ids)
+                pool = CandidatePool(movie_ids=movie_ids, filter_key=key, catalog_version=version, rated=rated)
+            pool.recorded = len(interactions)
+            self._cache(self._pools, session_id, pool)
+            return pool
+
+    def _forget(self, session_id: int) -> None:
+        with self._cache_lock:
+            self._pools.pop(session_id, None)
+            self._rngs.pop(session_id, None)
+
+    def _mark_rated(self, session: Session, rated: Iterable[Tuple[Interaction, Movie]]) -> None:
+        rated = list(rated)
+        if self._preference_service is not None:
+            self._preference_service.record_interactions(rated)
+        if self._co_occurrence is not None:
+            self._co_occurrence.record(interaction for interaction, _movie in rated)
+        if session.is_completed():
+            self._forget(session.id)
+            return
+        pool = self._cached(self._pools, session.id)
+        if pool is not None:
+            for interaction, movie in rated:
+                pool.record(interaction, movie)
+
+    def get_next_movies(self, session_id: int, count: int, filters: Optional[dict] = None) -> List[Movie]:
+        """Próximas `count` películas que mostraría `get_next_movie`, para precargarlas de una vez.
+
+        Con la estrategia de ganancia de información el orden es el actual: puede
+        cambiar cuando se registren las decisiones.
+        """
+        session = self._session_repository.get(session_id)
+        if session is None or session.is_completed():
+            self._forget(session_id)
+            return []
+
+        movie_ids = self._pool(session_id, filters).upcoming(count)
+        movies = self._movie_repository.get_many(movie_ids)
+        return [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+
     def get_next_movie(self, session_id: int, filters: Optional[dict] = None) -> Optional[Movie]:
-        """Obtiene la siguiente película no valorada en la sesión desde el pool top 100."""
+        """Obtiene la siguiente película no valorada en la sesión desde el pool top 100.
+
+        Devuelve la misma película hasta que se registra una decisión sobre ella.
+        """
         session = self._session_repository.get(session_id)
         if session is None or session.is_completed():
+            self._forget(session_id)
             return None
 
-        rated_ids = set(self._interaction_repository.list_movie_ids_by_session(session_id))
-        candidates = self._movie_repository.list_top_excluding(rated_ids, limit=100)
-
-        if filters:
-            genres = [g.strip().lower() for g in filters.get("genres", []) if g]
-            duration = filters.get("duration") or ""
-
-            def match_genres(movie: Movie) -> bool:
-                if not genres:
-                    return True
-                return any(g in movie.genres for g in genres)
-
-            def match_duration(movie: Movie) -> bool:
-                if not duration:
-                    return True
-                if movie.duration_minutes is None:
-                    return False
-                if duration == "short":
-                    return movie.duration_minutes < 100
-                if duration == "medium":
-                    return 100 <= movie.duration_minutes <= 140
-                if duration == "long":
-                    return movie.duration_minutes > 140
-                return True
-
-            candidates = [m for m in candidates if match_genres(m) and match_duration(m)]
-
-        if not candidates:
+        pool = self._pool(session_id, filters)
+        movie_id = pool.current()
+        if movie_id is None:
             return None
-        return random.choice(candidates)
+        return self._movie_repository.get(movie_id)
 
     def register_decision(
         self, session_id: int, movie_id: int, decision: str, score: Optional[int] = None
@@ -86,9 +276,75 @@ class SessionService:
         self._interaction_repository.add(interaction)
 
         if interaction.is_valid_rating():
-            session.increment_valid_ratings()
-            if session.is_completed():
-                session.mark_completed()
+            session = self._session_repository.add_valid_ratings(session_id, 1) or session
 
-        self._session_repository.update(session)
+        self._mark_rated(session, [(interaction, movie)])
         return interaction
+
+    def rate_recommendation(self, session_id: int, movie_id: int, score: int) -> Optional[Interaction]:
+        """Registra la puntuación (1-5) que el usuario le da a una película recomendada.
+
+        A diferencia de `register_decision` se acepta con la sesión ya completada
+        y no cuenta para el objetivo de valoraciones.
+        """
+        session = self._session_repository.get(session_id)
+        movie = self._movie_repository.get(movie_id)
+        if session is None or movie is None:
+            return None
+
+        interaction = Interaction(
+            id=self._interaction_repository.next_id(),
+            user_id=session.user_id,
+            movie_id=movie_id,
+            session_id=session_id,
+            decision=Interaction.LIKE,
+            score=score,
+        )
+        self._interaction_repository.add(interaction)
+        self._mark_rated(session, [(interaction, movie)])
+        return interaction
+
+    def register_decisions(
+        self, session_id: int, decisions: Iterable[Tuple[int, str, Optional[int]]]
+    ) -> List[Interaction]:
+        """Registra en bloque decisiones (movie_id, decision, score) de una sesión.
+
+        Equivale a llamar a `register_decision` por cada fila: se descartan películas
+        desconocidas y se deja de registrar al completar la sesión. El lote se valida
+        entero antes de escribir (decisión desconocida o puntaje fuera de 1-5 lanzan
+        `ValueError`), el repositorio asigna los ids en un solo paso y la sesión se
+        actualiza una única vez. Cada fila lleva su propio timestamp, un microsegundo
+        después de la anterior, para conservar el orden temporal del lote.
+        """
+        rows = list(decisions)
+        for _movie_id, decision, score in rows:
+            if decision not in self.DECISIONS:
+                raise ValueError(f"Decisión desconocida: {decision}")
+            if score is not None and not 1 <= score <= 5:
+                raise ValueError(f"Puntaje fuera de 1-5: {score}")
+
+        session = self._session_repository.get(session_id)
+        if session is None or session.is_completed():
+            return []
+
+        movies = self._movie_repository.get_many(movie_id for movie_id, _decision, _score in rows)
+        remaining = session.target_ratings - session.valid_ratings_count
+        timestamp, step = datetime.now(), timedelta(microseconds=1)
+        accepted = []
+        valid_count = 0
+        for movie_id, decision, score in rows:
+            if movie_id not in movies:
+                continue
+            accepted.append((movie_id, decision, score, timestamp))
+            timestamp += step
+            if score is not None or decision in (Interaction.LIKE, Interaction.DISLIKE):
+                valid_count += 1
+                if valid_count >= remaining:
+                    break
+
+        interactions = self._interaction_repository.create_many(session.user_id, session_id, accepted)
+        if valid_count:
+            session = self._session_repository.add_valid_ratings(session_id, valid_count) or session
+
+        self._mark_rated(session, ((interaction, movies[interaction.movie_id]) for interaction in interactions))
+        return interactions
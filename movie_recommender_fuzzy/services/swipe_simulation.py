@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import json
+import random
+import statistics
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from movie_recommender_fuzzy.domain.models import Interaction, Movie
+from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.infra.session_repository import SessionRepository
+from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyEngine
+from movie_recommender_fuzzy.services.preference_service import PreferenceService
+from movie_recommender_fuzzy.services.recommendation_service import RecommendationService
+from movie_recommender_fuzzy.services.session_service import SessionService
+
+
+@dataclass
+class SimulatedUser:
+    """Usuario sintético: probabilidad de Like por género y de haber visto cada película.
+
+    La respuesta a una película es determinista (depende de `seed`, usuario y
+    película), así que todas las estrategias enfrentan al mismo usuario.
+    """
+
+    user_id: int
+    genre_likes: Dict[str, float]
+    seen_probability: float = 0.7
+    seed: int = 0
+
+    def like_probability(self, movie: Movie) -> float:
+        genres = [g.strip().lower() for g in movie.genres if g]
+        return statistics.mean(self.genre_likes.get(g, 0.5) for g in genres) if genres else 0.5
+
+    def respond(self, movie: Movie) -> str:
+        rng = random.Random(f"{self.seed}:{self.user_id}:{movie.id}")
+        if rng.random() >= self.seen_probability:
+            return Interaction.NOT_SEEN
+        return Interaction.LIKE if rng.random() < self.like_probability(movie) else Interaction.DISLIKE
+
+
+@dataclass
+class SessionOutcome:
+    """Resultado de una sesión simulada."""
+
+    swipes_to_stable: int
+    # Fracción esperada del top-k que le gusta al usuario, tras cada swipe.
+    like_rate: List[float]
+
+
+def make_users(
+    genres: Iterable[str], count: int, seed: int = 0, seen_probability: float = 0.7
+) -> List[SimulatedUser]:
+    """Genera usuarios con gustos marcados: cada género les gusta, les disgusta o les da igual."""
+    rng = random.Random(seed)
+    genres = sorted({g.strip().lower() for g in genres if g})
+    return [
+        SimulatedUser(
+            user_id=user_id,
+            genre_likes={genre: rng.choice((0.1, 0.5, 0.9)) for genre in genres},
+            seen_probability=seen_probability,
+            seed=seed,
+        )
+        for user_id in range(1, count + 1)
+    ]
+
+
+def swipes_to_stable(snapshots: Sequence[Tuple[int, ...]], min_overlap: float = 0.8) -> int:
+    """Cantidad de swipes a partir de la cual el top coincide con el final en al menos `min_overlap`.
+
+    El top debe mantenerse así hasta el final de la sesión; con `min_overlap=1`
+    se exige que no cambie en absoluto.
+    """
+    if not snapshots:
+        return 0
+    final = set(snapshots[-1])
+    needed = min_overlap * len(final)
+    swipes = len(snapshots)
+    while swipes > 1 and len(final.intersection(snapshots[swipes - 2])) >= needed:
+        swipes -= 1
+    return swipes
+
+
+def simulate_user(
+    session_service: SessionService,
+    recommendation_service: RecommendationService,
+    user: SimulatedUser,
+    max_swipes: int = 30,
+    k: int = 10,
+) -> SessionOutcome:
+    """Corre una sesión de `max_swipes` swipes y mide cuándo se estabiliza el top-k y cuánto acierta.
+
+    Tras cada swipe se guarda el ranking; al final se quitan de todos los
+    rankings las películas valoradas en la sesión (ya no se pueden recomendar),
+    de modo que solo cuenten los cambios debidos al perfil.
+    """
+    session = session_service.start_session(user_id=user.user_id, target_ratings=max_swipes + 1)
+    rankings: List[List[Movie]] = []
+    rated: List[int] = []
+    for _ in range(max_swipes):
+        movie = session_service.get_next_movie(session.id)
+        if movie is None:
+            break
+        session_service.register_decision(session.id, movie.id, user.respond(movie))
+        rated.append(movie.id)
+        recommended = recommendation_service.recommend_movies(user.user_id, session.id, k=k + max_swipes)
+        rankings.append([recommended_movie for recommended_movie, _score in recommended])
+
+    excluded = set(rated)
+    tops = [[movie for movie in ranking if movie.id not in excluded][:k] for ranking in rankings]
+    return SessionOutcome(
+        swipes_to_stable=swipes_to_stable([tuple(sorted(movie.id for movie in top)) for top in tops]),
+        like_rate=[statistics.mean(user.like_probability(movie) for movie in top) if top else 0.0 for top in tops],
+    )
+
+
+def compare_strategies(
+    movies: Sequence[Movie],
+    users: Sequence[SimulatedUser],
+    strategies: Sequence[str] = SessionService.STRATEGIES,
+    max_swipes: int = 30,
+    k: int = 10,
+    seed: int = 0,
+    checkpoints: Sequence[int] = (5, 10, 15, 20),
+) -> Dict[str, Dict[str, float]]:
+    """Compara estrategias sobre los mismos usuarios.
+
+    Por estrategia reporta los swipes hasta un top-k estable (media, mediana y
+    p90) y la fracción esperada del top-k que le gusta al usuario tras
+    `checkpoints` swipes (`like_rate@n`).
+    """
+    report: Dict[str, Dict[str, float]] = {}
+    for strategy in strategies:
+        db = InMemoryDB()
+        movie_repo = MovieRepository(db)
+        movie_repo.add_movies(movies)
+        interaction_repo = InteractionRepository(db)
+        session_service = SessionService(
+            SessionRepository(db), interaction_repo, movie_repo, seed=seed, strategy=strategy
+        )
+        recommendation_service = RecommendationService(
+            movie_repository=movie_repo,
+            interaction_repository=interaction_repo,
+            preference_service=PreferenceService(interaction_repo, movie_repo),
+            fuzzy_engine=FuzzyEngine(),
+        )
+        outcomes = [
+            simulate_user(session_service, recommendation_service, user, max_swipes=max_swipes, k=k) for user in users
+        ]
+        swipes = sorted(outcome.swipes_to_stable for outcome in outcomes)
+        summary: Dict[str, float] = {
+            "swipes_mean": round(statistics.mean(swipes), 2),
+            "swipes_median": statistics.median(swipes),
+            "swipes_p90": swipes[min(len(swipes) - 1, int(0.9 * len(swipes)))],
+        }
+        for checkpoint in checkpoints:
+            rates = [outcome.like_rate[checkpoint - 1] for outcome in outcomes if len(outcome.like_rate) >= checkpoint]
+            if rates:
+                summary[f"like_rate@{checkpoint}"] = round(statistics.mean(rates), 3)
+        report[strategy] = summary
+    return report
+
+
+def main() -> None:
+    import argparse
+
+    from movie_recommender_fuzzy.infra.catalog import DEFAULT_CATALOG_PATH, load_movies
+
+    parser = argparse.ArgumentParser(
+        description="Simula sesiones y mide cuántos swipes hacen falta para un top-10 estable y útil."
+    )
+    parser.add_argument("--catalog", default=str(DEFAULT_CATALOG_PATH), help="Catálogo JSON")
+    parser.add_argument(
+        "--catalog-size", type=int, default=300, help="Películas más populares a usar (cada ranking recorre todas)"
+    )
+    parser.add_argument("--users", type=int, default=10, help="Usuarios simulados")
+    parser.add_argument("--swipes", type=int, default=30, help="Swipes por sesión")
+    parser.add_argument("--k", type=int, default=10, help="Tamaño del top a estabilizar")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de usuarios y sesiones")
+    args = parser.parse_args()
+
+    movies = sorted(load_movies(Path(args.catalog)), key=lambda movie: movie.popularity, reverse=True)
+    movies = movies[: args.catalog_size]
+    users = make_users((genre for movie in movies for genre in movie.genres), args.users, seed=args.seed)
+    report = compare_strategies(movies, users, max_swipes=args.swipes, k=args.k, seed=args.seed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+
+from movie_recommender_fuzzy.benchmarks.compare import compare_results
+from movie_recommender_fuzzy.benchmarks.suite import bench_metrics_overhead, bench_services
+from movie_recommender_fuzzy.benchmarks.synthetic import synthetic_interactions, synthetic_movies
+
+
+def test_synthetic_data_is_deterministic_and_consistent():
+    movies = list(synthetic_movies(500, seed=4))
+    assert movies == list(synthetic_movies(500, seed=4))
+    assert movies != list(synthetic_movies(500, seed=5))
+    assert [movie.id for movie in movies if movie.is_top_100] == list(range(1, 101))
+    assert all(movie.genres and 1.0 <= movie.rating <= 10.0 for movie in movies)
+
+    interactions = list(synthetic_interactions(100, 500, per_session=20, seed=4))
+    assert [interaction.id for interaction in interactions] == list(range(1, 101))
+    assert {interaction.session_id for interaction in interactions} == {1, 2, 3, 4, 5}
+    assert all(1 <= interaction.movie_id <= 500 for interaction in interactions)
+    # Una sesión pertenece a un único usuario.
+    assert len({interaction.user_id for interaction in interactions if interaction.session_id == 1}) == 1
+
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {
+        "throughput": {"value": 100.0, "unit": "ops/s", "better": "higher"},
+        "latency": {"value": 10.0, "unit": "ms", "better": "lower"},
+        "only_in_baseline": {"value": 1.0, "unit": "ms", "better": "lower"},
+    }
+    current = {
+        "throughput": {"value": 70.0, "unit": "ops/s", "better": "higher"},
+        "latency": {"value": 9.0, "unit": "ms", "better": "lower"},
+    }
+    comparisons = {comparison.name: comparison for comparison in compare_results(current, baseline, threshold=0.2)}
+    assert set(comparisons) == {"throughput", "latency"}
+    assert comparisons["throughput"].regression and round(comparisons["throughput"].change, 2) == 0.3
+    assert not comparisons["latency"].regression and comparisons["latency"].change < 0
+
+
+def test_service_benchmarks_report_latencies():
+    results = {}
+    bench_services(results, scale=200, sessions=3)
+    assert results["macro.recommend.cold[n=200].p50_ms"]["unit"] == "ms"
+    assert results["macro.recommend.incremental[n=200].p99_ms"]["better"] == "lower"
+    assert results["micro.session.swipe[n=200].us_per_op"]["value"] > 0
+
+
+def test_metrics_overhead_benchmark_compares_both_apps_and_restores_the_environment():
+    previous = os.environ.get("APP_METRICS")
+    results = {}
+    bench_metrics_overhead(results, scale=200, requests=2)
+    assert os.environ.get("APP_METRICS") == previous
+    assert results["macro.http.request[n=200].us_per_op"]["value"] > 0
+    assert results["macro.http.request.metrics[n=200].us_per_op"]["value"] > 0
+    assert results["macro.http.metrics_overhead[n=200].ratio"]["better"] == "lower"
+    # Con métricas se registra algo en cada petición: la estimación queda por encima de 1.
+    assert results["macro.http.metrics_overhead_estimate[n=200].ratio"]["value"] > 1
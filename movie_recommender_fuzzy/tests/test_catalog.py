@@ -0,0 +1,158 @@
+import json
+
+from movie_recommender_fuzzy.domain.models import Movie
+from movie_recommender_fuzzy.infra.catalog import ingest_catalog, iter_catalog_items, load_catalog, load_movies
+from movie_recommender_fuzzy.infra.catalog_reload import CatalogReloader
+from movie_recommender_fuzzy.infra.catalog_snapshot import CatalogSnapshot, compile_snapshot, load_snapshot
+from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+
+
+def sample_movies():
+    return [
+        Movie(
+            id=278,
+            title="The Shawshank Redemption",
+            year=1994,
+            genres=["drama", "crime"],
+            popularity=27.5,
+            rating=8.7,
+            poster_url="https://image.tmdb.org/t/p/w500/a.jpg",
+            is_top_100=True,
+        ),
+        Movie(id=11, title="Señor de los Anillos", year=2001, genres=["fantasy"], duration_minutes=178),
+        Movie(id=12, title="Sin géneros", year=0, genres=[]),
+    ]
+
+
+def test_snapshot_roundtrip_builds_equal_movies(tmp_path):
+    target = tmp_path / "movies.bin"
+    assert compile_snapshot(sample_movies(), target) == 3
+
+    snapshot = load_snapshot(target)
+    assert len(snapshot) == 3
+    assert list(snapshot) == [278, 11, 12]
+    assert [snapshot[movie.id] for movie in sample_movies()] == sample_movies()
+    assert snapshot.genres() == {"drama", "crime", "fantasy"}
+
+    snapshot[99] = Movie(id=99, title="Nueva", year=2024)
+    del snapshot[12]
+    assert list(snapshot) == [278, 11, 99]
+    assert 12 not in snapshot
+    snapshot.close()
+
+
+def test_snapshot_serves_top_by_popularity_building_only_the_requested_rows(tmp_path):
+    movies = [Movie(id=1000 - i, title=f"M{i}", year=2000, popularity=float(i % 7)) for i in range(50)]
+    compile_snapshot(movies, tmp_path / "movies.bin")
+    db = InMemoryDB()
+    db.movies = load_snapshot(tmp_path / "movies.bin")
+    repo = MovieRepository(db)
+
+    top = repo.list_catalog(limit=5)
+    assert len(db.movies._materialized) == 5
+    assert top == sorted(movies, key=lambda movie: movie.popularity, reverse=True)[:5]
+    assert 1000 in db.movies and 5 not in db.movies and repo.get(5) is None
+
+    # Con altas, cambios y bajas en la capa en memoria el orden es el de ordenar todo (empates incluidos).
+    db.movies[2000] = Movie(id=2000, title="Nueva", year=2024, popularity=6.0)
+    db.movies[1000] = Movie(id=1000, title="Cambiada", year=2000, popularity=6.0)
+    del db.movies[994]
+    expected = sorted(db.movies.values(), key=lambda movie: movie.popularity, reverse=True)
+    assert repo.list_catalog(limit=100) == expected
+
+
+def test_load_catalog_prefers_up_to_date_snapshot(tmp_path):
+    json_path = tmp_path / "movies.json"
+    json_path.write_text(
+        json.dumps([{"id": 1, "title": "Uno", "year": 2000, "genres": [" Drama "], "popularity": 1.5}]),
+        encoding="utf-8",
+    )
+    assert isinstance(load_catalog(json_path), dict)
+
+    compile_snapshot(load_movies(json_path), tmp_path / "movies.bin")
+    catalog = load_catalog(json_path)
+    assert not isinstance(catalog, dict)
+    assert catalog[1].genres == ["drama"]
+
+    # Un snapshot de otra versión del formato no impide arrancar: se lee el JSON.
+    stale = bytearray((tmp_path / "movies.bin").read_bytes())
+    stale[:8] = b"MRFCAT01"
+    (tmp_path / "movies.bin").write_bytes(bytes(stale))
+    assert load_catalog(json_path)[1].title == "Uno"
+
+
+def test_ingest_catalog_streams_in_chunks(tmp_path):
+    json_path = tmp_path / "movies.json"
+    items = [{"id": i, "title": f"Película {i}", "year": 2000 + i, "genres": ["Drama"]} for i in range(25)]
+    json_path.write_text(json.dumps(items, indent=2), encoding="utf-8")
+
+    assert [item["id"] for item in iter_catalog_items(json_path, buffer_size=16)] == list(range(25))
+
+    movie_repo = MovieRepository(InMemoryDB())
+    progress = []
+    loaded = ingest_catalog(json_path, movie_repo, chunk_size=10, progress=progress.append)
+
+    assert loaded == 25
+    assert progress == [10, 20, 25]
+    assert movie_repo.get(24).title == "Película 24"
+
+
+def test_reloader_applies_delta_and_swaps_atomically(tmp_path):
+    json_path = tmp_path / "movies.json"
+    items = [{"id": i, "title": f"Película {i}", "year": 2000, "genres": ["Drama"], "popularity": i} for i in range(10)]
+    json_path.write_text(json.dumps(items), encoding="utf-8")
+
+    movie_repo = MovieRepository(InMemoryDB())
+    ingest_catalog(json_path, movie_repo)
+    before = movie_repo.catalog()
+    swaps = []
+    reloader = CatalogReloader(movie_repo, json_path, on_swap=lambda catalog, result: swaps.append(result.mode))
+
+    assert reloader.reload().mode == "noop"
+
+    items[0]["popularity"] = 99.0
+    del items[1]
+    items.append({"id": 42, "title": "Nueva", "year": 2024, "genres": ["Comedy"]})
+    json_path.write_text(json.dumps(items), encoding="utf-8")
+    result = reloader.reload()
+
+    assert result.mode == "delta"
+    assert ([m.id for m in result.diff.added], result.diff.removed, [m.id for m in result.diff.changed]) == (
+        [42],
+        [1],
+        [0],
+    )
+    assert swaps == ["delta"]
+    # El catálogo anterior queda intacto para lecturas en curso.
+    assert 1 in before and before[0].popularity == 0
+    assert movie_repo.get(1) is None and movie_repo.get(0).popularity == 99.0
+    assert movie_repo.get(2) is before[2]
+
+
+def test_reloader_applies_delta_over_a_snapshot_without_building_unchanged_rows(tmp_path):
+    json_path = tmp_path / "movies.json"
+    items = [
+        {"id": i, "title": f"Película {i}", "year": 2000, "genres": ["Drama"], "rating": 7, "popularity": i}
+        for i in range(200)
+    ]
+    json_path.write_text(json.dumps(items), encoding="utf-8")
+    compile_snapshot(load_movies(json_path), tmp_path / "movies.bin")
+    db = InMemoryDB()
+    db.movies = before = load_catalog(json_path)
+    movie_repo = MovieRepository(db)
+    reloader = CatalogReloader(movie_repo, json_path)
+    assert reloader.reload().mode == "noop"
+
+    items[0]["title"] = "Renombrada"
+    del items[1]
+    items.append({"id": 500, "title": "Nueva", "year": 2024, "genres": ["Comedy"]})
+    json_path.write_text(json.dumps(items), encoding="utf-8")
+    result = reloader.reload()
+
+    assert result.mode == "delta" and result.diff.size() == 3
+    assert before._materialized == {}
+    updated = movie_repo.catalog()
+    assert isinstance(updated, CatalogSnapshot) and updated._mmap is before._mmap
+    assert updated[0].title == "Renombrada" and 1 not in updated and updated[500].title == "Nueva"
+    assert before[0].title == "Película 0" and 1 in before and len(updated) == len(before) == 200
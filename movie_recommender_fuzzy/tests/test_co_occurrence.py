@@ -0,0 +1,131 @@
+import json
+from datetime import datetime
+
+from movie_recommender_fuzzy.domain.models import Interaction, Movie
+from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.db_sqlite import SQLiteDB
+from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository, SQLiteInteractionRepository
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.infra.session_repository import SessionRepository
+from movie_recommender_fuzzy.services.co_occurrence import CoOccurrenceIndex, CoOccurrenceRebuilder
+from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyEngine
+from movie_recommender_fuzzy.services.preference_service import PreferenceService
+from movie_recommender_fuzzy.services.recommendation_service import RecommendationService
+from movie_recommender_fuzzy.services.session_service import SessionService
+from movie_recommender_fuzzy.web.app import create_app
+
+
+def like(session_id, movie_id, decision=Interaction.LIKE, score=None):
+    return Interaction(id=0, user_id=1, movie_id=movie_id, session_id=session_id, decision=decision, score=score)
+
+
+def test_index_counts_co_likes_per_session_with_bounded_neighbors():
+    index = CoOccurrenceIndex(neighbors=1)
+    index.record([like(1, 10), like(1, 11), like(1, 12, Interaction.DISLIKE), like(1, 13, score=2)])
+    index.record([like(2, 10), like(2, 11), like(2, 11), like(3, 10), like(3, 14, score=5)])
+
+    assert set(index.neighbors_of(10)) == {11}
+    assert index.similarities([10])[11] > index.similarities([10])[14] > 0
+    assert 12 not in index.similarities([10]) and 13 not in index.similarities([10])
+
+    # Con lugar para dos vecinos, uno nuevo desplaza al de menor cuenta (14).
+    index.record([like(4, 10), like(4, 15)])
+    assert set(index.similarities([10])) == {11, 15}
+
+
+def test_co_likes_break_ties_between_same_genre_movies():
+    db = InMemoryDB()
+    movie_repo = MovieRepository(db)
+    movie_repo.add_movies(
+        [Movie(id=i, title=f"Movie {i}", year=2000, genres=["Drama"], rating=7.0, popularity=0.5) for i in range(1, 9)]
+    )
+    interaction_repo = InteractionRepository(db)
+    preference_service = PreferenceService(interaction_repo, movie_repo)
+    index = CoOccurrenceIndex()
+    session_service = SessionService(SessionRepository(db), interaction_repo, movie_repo, co_occurrence=index)
+    recommender = RecommendationService(
+        movie_repo, interaction_repo, preference_service, FuzzyEngine(), co_occurrence=index
+    )
+
+    # Otros usuarios que dieron like a la 1 también le dieron like a la 7.
+    for _ in range(5):
+        other = session_service.start_session(user_id=2)
+        session_service.register_decisions(other.id, [(1, Interaction.LIKE, None), (7, Interaction.LIKE, None)])
+
+    session = session_service.start_session(user_id=1)
+    session_service.register_decision(session.id, 1, Interaction.LIKE)
+    first = recommender.recommend_movies(1, session.id, k=3, include_breakdown=True)
+    assert first[0][0].id == 7 and first[0][2]["collaborative_similarity"] > 0.5
+    assert first[1][2]["collaborative_similarity"] == 0.0
+
+    # El índice cambia entre llamadas: el re-ranking incremental da lo mismo que uno desde cero.
+    for _ in range(8):
+        other = session_service.start_session(user_id=3)
+        session_service.register_decisions(other.id, [(1, Interaction.LIKE, None), (4, Interaction.LIKE, None)])
+    incremental = recommender.recommend_movies(1, session.id, k=3, include_breakdown=True)
+    fresh = RecommendationService(
+        movie_repo, interaction_repo, preference_service, FuzzyEngine(), co_occurrence=index
+    ).recommend_movies(1, session.id, k=3, include_breakdown=True)
+    assert [(movie.id, score) for movie, score, _ in incremental] == [(movie.id, score) for movie, score, _ in fresh]
+    assert incremental[0][0].id == 4
+
+
+def test_app_rebuilds_the_index_from_stored_interactions_on_start(tmp_path):
+    catalog = tmp_path / "movies.json"
+    movies = [{"id": i, "title": f"Movie {i}", "year": 2000, "genres": ["Drama"]} for i in range(1, 6)]
+    catalog.write_text(json.dumps(movies), encoding="utf-8")
+    store = tmp_path / "sessions.db"
+    SQLiteInteractionRepository(SQLiteDB(store)).add_many(
+        Interaction(id=i, user_id=1, movie_id=movie_id, session_id=session_id, decision=Interaction.LIKE)
+        for i, (session_id, movie_id) in enumerate([(1, 1), (1, 2), (2, 1), (2, 2), (2, 3)], start=1)
+    )
+
+    app = create_app(data_path=catalog, lazy=False, session_db=store)
+    neighbors = app.extensions["co_occurrence"].neighbors_of(1)
+    assert set(neighbors) == {2, 3} and neighbors[2] > neighbors[3]
+    # Con el almacén compartido, además se rearma periódicamente.
+    assert app.extensions["co_occurrence_rebuilder"].interval == 300
+
+
+def test_rebuild_realigns_worker_indexes_from_the_shared_store(tmp_path):
+    repo = SQLiteInteractionRepository(SQLiteDB(tmp_path / "sessions.db"))
+    # Dos workers: cada uno registra solo las sesiones que atiende.
+    workers = [CoOccurrenceIndex(), CoOccurrenceIndex()]
+    for session_id, movies in [(1, [1, 2]), (2, [1, 3]), (3, [1, 3])]:
+        rows = [(movie_id, Interaction.LIKE, None, datetime.now()) for movie_id in movies]
+        stored = repo.create_many(1, session_id, rows)
+        workers[session_id % 2].record(stored)
+    assert workers[0].neighbors_of(1) != workers[1].neighbors_of(1)
+
+    # Un like que llega mientras se lee el historial se conserva tras el reemplazo.
+    late = []
+
+    def history():
+        yield from repo.iter_all()
+        rows = [(movie_id, Interaction.LIKE, None, datetime.now()) for movie_id in (4, 5)]
+        late.extend(repo.create_many(1, 4, rows))
+        workers[0].record(late)
+
+    version = workers[0].version
+    workers[0].rebuild(history())
+    workers[1].rebuild(repo.iter_all())
+    assert workers[0].version > version
+    assert workers[0].neighbors_of(1) == workers[1].neighbors_of(1)
+    assert set(workers[0].neighbors_of(1)) == {2, 3}
+    assert set(workers[0].neighbors_of(4)) == set(workers[1].neighbors_of(4)) == {5}
+
+
+def test_rebuilder_runs_once_per_interval_in_the_background():
+    now = [0.0]
+    index = CoOccurrenceIndex()
+    stored = [like(1, 1), like(1, 2)]
+    rebuilder = CoOccurrenceRebuilder(index, lambda: iter(stored), interval=60, clock=lambda: now[0])
+
+    assert rebuilder.maybe_rebuild() is None
+    now[0] = 61
+    rebuilder.maybe_rebuild().join()
+    assert rebuilder.rebuilds == 1 and set(index.neighbors_of(1)) == {2}
+    assert rebuilder.maybe_rebuild() is None
+    now[0] = 122
+    rebuilder.maybe_rebuild().join()
+    assert rebuilder.rebuilds == 2
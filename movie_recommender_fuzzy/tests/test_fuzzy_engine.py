@@ -1,16 +1,39 @@
-from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyEngine
+from movie_recommender_fuzzy.services.fuzzy_engine import DEFAULT_ENGINE, FuzzyConfig, FuzzyEngine
 
 
 def test_high_inputs_return_high_relevance():
-    score = FuzzyEngine.compute_relevance(1.0, 1.0, 1.0)
+    score = DEFAULT_ENGINE.compute_relevance(1.0, 1.0, 1.0)
     assert score > 0.8
 
 
 def test_low_inputs_return_low_relevance():
-    score = FuzzyEngine.compute_relevance(0.0, 0.0, 0.0)
+    score = DEFAULT_ENGINE.compute_relevance(0.0, 0.0, 0.0)
     assert score < 0.3
 
 
 def test_mixed_inputs_are_intermediate():
-    score = FuzzyEngine.compute_relevance(0.5, 0.6, 0.5)
+    score = DEFAULT_ENGINE.compute_relevance(0.5, 0.6, 0.5)
     assert 0.3 < score < 0.8
+
+
+def test_collaborative_input_is_neutral_at_zero_and_lifts_strong_candidates():
+    for inputs in [(1.0, 0.5, 1.0), (0.5, 0.6, 0.5), (0.1, 0.9, 0.3)]:
+        assert DEFAULT_ENGINE.compute_relevance(*inputs, 0.0) == DEFAULT_ENGINE.compute_relevance(*inputs)
+    assert DEFAULT_ENGINE.compute_relevance(1.0, 0.5, 1.0, 1.0) > DEFAULT_ENGINE.compute_relevance(1.0, 0.5, 1.0) + 0.05
+
+
+def test_default_engine_uses_the_default_config_and_instances_their_own():
+    score, breakdown = DEFAULT_ENGINE.compute_relevance_with_breakdown(0.5, 0.6, 0.5)
+    assert score == FuzzyEngine().compute_relevance(0.5, 0.6, 0.5) == breakdown["final"]
+    muted = FuzzyEngine(FuzzyConfig.from_dict({"rule_weights": [0.0] * len(FuzzyConfig().rule_weights)}))
+    assert muted.compute_relevance(0.5, 0.6, 0.5) == 0.0
+
+
+def test_batch_evaluation_matches_one_by_one():
+    inputs = [(a / 4, p / 5, r / 3, c / 2) for a in range(5) for p in range(6) for r in range(4) for c in range(3)]
+    inputs += [(1.2, -0.1, 0.5), (0.5, 0.6, 0.5)]
+    weights = [0.5] * len(FuzzyConfig().rule_weights)
+    tuned = FuzzyEngine(FuzzyConfig.from_dict({"outputs": {"med": [0.2, 0.5, 0.9]}, "rule_weights": weights}))
+    for engine in (DEFAULT_ENGINE, tuned):
+        assert engine.compute_relevance_many(inputs) == [engine.compute_relevance(*values) for values in inputs]
+    assert DEFAULT_ENGINE.compute_relevance_many([]) == []
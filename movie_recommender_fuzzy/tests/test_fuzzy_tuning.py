@@ -0,0 +1,65 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from movie_recommender_fuzzy.domain.models import Interaction
+from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyConfig, FuzzyEngine
+from movie_recommender_fuzzy.services.fuzzy_tuning import build_dataset, score_config, tune
+
+
+def write_fixture(tmp_path, sessions=30):
+    # Dramas de popularidad variada; a todos les gustan solo los dramas poco populares.
+    movies = [
+        {"id": i, "title": f"Movie {i}", "year": 2000, "genres": ["Drama"], "popularity": i * 7 % 20 / 20, "rating": 7}
+        for i in range(1, 21)
+    ]
+    catalog = tmp_path / "movies.json"
+    catalog.write_text(json.dumps(movies), encoding="utf-8")
+
+    start = datetime(2024, 1, 1)
+    rows = []
+    for session_id in range(1, sessions + 1):
+        order = movies[session_id % 20 :] + movies[: session_id % 20]
+        for step, movie in enumerate(order[:16]):
+            decision = Interaction.LIKE if movie["popularity"] < 0.5 else Interaction.DISLIKE
+            rows.append((start + timedelta(hours=session_id, seconds=step), session_id, movie["id"], decision))
+    log = tmp_path / "interactions.jsonl"
+    with log.open("w", encoding="utf-8") as handle:
+        for interaction_id, (timestamp, session_id, movie_id, decision) in enumerate(rows, start=1):
+            row = {"id": interaction_id, "user_id": session_id, "movie_id": movie_id, "session_id": session_id}
+            row.update({"decision": decision, "score": None, "timestamp": timestamp.isoformat()})
+            handle.write(json.dumps(row) + "\n")
+    return log, catalog
+
+
+def test_config_round_trips_and_rule_weights_scale_rules(tmp_path):
+    path = tmp_path / "fuzzy.json"
+    FuzzyConfig().save(path)
+    loaded = FuzzyEngine(FuzzyConfig.load(path))
+    for inputs in [(1.0, 0.5, 1.0, 0.0), (0.5, 0.6, 0.5, 0.7), (0.1, 0.9, 0.3, 0.2)]:
+        assert loaded.compute_relevance(*inputs) == FuzzyEngine().compute_relevance(*inputs)
+
+    # Sin la regla "afinidad alta y rating alto => muy alta" la misma película puntúa menos.
+    weights = [0.0] + [1.0] * (len(FuzzyConfig().rule_weights) - 1)
+    muted = FuzzyEngine(FuzzyConfig.from_dict({"rule_weights": weights}))
+    assert muted.compute_relevance(1.0, 0.0, 1.0) < FuzzyEngine().compute_relevance(1.0, 0.0, 1.0)
+
+    with pytest.raises(ValueError):
+        FuzzyConfig.from_dict({"outputs": {"med": [0.6, 0.5, 0.4]}})
+
+
+def test_tuning_improves_the_log_ranking_with_any_worker_count(tmp_path):
+    log, catalog = write_fixture(tmp_path)
+    dataset = build_dataset(log, catalog)
+    assert len(dataset) == 30
+
+    serial = tune(dataset, generations=4, population=6, workers=1, seed=3)
+    parallel = tune(dataset, generations=4, population=6, workers=2, seed=3)
+
+    assert serial.score > serial.baseline
+    assert [entry["best"] for entry in serial.history] == [entry["best"] for entry in parallel.history]
+    assert serial.config == parallel.config
+    # La configuración guardada reproduce el puntaje de la búsqueda.
+    serial.config.save(tmp_path / "tuned.json")
+    assert score_config(FuzzyEngine(FuzzyConfig.load(tmp_path / "tuned.json")), dataset) == pytest.approx(serial.score)
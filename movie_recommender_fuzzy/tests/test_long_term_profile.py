@@ -0,0 +1,195 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from movie_recommender_fuzzy.domain.models import Interaction, Movie
+from movie_recommender_fuzzy.domain.profile import LongTermProfile, UserPreferenceProfile
+from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.db_sqlite import SQLiteDB
+from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository, SQLiteInteractionRepository
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.infra.profile_repository import SQLiteUserProfileRepository, UserProfileRepository
+from movie_recommender_fuzzy.infra.session_repository import SessionRepository
+from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyEngine
+from movie_recommender_fuzzy.services.preference_service import PreferenceService
+from movie_recommender_fuzzy.services.recommendation_service import RecommendationService
+from movie_recommender_fuzzy.services.session_service import SessionService
+from movie_recommender_fuzzy.web.app import create_app
+
+
+def sample_movies():
+    genres = ["Drama", "Comedy", "Horror"]
+    return [
+        Movie(id=i, title=f"Movie {i}", year=2000, genres=[genres[i % 3]], rating=5.0 + i % 4, popularity=0.5)
+        for i in range(1, 31)
+    ]
+
+
+def build(profile_repository_factory):
+    db = InMemoryDB()
+    movie_repo = MovieRepository(db)
+    movie_repo.add_movies(sample_movies())
+    interaction_repo = InteractionRepository(db)
+    preference_service = PreferenceService(
+        interaction_repo, movie_repo, profile_repository=profile_repository_factory(db), long_term_weight=0.3
+    )
+    return db, movie_repo, interaction_repo, preference_service
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_incremental_profile_decays_and_matches_rebuild(tmp_path, backend):
+    if backend == "memory":
+        factory = UserProfileRepository
+    else:
+        shared = SQLiteDB(tmp_path / "sessions.db")
+        factory = lambda _db: SQLiteUserProfileRepository(shared)  # noqa: E731
+    _db, movie_repo, interaction_repo, service = build(factory)
+
+    now = datetime(2026, 1, 1)
+    # Hace dos años le gustaba el drama; últimamente no.
+    history = [(1, 3, Interaction.LIKE, now - timedelta(days=730)) for _ in range(4)]
+    history += [(2, 3, Interaction.DISLIKE, now - timedelta(days=d)) for d in (2, 1)]
+    history += [(3, 1, Interaction.LIKE, now)]  # comedia
+    interactions = [
+        Interaction(id=i, user_id=5, movie_id=movie_id, session_id=session_id, decision=decision, timestamp=when)
+        for i, (session_id, movie_id, decision, when) in enumerate(history, start=1)
+    ]
+    interaction_repo.add_many(interactions)
+    # Llegan desordenadas y en lotes: el resultado no depende del orden.
+    service.record_interactions((i, movie_repo.get(i.movie_id)) for i in reversed(interactions[:3]))
+    service.record_interactions((i, movie_repo.get(i.movie_id)) for i in interactions[3:])
+
+    incremental = service.build_user_profile(5)
+    assert incremental.genre_affinities["drama"] < 0.2
+    assert incremental.genre_affinities["comedy"] == 1.0
+    # Sin decaimiento sería 4 likes contra 2 dislikes.
+    assert service.build_user_profile(5, session_id=1).genre_affinities["drama"] == 1.0
+
+    service.rebuild_long_term_profile(5)
+    rebuilt = service.build_user_profile(5)
+    assert rebuilt.genre_affinities == pytest.approx(incremental.genre_affinities)
+    assert rebuilt.preferred_rating == pytest.approx(incremental.preferred_rating)
+
+
+def test_returning_user_profile_reads_without_scanning_history_and_blends(monkeypatch):
+    db, movie_repo, interaction_repo, preference_service = build(UserProfileRepository)
+    session_service = SessionService(
+        SessionRepository(db), interaction_repo, movie_repo, seed=1, preference_service=preference_service
+    )
+    recommender = RecommendationService(movie_repo, interaction_repo, preference_service, FuzzyEngine())
+
+    past = session_service.start_session(user_id=9)
+    decisions = [
+        (movie.id, Interaction.LIKE if "Horror" in movie.genres else Interaction.DISLIKE, None)
+        for movie in sample_movies()[:12]
+    ]
+    session_service.register_decisions(past.id, decisions)
+
+    def no_scan(_user_id):
+        raise AssertionError("no debe recorrer el historial")
+
+    monkeypatch.setattr(interaction_repo, "list_by_user", no_scan)
+    assert preference_service.build_user_profile(9).genre_affinities == {"drama": 0.0, "comedy": 0.0, "horror": 1.0}
+
+    current = session_service.start_session(user_id=9)
+    session_service.register_decision(current.id, 13, Interaction.LIKE)  # comedia
+    profile = preference_service.build_recommendation_profile(9, current.id)
+    # La comedia ahora gusta en la sesión; el terror solo viene del historial y pesa menos.
+    # El like de la sesión actual no se cuenta también del lado del historial (allí la comedia solo tiene dislikes).
+    assert profile.genre_affinities["comedy"] == pytest.approx(0.7)
+    assert profile.genre_affinities["horror"] == pytest.approx(0.3)
+    top = [movie.genres[0] for movie, _score in recommender.recommend_movies(9, current.id, k=12)]
+    assert top[:6] == ["Comedy"] * 6 and "Horror" in top[6:]
+
+
+@pytest.mark.parametrize("half_life_days", [1.0, 1 / 24])
+def test_short_half_life_decays_without_overflow_over_years(half_life_days):
+    _db, movie_repo, interaction_repo, service = build(UserProfileRepository)
+    service.half_life_days = half_life_days
+    start = datetime(2020, 1, 1)
+    # Años de dislikes de drama y, al final, dos likes seguidos.
+    when = [start + timedelta(days=30 * i) for i in range(80)]
+    interactions = [
+        Interaction(id=i, user_id=4, movie_id=3, session_id=i, decision=Interaction.DISLIKE, timestamp=moment)
+        for i, moment in enumerate(when, start=1)
+    ]
+    interactions += [
+        Interaction(id=100 + i, user_id=4, movie_id=3, session_id=100, decision=Interaction.LIKE, timestamp=moment)
+        for i, moment in enumerate([when[-1] + timedelta(days=400), when[-1] + timedelta(days=400, hours=1)])
+    ]
+    interaction_repo.add_many(interactions)
+    for interaction in interactions:
+        service.record_interactions([(interaction, movie_repo.get(interaction.movie_id))])
+
+    incremental = service.build_user_profile(4)
+    assert incremental.genre_affinities["drama"] == pytest.approx(1.0)
+    assert service.rebuild_long_term_profile(4).to_preference_profile().genre_affinities == pytest.approx(
+        incremental.genre_affinities
+    )
+
+
+def test_long_term_profile_scores_like_the_session_profile():
+    movies = {movie.id: movie for movie in sample_movies()}
+    now = datetime(2026, 1, 1)
+    rows = [
+        (1, Interaction.LIKE, None),
+        (2, Interaction.DISLIKE, None),
+        (4, Interaction.LIKE, 5),
+        (5, Interaction.LIKE, 2),
+    ]
+    interactions = [
+        Interaction(id=i, user_id=1, movie_id=movie_id, session_id=1, decision=decision, score=score, timestamp=now)
+        for i, (movie_id, decision, score) in enumerate(rows, start=1)
+    ]
+    session = UserPreferenceProfile(user_id=1)
+    session.update_from_interactions(interactions, movies)
+    long_term = LongTermProfile(user_id=1)
+    for interaction in interactions:
+        long_term.record(interaction, movies[interaction.movie_id], half_life_days=180.0)
+
+    # Con puntajes, solo los géneros puntuados tienen afinidad, en ambos perfiles.
+    assert session.genre_affinities == {"comedy": 1.0, "horror": 0.0}
+    assert long_term.to_preference_profile() == session
+
+
+def test_profiles_from_the_old_schema_are_dropped_and_rebuilt(tmp_path):
+    store = tmp_path / "sessions.db"
+    conn = sqlite3.connect(store)
+    conn.executescript(
+        "CREATE TABLE user_profiles (user_id INTEGER PRIMARY KEY, rating_sum REAL, rating_weight REAL);"
+        "INSERT INTO user_profiles VALUES (1, 1e300, 1e299);"
+    )
+    conn.close()
+
+    assert SQLiteUserProfileRepository(SQLiteDB(store)).get(1) is None
+
+
+def test_existing_history_is_backfilled_before_the_first_new_swipe(tmp_path, monkeypatch):
+    catalog = tmp_path / "movies.json"
+    catalog.write_text(json.dumps([vars(movie) for movie in sample_movies()]), encoding="utf-8")
+    store = tmp_path / "sessions.db"
+    # Historial escrito antes de activar el perfil de largo plazo: no hay filas de perfil.
+    SQLiteInteractionRepository(SQLiteDB(store)).add_many(
+        Interaction(id=i, user_id=1, movie_id=i, session_id=0, decision=Interaction.LIKE) for i in (3, 6, 9)
+    )
+
+    monkeypatch.setenv("LONG_TERM_PROFILE_WEIGHT", "0.3")
+    client = create_app(data_path=catalog, lazy=False, session_db=store).test_client()
+    client.get("/start")
+    movie_id = client.get("/api/swipe/next?count=1").get_json()["movies"][0]["id"]
+    client.post("/api/swipe/decisions", json={"decisions": [{"movie_id": movie_id, "decision": "LIKE"}]})
+
+    # El perfil incluye los tres likes previos además del nuevo: coincide con reconstruirlo del historial.
+    shared = SQLiteDB(store)
+    profiles = SQLiteUserProfileRepository(shared)
+    incremental = profiles.get(1)
+    movie_repo = MovieRepository(InMemoryDB())
+    movie_repo.add_movies(sample_movies())
+    rebuilt = PreferenceService(
+        SQLiteInteractionRepository(shared), movie_repo, profile_repository=profiles
+    ).rebuild_long_term_profile(1)
+    assert sum(stats.likes for stats in incremental.genres.values()) == pytest.approx(
+        sum(stats.likes for stats in rebuilt.genres.values())
+    )
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from movie_recommender_fuzzy.domain.models import Interaction
+from movie_recommender_fuzzy.services.offline_evaluation import evaluate_log, iter_sessions, ranking_metrics
+
+
+def write_fixture(tmp_path, sessions=12):
+    genres = ["Drama", "Comedy", "Action"]
+    movies = [
+        {"id": i, "title": f"Movie {i}", "year": 2000, "genres": [genres[i % 3]], "popularity": 50.0, "rating": 7}
+        for i in range(1, 61)
+    ]
+    catalog = tmp_path / "movies.json"
+    catalog.write_text(json.dumps(movies), encoding="utf-8")
+
+    start = datetime(2024, 1, 1)
+    rows = []
+    for session_id in range(1, sessions + 1):
+        liked = genres[session_id % 3]
+        offset = session_id % 4
+        for step, movie in enumerate(movies[offset : offset + 15]):
+            decision = Interaction.LIKE if movie["genres"][0] == liked else Interaction.DISLIKE
+            rows.append((start + timedelta(minutes=session_id, seconds=step), session_id, movie["id"], decision))
+    # Sesiones intercaladas, como en un log real ordenado por tiempo.
+    rows.sort()
+    log = tmp_path / "interactions.jsonl"
+    with log.open("w", encoding="utf-8") as handle:
+        for interaction_id, (timestamp, session_id, movie_id, decision) in enumerate(rows, start=1):
+            row = {"id": interaction_id, "user_id": session_id, "movie_id": movie_id, "session_id": session_id}
+            row.update({"decision": decision, "score": None, "timestamp": timestamp.isoformat()})
+            handle.write(json.dumps(row) + "\n")
+    return log, catalog
+
+
+def test_ranking_metrics():
+    precision, recall, ndcg = ranking_metrics([1, 2, 3, 4], {2, 9}, k=4)
+    assert precision == 0.25 and recall == 0.5
+    assert ndcg == pytest.approx((1 / 1.5849625) / (1 + 1 / 1.5849625))
+
+
+def test_iter_sessions_keeps_bounded_open_sessions():
+    rows = [Interaction(id=i, user_id=1, movie_id=i, session_id=s) for i, s in enumerate([1, 2, 1, 3, 1], start=1)]
+    # Al abrirse la 3 se cierra la 2, la que lleva más tiempo sin interacciones.
+    assert [(session_id, len(group)) for session_id, group in iter_sessions(rows, max_open=2)] == [
+        (2, 1),
+        (3, 1),
+        (1, 3),
+    ]
+
+
+def test_report_is_identical_for_any_worker_count(tmp_path):
+    log, catalog = write_fixture(tmp_path)
+    serial = evaluate_log(log, catalog, k=5, workers=1, chunk_size=3)
+    parallel = evaluate_log(log, catalog, k=5, workers=2, chunk_size=3)
+
+    assert serial["sessions"] == 12 and serial["skipped"] == 0
+    # Con gustos tan marcados, lo que gustó en el holdout (lo primero del género sin ver) entra al top.
+    assert serial["recall@5"] == 1.0 and serial["ndcg@5"] > 0.8
+    for key in ("sessions", "skipped", "precision@5", "recall@5", "ndcg@5"):
+        assert parallel[key] == serial[key]
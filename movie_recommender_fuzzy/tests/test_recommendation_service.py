@@ -1,8 +1,11 @@
+import random
+
 from movie_recommender_fuzzy.domain.models import Interaction, Movie
 from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
 from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
 from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
 from movie_recommender_fuzzy.infra.session_repository import SessionRepository
+from movie_recommender_fuzzy.services.session_service import SessionService
 from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyEngine
 from movie_recommender_fuzzy.services.preference_service import PreferenceService
 from movie_recommender_fuzzy.services.recommendation_service import RecommendationService
@@ -94,3 +97,89 @@ def test_recommendations_exclude_rated_and_prioritize_affinity():
     assert all(movie_id not in (1, 2, 3) for movie_id in movie_ids)
     # Afinidades fuertes con Action/Sci-Fi deben priorizar la siguiente de Action sobre Comedy.
     assert movie_ids == [4, 5]
+
+
+def test_incremental_rerank_matches_full_recomputation():
+    rng = random.Random(3)
+    genres = ["Action", "Drama", "Comedy", "Horror", "Romance", "Sci-Fi"]
+    db = InMemoryDB()
+    movie_repo = MovieRepository(db)
+    movie_repo.add_movies(
+        Movie(
+            id=movie_id,
+            title=f"Movie {movie_id}",
+            year=2000,
+            genres=rng.sample(genres, rng.randint(1, 3)),
+            rating=round(rng.uniform(5, 9), 1),
+            popularity=round(rng.random(), 2),
+            is_top_100=movie_id <= 100,
+        )
+        for movie_id in range(1, 301)
+    )
+    session_repo = SessionRepository(db)
+    interaction_repo = InteractionRepository(db)
+    session_service = SessionService(session_repo, interaction_repo, movie_repo, seed=3)
+
+    def new_service():
+        return RecommendationService(
+            movie_repository=movie_repo,
+            interaction_repository=interaction_repo,
+            preference_service=PreferenceService(interaction_repo, movie_repo),
+            fuzzy_engine=FuzzyEngine(),
+        )
+
+    incremental = new_service()
+    session = session_service.start_session(user_id=1, target_ratings=6)
+    for step in range(12):
+        if step < 6:
+            movie = session_service.get_next_movie(session.id)
+            session_service.register_decision(session.id, movie.id, rng.choice([Interaction.LIKE, Interaction.DISLIKE]))
+        else:
+            # Puntuaciones en la pantalla de resultados, con la sesión ya completada.
+            top = incremental.recommend_movies(user_id=1, session_id=session.id, k=5)
+            assert session_service.rate_recommendation(session.id, top[0][0].id, rng.randint(1, 5)) is not None
+
+        expected = new_service().recommend_movies(user_id=1, session_id=session.id, k=10, include_breakdown=True)
+        actual = incremental.recommend_movies(user_id=1, session_id=session.id, k=10, include_breakdown=True)
+        assert [(movie.id, score, detail) for movie, score, detail in actual] == [
+            (movie.id, score, detail) for movie, score, detail in expected
+        ]
+
+
+def test_deadline_scores_by_priority_and_reports_completeness():
+    db = InMemoryDB()
+    movie_repo = MovieRepository(db)
+    movie_repo.add_movies(
+        Movie(id=i, title=f"Drama {i}", year=2000, genres=["Drama"], rating=5.0 + i % 5, popularity=i / 100)
+        for i in range(1, 61)
+    )
+    session_repo = SessionRepository(db)
+    interaction_repo = InteractionRepository(db)
+    session = session_repo.create(user_id=1, target_ratings=3)
+    interaction_repo.add(
+        Interaction(
+            id=interaction_repo.next_id(), user_id=1, movie_id=1, session_id=session.id, decision=Interaction.LIKE
+        )
+    )
+
+    def new_service():
+        return RecommendationService(
+            movie_repo, interaction_repo, PreferenceService(interaction_repo, movie_repo), FuzzyEngine()
+        )
+
+    expected = new_service().recommend_movies(1, session.id, k=5)
+    generous = new_service().recommend_movies(1, session.id, k=5, deadline_ms=60_000)
+    assert generous == expected
+    assert generous.complete and generous.evaluated == generous.candidates == 59
+
+    # Plazo vencido: sin estado guardado solo se recorren y puntúan las k más populares.
+    service = new_service()
+    rushed = service.recommend_movies(1, session.id, k=5, deadline_ms=0)
+    assert not rushed.complete and rushed.evaluated == rushed.candidates == 5
+    assert {movie.id for movie, _score in rushed} == {60, 59, 58, 57, 56}
+    # Ese estado a medias no se guarda: la próxima llamada recorre todo el catálogo.
+    assert service.recommend_movies(1, session.id, k=5) == expected
+
+    # Con las relevancias ya guardadas en el estado de la sesión, completar no cuesta nada.
+    service.recommend_movies(1, session.id, k=5)
+    assert service.recommend_movies(1, session.id, k=5, deadline_ms=0).complete
@@ -0,0 +1,31 @@
+import signal
+
+import pytest
+from flask import Flask
+
+from movie_recommender_fuzzy.web import serve
+
+
+@pytest.mark.skipif(not hasattr(serve.os, "fork"), reason="necesita os.fork")
+def test_prefork_backs_off_crashing_workers_and_keeps_the_sighup_handler(monkeypatch, capfd):
+    def reload_catalog(_signum, _frame):
+        pass
+
+    def crashing_server(*_args, **_kwargs):
+        # Corre en el hijo: el traceback que imprime muestra qué manejador heredó.
+        raise RuntimeError(f"sighup heredado: {signal.getsignal(signal.SIGHUP) is reload_catalog}")
+
+    monkeypatch.setattr("werkzeug.serving.make_server", crashing_server)
+    monkeypatch.setattr(serve, "RESPAWN_DELAY", 0.01)
+    monkeypatch.setattr(serve, "MAX_QUICK_CRASHES", 2)
+    previous = signal.signal(signal.SIGHUP, reload_catalog)
+    try:
+        serve.serve_prefork(Flask(__name__), port=0, workers=1)
+        assert signal.getsignal(signal.SIGHUP) is reload_catalog
+    finally:
+        signal.signal(signal.SIGHUP, previous)
+
+    err = capfd.readouterr()
+    # El primer hijo y los dos reemplazos se caen; el tercero ya no se lanza.
+    assert err.err.count("RuntimeError: sighup heredado: True") == 3
+    assert "se cayó 3 veces seguidas; no se reemplaza" in err.out
@@ -1,3 +1,5 @@
+import pytest
+
 from movie_recommender_fuzzy.domain.models import Interaction, Movie, Session
 from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
 from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
@@ -66,3 +68,139 @@ def test_session_flow_marks_completion():
 
     # No more movies should be served once completed.
     assert service.get_next_movie(session.id) is None
+
+
+def test_register_decisions_matches_per_row_path():
+    service, session_repo, interaction_repo = build_service_with_movies()
+    session = service.start_session(user_id=7, target_ratings=2)
+
+    stored = service.register_decisions(
+        session.id,
+        [
+            (1, Interaction.NOT_SEEN, None),
+            (99, Interaction.LIKE, None),  # película desconocida: se descarta
+            (2, Interaction.LIKE, None),
+            (3, Interaction.DISLIKE, 2),
+            (1, Interaction.LIKE, None),  # sesión ya completada: no se registra
+        ],
+    )
+
+    assert [interaction.movie_id for interaction in stored] == [1, 2, 3]
+    assert [interaction.id for interaction in stored] == [1, 2, 3]
+    assert interaction_repo.list_movie_ids_by_session(session.id) == [1, 2, 3]
+    assert len(interaction_repo.list_by_user(7)) == 3
+
+    updated = session_repo.get(session.id)
+    assert updated.valid_ratings_count == 2
+    assert updated.status == Session.COMPLETED
+    assert service.register_decisions(session.id, [(1, Interaction.LIKE, None)]) == []
+
+
+def test_register_decisions_validates_the_whole_batch_and_keeps_time_order():
+    service, _session_repo, interaction_repo = build_service_with_movies()
+    session = service.start_session(user_id=7, target_ratings=10)
+
+    for bad_row in [(3, "MAYBE", None), (3, Interaction.LIKE, 6)]:
+        with pytest.raises(ValueError):
+            service.register_decisions(session.id, [(1, Interaction.LIKE, None), bad_row])
+    assert interaction_repo.list_by_session(session.id) == []
+
+    stored = service.register_decisions(session.id, [(3, Interaction.LIKE, None), (1, Interaction.DISLIKE, None)])
+    later = service.register_decision(session.id, 2, Interaction.LIKE)
+    rows = stored + [later]
+    assert [row.id for row in rows] == sorted(row.id for row in rows)
+    assert all(first.timestamp < second.timestamp for first, second in zip(rows, rows[1:]))
+
+
+def _seeded_service(seed):
+    db = InMemoryDB()
+    movie_repo = MovieRepository(db)
+    movie_repo.add_movies(
+        Movie(
+            id=i,
+            title=f"M{i}",
+            year=2000,
+            genres=["drama" if i % 2 else "comedy"],
+            popularity=float(i),
+            is_top_100=True,
+        )
+        for i in range(1, 31)
+    )
+    service = SessionService(SessionRepository(db), InteractionRepository(db), movie_repo, seed=seed)
+    return service, movie_repo
+
+
+def _swipe_all(service, session_id, filters=None):
+    order = []
+    while True:
+        movie = service.get_next_movie(session_id, filters=filters)
+        if movie is None:
+            return order
+        order.append(movie.id)
+        service.register_decision(session_id, movie.id, Interaction.NOT_SEEN)
+
+
+def test_candidate_pool_is_reproducible_and_never_repeats():
+    first, _ = _seeded_service(seed=3)
+    second, _ = _seeded_service(seed=3)
+    order_a = _swipe_all(first, first.start_session(user_id=1, target_ratings=50).id)
+    order_b = _swipe_all(second, second.start_session(user_id=1, target_ratings=50).id)
+
+    assert order_a == order_b
+    assert sorted(order_a) == list(range(1, 31))
+    assert order_a != list(range(1, 31))
+
+
+def test_candidate_pool_is_rebuilt_on_filter_or_catalog_change():
+    service, movie_repo = _seeded_service(seed=1)
+    session = service.start_session(user_id=1, target_ratings=50)
+
+    shown = service.get_next_movie(session.id)
+    assert service.get_next_movie(session.id) == shown  # sin decisión se mantiene la misma
+    service.register_decision(session.id, shown.id, Interaction.LIKE)
+
+    dramas = _swipe_all(service, session.id, filters={"genres": ["Drama"]})
+    assert all(movie_id % 2 for movie_id in dramas) and shown.id not in dramas
+
+    movie_repo.add_movie(Movie(id=31, title="Nueva", year=2024, genres=["drama"], popularity=99.0, is_top_100=True))
+    assert service.get_next_movie(session.id, filters={"genres": ["drama"]}).id == 31
+
+
+def test_abandoned_session_pools_are_bounded_and_rebuilt_on_return():
+    service, _ = _seeded_service(seed=2)
+    service.MAX_CACHED_SESSIONS = 2
+    sessions = [service.start_session(user_id=1, target_ratings=50) for _ in range(3)]
+    first = service.get_next_movie(sessions[0].id)
+    service.register_decision(sessions[0].id, first.id, Interaction.LIKE)
+    for session in sessions[1:]:
+        service.get_next_movie(session.id)
+
+    assert len(service._pools) == 2 and len(service._rngs) == 2
+    # La sesión desalojada vuelve: su pool se rearma sin repetir lo ya valorado.
+    assert first.id not in _swipe_all(service, sessions[0].id)
+
+
+def test_information_gain_strategy_explores_unrated_genres_first():
+    db = InMemoryDB()
+    movie_repo = MovieRepository(db)
+    genres = ["drama", "comedy", "horror"]
+    movie_repo.add_movies(
+        Movie(id=i, title=f"M{i}", year=2000, genres=[genres[i % 3]], popularity=float(i), is_top_100=True)
+        for i in range(1, 13)
+    )
+    service = SessionService(
+        SessionRepository(db), InteractionRepository(db), movie_repo, seed=5, strategy="information_gain"
+    )
+    session = service.start_session(user_id=1, target_ratings=50)
+
+    seen_genres = []
+    for _ in range(3):
+        movie = service.get_next_movie(session.id)
+        seen_genres.append(movie.genres[0])
+        service.register_decision(session.id, movie.id, Interaction.LIKE)
+    assert sorted(seen_genres) == sorted(genres)
+
+    # El género recién valorado pasa a ser el mejor conocido y deja de priorizarse.
+    rated = service.get_next_movie(session.id)
+    service.register_decision(session.id, rated.id, Interaction.DISLIKE)
+    assert service.get_next_movie(session.id).genres != rated.genres
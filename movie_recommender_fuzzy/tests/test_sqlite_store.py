@@ -0,0 +1,101 @@
+import threading
+
+from movie_recommender_fuzzy.domain.models import Interaction, Movie, Session
+from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.db_sqlite import SQLiteDB
+from movie_recommender_fuzzy.infra.interaction_repository import SQLiteInteractionRepository
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.infra.session_repository import SQLiteSessionRepository
+from movie_recommender_fuzzy.services.session_service import SessionService
+
+
+def build_worker(db_path, movies):
+    """Un "worker": catálogo propio en memoria y sesiones en el SQLite compartido."""
+    movie_repo = MovieRepository(InMemoryDB())
+    movie_repo.add_movies(movies)
+    shared = SQLiteDB(db_path)
+    session_repo = SQLiteSessionRepository(shared)
+    interaction_repo = SQLiteInteractionRepository(shared)
+    return SessionService(session_repo, interaction_repo, movie_repo, seed=7), session_repo, interaction_repo
+
+
+def sample_movies():
+    return [
+        Movie(id=i, title=f"Movie {i}", year=2000 + i, genres=["Drama"], rating=7.0, popularity=0.5, is_top_100=True)
+        for i in range(1, 11)
+    ]
+
+
+def test_sqlite_repositories_roundtrip(tmp_path):
+    _service, session_repo, interaction_repo = build_worker(tmp_path / "sessions.db", sample_movies())
+    session = session_repo.create(user_id=3, target_ratings=4)
+    interaction = Interaction(
+        id=interaction_repo.next_id(), user_id=3, movie_id=5, session_id=session.id, decision=Interaction.LIKE
+    )
+    interaction_repo.add(interaction)
+
+    stored = session_repo.get(session.id)
+    assert stored.user_id == 3 and stored.target_ratings == 4
+    assert stored.started_at == session.started_at
+    assert interaction_repo.get(interaction.id) == interaction
+    assert interaction_repo.list_movie_ids_by_session(session.id) == [5]
+    assert interaction_repo.count_by_session(session.id) == 1
+    assert session_repo.create(user_id=3).id != session.id
+
+
+def test_workers_share_sessions_and_decisions(tmp_path):
+    movies = sample_movies()
+    first, _sessions, _interactions = build_worker(tmp_path / "sessions.db", movies)
+    second, session_repo, _interactions = build_worker(tmp_path / "sessions.db", movies)
+
+    session = first.start_session(user_id=1, target_ratings=3)
+    # El mismo orden en ambos workers: la mezcla depende solo de la semilla y la sesión.
+    assert second.get_next_movie(session.id).id == first.get_next_movie(session.id).id
+
+    movie = first.get_next_movie(session.id)
+    first.register_decision(session.id, movie.id, Interaction.LIKE)
+    # El otro worker ve la decisión y no vuelve a ofrecer esa película.
+    assert second.get_next_movie(session.id).id != movie.id
+    assert session_repo.get(session.id).valid_ratings_count == 1
+
+    for _ in range(2):
+        second.register_decision(session.id, second.get_next_movie(session.id).id, Interaction.DISLIKE)
+    assert session_repo.get(session.id).status == Session.COMPLETED
+
+
+def test_concurrent_decisions_do_not_lose_session_count_updates(tmp_path):
+    movies = sample_movies()
+    workers = [build_worker(tmp_path / "sessions.db", movies)[0] for _ in range(2)]
+    session = workers[0].start_session(user_id=1, target_ratings=len(movies))
+    _service, session_repo, _interactions = build_worker(tmp_path / "sessions.db", movies)
+
+    def register(worker, movie_id):
+        worker.register_decision(session.id, movie_id, Interaction.LIKE)
+
+    threads = [
+        threading.Thread(target=register, args=(workers[movie.id % 2], movie.id)) for movie in movies
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stored = session_repo.get(session.id)
+    assert stored.valid_ratings_count == len(movies)
+    assert stored.status == Session.COMPLETED and stored.finished_at is not None
+
+
+def test_batch_decisions_reserve_ids_and_insert_in_one_step(tmp_path):
+    movies = sample_movies()
+    first, session_repo, interaction_repo = build_worker(tmp_path / "sessions.db", movies)
+    second, _sessions, _interactions = build_worker(tmp_path / "sessions.db", movies)
+    session = first.start_session(user_id=1, target_ratings=3)
+
+    single = second.register_decision(session.id, 1, Interaction.NOT_SEEN)
+    stored = first.register_decisions(
+        session.id, [(2, Interaction.LIKE, None), (3, Interaction.DISLIKE, None), (4, Interaction.LIKE, 5)]
+    )
+
+    assert [interaction.id for interaction in stored] == [single.id + 1, single.id + 2, single.id + 3]
+    assert interaction_repo.list_by_session(session.id) == [single] + stored
+    assert session_repo.get(session.id).status == Session.COMPLETED
@@ -0,0 +1,23 @@
+from movie_recommender_fuzzy.domain.models import Movie
+from movie_recommender_fuzzy.services.swipe_simulation import compare_strategies, make_users, swipes_to_stable
+
+
+def test_swipes_to_stable_counts_until_top_stops_changing():
+    assert swipes_to_stable([(1, 2), (1, 3), (3, 4), (3, 4)], min_overlap=1.0) == 3
+    assert swipes_to_stable([(1, 2), (1, 3), (3, 4), (3, 4)], min_overlap=0.5) == 2
+
+
+def test_simulation_reports_every_strategy():
+    genres = ["drama", "comedy", "horror", "action"]
+    movies = [
+        Movie(id=i, title=f"M{i}", year=2000, genres=[genres[i % 4]], rating=6.0, is_top_100=i <= 16)
+        for i in range(1, 25)
+    ]
+    users = make_users(genres, count=2, seed=1)
+
+    report = compare_strategies(movies, users, max_swipes=6, k=3, checkpoints=(3, 6))
+
+    assert set(report) == {"random", "information_gain"}
+    for summary in report.values():
+        assert 1 <= summary["swipes_mean"] <= 6
+        assert 0.0 <= summary["like_rate@6"] <= 1.0
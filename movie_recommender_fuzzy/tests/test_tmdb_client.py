@@ -0,0 +1,109 @@
+import time
+
+from movie_recommender_fuzzy.infra.tmdb_cache import ResponseCache
+from movie_recommender_fuzzy.infra.tmdb_client import TMDbClient, TokenBucket
+from movie_recommender_fuzzy.infra.tmdb_loader import fetch_catalog
+from movie_recommender_fuzzy.tests.tmdb_stub import StubTMDb
+
+
+def timed_fetch(stub, max_workers):
+    client = TMDbClient(api_key="test", max_workers=max_workers, base_url=stub.base_url)
+    started = time.perf_counter()
+    movies = fetch_catalog(api_key="test", total=200, top_limit=60, client=client)
+    elapsed = time.perf_counter() - started
+    client.close()
+    return movies, elapsed
+
+
+def test_concurrent_fetch_keeps_order_and_dedup_and_is_faster():
+    with StubTMDb(delay=0.05) as stub:
+        sequential, sequential_time = timed_fetch(stub, max_workers=1)
+        concurrent, concurrent_time = timed_fetch(stub, max_workers=8)
+
+    assert concurrent == sequential
+    ids = [movie["id"] for movie in concurrent]
+    # discover se solapa con el top (ids 51-60): se descartan sin alterar el orden.
+    assert ids == list(range(1, 191))
+    assert all(movie["is_top_100"] for movie in concurrent[:60])
+    # 1 página de géneros + 3 top + 7 discover: en paralelo debería tardar bastante menos.
+    assert concurrent_time < sequential_time / 2
+
+
+def test_pages_are_not_requested_beyond_the_consumer():
+    with StubTMDb() as stub:
+        client = TMDbClient(api_key="test", max_workers=4, base_url=stub.base_url)
+        first = next(iter(client.get_popular(pages=50)))
+        client.close()
+
+    assert first["id"] == 51
+    assert len(stub.requests) <= 4
+
+
+def test_rate_limited_responses_are_retried_and_counted():
+    with StubTMDb(fail_statuses=[429, 429, 503], retry_after="0.01") as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url, backoff_base=0.01)
+        movies = fetch_catalog(api_key="test", total=40, top_limit=20, client=client)
+        stats = client.stats.as_dict()
+        client.close()
+
+    assert [movie["id"] for movie in movies] == list(range(1, 21)) + list(range(51, 71))
+    assert stats["throttled"] == 2
+    assert stats["retries"] == 3
+    assert stats["failures"] == 0
+    assert stats["requests"] == 3 + 3
+
+
+def test_token_bucket_limits_request_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    # La primera petición sale del burst; las 5 restantes esperan 1/50 s cada una.
+    assert time.perf_counter() - started >= 0.09
+
+
+def test_response_cache_serves_warm_runs_and_revalidates_with_etag(tmp_path):
+    cache_path = tmp_path / "tmdb.sqlite"
+
+    def run(stub, ttl):
+        client = TMDbClient(
+            api_key="secret", base_url=stub.base_url, cache=ResponseCache(cache_path, ttl_seconds=ttl)
+        )
+        movies = fetch_catalog(api_key="secret", total=40, top_limit=20, client=client)
+        client.close()
+        return movies, client.stats
+
+    with StubTMDb() as stub:
+        cold, cold_stats = run(stub, ttl=3600)
+        warm, warm_stats = run(stub, ttl=3600)
+        stale, stale_stats = run(stub, ttl=0)
+
+    assert cold == warm == stale
+    assert (cold_stats.requests, warm_stats.requests, warm_stats.cache_hits) == (3, 0, 3)
+    assert (stale_stats.requests, stale_stats.revalidated) == (3, 3)
+    # La API key no forma parte de la clave de caché.
+    assert ResponseCache.key("/movie/popular", {"page": 1, "api_key": "secret"}) == ResponseCache.key(
+        "/movie/popular", {"page": 1}
+    )
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path / "tmdb.sqlite", max_bytes=600)
+    payload = {"results": [str(i) * 40 for i in range(20)]}
+    for page in range(1, 6):
+        cache.put(cache.key("/movie/popular", {"page": page}), {**payload, "page": page})
+    assert cache.get(cache.key("/movie/popular", {"page": 1})) is None
+    assert cache.get(cache.key("/movie/popular", {"page": 5})).body["page"] == 5
+    assert cache.size_bytes() <= 600
+    cache.close()
+
+
+def test_identical_concurrent_requests_are_coalesced():
+    with StubTMDb(delay=0.1) as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url, max_workers=4)
+        details = list(client.iter_movie_details([7, 7, 7, 8]))
+        client.close()
+
+    assert [item["id"] for item in details] == [7, 7, 7, 8]
+    assert len(stub.requests) == 2
+    assert client.stats.coalesced == 2
@@ -0,0 +1,198 @@
+from datetime import date
+
+from movie_recommender_fuzzy.infra.catalog import iter_catalog_items, movie_from_dict
+from movie_recommender_fuzzy.infra.catalog_writer import CatalogWriter
+from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
+from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
+from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
+from movie_recommender_fuzzy.infra.session_repository import SessionRepository
+from movie_recommender_fuzzy.infra.tmdb_client import TMDbClient
+from movie_recommender_fuzzy.infra.tmdb_loader import enrich_catalog, fetch_catalog, refresh_catalog, stream_catalog
+from movie_recommender_fuzzy.services.session_service import SessionService
+from movie_recommender_fuzzy.tests.tmdb_stub import StubTMDb
+
+
+def test_incremental_refresh_only_requests_changed_movies():
+    with StubTMDb() as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url)
+        entries = fetch_catalog(api_key="test", total=200, top_limit=40, client=client)
+        client.close()
+
+    # Catálogo de 200 películas; en TMDb cambiaron 3 del catálogo y 2 ajenas (una con pocos votos).
+    with StubTMDb(changed_ids=[60, 150, 190, 5000, 6000], popularity_bump=0.5, obscure_ids=[6000]) as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url)
+        report = refresh_catalog(entries, client, since=date.today(), top_limit=40)
+        client.close()
+
+    by_id = {entry["id"]: entry for entry in entries}
+    assert report.checked == 3 and report.candidates == 2
+    assert [by_id[movie_id]["popularity"] for movie_id in (60, 150, 190)] == [60.5, 150.5, 190.5]
+    assert by_id[61]["popularity"] == 61.0
+    # 1 feed de cambios + 1 géneros + 2 páginas de top + 5 detalles.
+    assert len(stub.requests) == 9
+    # La nueva entra con los datos del detalle; la de pocos votos queda afuera.
+    assert report.added == 1 and report.top_changed == 0 and len(entries) == 201
+    assert 6000 not in by_id
+    assert by_id[5000]["genres"] == ["Action"] and by_id[5000]["duration_minutes"] == 120
+    assert by_id[5000]["is_top_100"] is False
+
+
+def test_refresh_keeps_movies_deleted_on_tmdb_and_continues():
+    with StubTMDb() as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url)
+        entries = fetch_catalog(api_key="test", total=200, top_limit=40, client=client)
+        client.close()
+
+    with StubTMDb(changed_ids=[60, 150, 190], popularity_bump=0.5, missing_ids=[150]) as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url, max_workers=4)
+        report = refresh_catalog(entries, client, since=date.today(), top_limit=40)
+        client.close()
+
+    by_id = {entry["id"]: entry for entry in entries}
+    assert report.checked == 3 and report.missing == 1
+    assert [by_id[movie_id]["popularity"] for movie_id in (60, 150, 190)] == [60.5, 150.0, 190.5]
+
+
+class Crash(Exception):
+    pass
+
+
+def test_enrichment_fills_durations_and_resumes_from_checkpoint(tmp_path):
+    checkpoint = tmp_path / "movies.json.enrich.jsonl"
+    with StubTMDb() as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url, max_workers=4)
+        entries = fetch_catalog(api_key="test", total=60, top_limit=20, client=client)
+
+        def crash_after_25(done, _total):
+            if done == 25:
+                raise Crash()
+
+        try:
+            enrich_catalog(entries, client, checkpoint_path=checkpoint, progress=crash_after_25)
+        except Crash:
+            pass
+        client.close()
+
+    fresh = [dict(entry, duration_minutes=None) for entry in entries]
+    with StubTMDb() as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url, max_workers=4)
+        report = enrich_catalog(fresh, client, checkpoint_path=checkpoint)
+        client.close()
+
+    assert report.resumed == 25
+    assert report.requested == 35 == len(stub.requests)
+    assert report.with_runtime == 60
+    assert all(entry["duration_minutes"] == 80 + entry["id"] % 80 for entry in fresh)
+
+    # Con duraciones cargadas el filtro de duración de la sesión vuelve a tener candidatas.
+    db = InMemoryDB()
+    movie_repo = MovieRepository(db)
+    movie_repo.add_movies(movie_from_dict(entry) for entry in fresh)
+    service = SessionService(SessionRepository(db), InteractionRepository(db), movie_repo)
+    session = service.start_session(user_id=1)
+    movie = service.get_next_movie(session.id, filters={"genres": [], "duration": "short"})
+    assert movie is not None and movie.duration_minutes < 100
+
+
+def test_enrichment_records_movies_deleted_on_tmdb_and_finishes(tmp_path):
+    checkpoint = tmp_path / "movies.json.enrich.jsonl"
+    with StubTMDb() as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url)
+        entries = fetch_catalog(api_key="test", total=30, top_limit=10, client=client)
+        client.close()
+
+    with StubTMDb(missing_ids=[7]) as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url, max_workers=4)
+        report = enrich_catalog(entries, client, checkpoint_path=checkpoint)
+        client.close()
+    assert report.requested == 30 and report.missing == 1 and report.with_runtime == 29
+    assert next(entry for entry in entries if entry["id"] == 7)["duration_minutes"] is None
+
+    # Al relanzar, la borrada sale del checkpoint: no se vuelve a pedir.
+    fresh = [dict(entry, duration_minutes=None) for entry in entries]
+    with StubTMDb(missing_ids=[7]) as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url)
+        report = enrich_catalog(fresh, client, checkpoint_path=checkpoint)
+        client.close()
+    assert report.resumed == 30 and report.requested == 0 and not stub.requests
+
+
+class CrashingWriter(CatalogWriter):
+    def __init__(self, target_path, crash_at):
+        super().__init__(target_path)
+        self.crash_at = crash_at
+
+    def checkpoint(self, state):
+        if state and state.get("stage") == "discover" and state.get("page") == self.crash_at:
+            raise Crash()
+        super().checkpoint(state)
+
+
+def test_streaming_writer_resumes_from_last_page_and_publishes_atomically(tmp_path):
+    target = tmp_path / "movies.json"
+    with StubTMDb() as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url)
+        expected = fetch_catalog(api_key="test", total=200, top_limit=40, client=client)
+        try:
+            stream_catalog(CrashingWriter(target, crash_at=4), client, total=200, top_limit=40)
+        except Crash:
+            pass
+        client.close()
+    assert not target.exists()
+
+    with StubTMDb() as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url)
+        written = stream_catalog(CatalogWriter(target), client, total=200, top_limit=40)
+        client.close()
+
+    # Solo se piden géneros y las páginas de discover posteriores a la última confirmada (3).
+    assert [path.split("?")[0] for path in stub.requests] == ["/genre/movie/list"] + ["/discover/movie"] * 5
+    assert "page=4" in stub.requests[1]
+    assert written == len(expected) == 200
+    assert list(iter_catalog_items(target)) == expected
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["movies.json"]
+
+
+class RecordingWriter(CatalogWriter):
+    def __init__(self, target_path, crash_at=None):
+        super().__init__(target_path)
+        self.crash_at = crash_at
+        self.pages = []
+        self._pending = []
+
+    def write_all(self, entries):
+        self._pending.extend(entry["id"] for entry in entries)
+        super().write_all(entries)
+
+    def checkpoint(self, state):
+        if state and state.get("stage") == "discover" and state.get("page") == self.crash_at:
+            raise Crash()
+        super().checkpoint(state)
+        self.pages.append((state, self._pending))
+        self._pending = []
+
+
+def test_streaming_checkpoints_follow_tmdb_page_numbers_with_short_pages(tmp_path):
+    target = tmp_path / "movies.json"
+    # La página 2 de discover trae 10 resultados (71..80); la 3 arranca en 91.
+    with StubTMDb(short_pages=[2]) as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url)
+        expected = fetch_catalog(api_key="test", total=200, top_limit=40, client=client)
+        writer = RecordingWriter(target, crash_at=4)
+        try:
+            stream_catalog(writer, client, total=200, top_limit=40)
+        except Crash:
+            pass
+        client.close()
+
+    discover = {state["page"]: ids for state, ids in writer.pages if state and state["stage"] == "discover"}
+    assert discover[2] == list(range(71, 81))
+    assert discover[3] == list(range(91, 111))
+
+    with StubTMDb(short_pages=[2]) as stub:
+        client = TMDbClient(api_key="test", base_url=stub.base_url)
+        stream_catalog(CatalogWriter(target), client, total=200, top_limit=40)
+        client.close()
+
+    assert "page=4" in stub.requests[1]
+    assert list(iter_catalog_items(target)) == expected
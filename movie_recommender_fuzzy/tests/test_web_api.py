@@ -0,0 +1,313 @@
+import json
+import os
+import signal
+import threading
+import time
+
+from movie_recommender_fuzzy.domain.models import Interaction
+from movie_recommender_fuzzy.web.app import create_app, install_catalog_reload
+
+
+def _write_catalog(path, count=30):
+    genres = ["Drama", "Comedy", "Action"]
+    movies = [
+        {
+            "id": i,
+            "title": f"Movie {i}",
+            "year": 2000 + i % 20,
+            "genres": [genres[i % 3]],
+            "popularity": float(i),
+            "rating": 5 + i % 5,
+            "is_top_100": True,
+        }
+        for i in range(1, count + 1)
+    ]
+    path.write_text(json.dumps(movies), encoding="utf-8")
+
+
+def test_prefetch_and_batch_submit_warm_results(tmp_path):
+    catalog = tmp_path / "movies.json"
+    _write_catalog(catalog)
+    app = create_app(data_path=catalog, lazy=False)
+    client = app.test_client()
+    client.get("/start")
+
+    batch = client.get("/api/swipe/next?count=6").get_json()
+    assert len(batch["movies"]) == 6
+    assert batch["progress"]["results_available"] is False
+    # La primera película precargada es la misma que mostraría /swipe.
+    assert f"Movie {batch['movies'][0]['id']}" in client.get("/swipe").get_data(as_text=True)
+
+    decisions = [{"movie_id": movie["id"], "decision": "LIKE"} for movie in batch["movies"][:5]]
+    decisions.append({"movie_id": batch["movies"][5]["id"], "decision": "NOT_SEEN", "score": 4})
+    response = client.post("/api/swipe/decisions", json={"decisions": decisions, "prefetch": 3}).get_json()
+
+    assert response["registered"] == 6
+    assert response["progress"]["current"] == 5 and response["progress"]["results_available"]
+    assert len(response["movies"]) == 3
+    assert not {movie["id"] for movie in response["movies"]} & {movie["id"] for movie in batch["movies"]}
+
+    # El cálculo quedó lanzado con el lote; /results reutiliza ese mismo resultado.
+    warmer = app.extensions["recommendation_warmer"]
+    with client.session_transaction() as flask_session:
+        session_id, filters = flask_session["session_id"], flask_session["filters"]
+    warmed = warmer.warm(user_id=1, session_id=session_id, filters=filters)
+    warmed.result(timeout=10)
+    assert client.get("/results").status_code == 200
+    assert warmer.warm(user_id=1, session_id=session_id, filters=filters) is warmed
+
+    bad = client.post("/api/swipe/decisions", json={"decisions": [{"movie_id": 1, "decision": "MAYBE"}]})
+    assert bad.status_code == 400
+    for score in (0, 6):
+        out_of_range = [{"movie_id": response["movies"][0]["id"], "decision": "LIKE", "score": score}]
+        assert client.post("/api/swipe/decisions", json={"decisions": out_of_range}).status_code == 400
+    for body in ([decisions], "LIKE", 3):
+        assert client.post("/api/swipe/decisions", json=body).status_code == 400
+    assert client.get("/api/swipe/next?count=1").get_json()["progress"]["current"] == 5
+
+
+def test_warmer_forgets_completed_sessions_and_caps_its_entries(tmp_path):
+    catalog = tmp_path / "movies.json"
+    _write_catalog(catalog)
+    app = create_app(data_path=catalog, lazy=False)
+    warmer = app.extensions["recommendation_warmer"]
+    client = app.test_client()
+    client.get("/start")
+
+    movies = client.get("/api/swipe/next?count=20").get_json()["movies"]
+    decisions = [{"movie_id": movie["id"], "decision": "LIKE"} for movie in movies]
+    response = client.post("/api/swipe/decisions", json={"decisions": decisions, "prefetch": 0}).get_json()
+    assert response["progress"]["completed"]
+    with client.session_transaction() as flask_session:
+        session_id = flask_session["session_id"]
+    assert session_id in warmer._entries
+
+    assert client.get("/results").status_code == 200
+    assert session_id not in warmer._entries
+
+    warmer.MAX_ENTRIES = 2
+    for other in (101, 102, 103):
+        warmer.warm(user_id=1, session_id=other)
+    assert list(warmer._entries) == [102, 103]
+
+
+def test_results_do_not_queue_behind_warm_ups_and_shared_state_invalidates(tmp_path, monkeypatch):
+    catalog = tmp_path / "movies.json"
+    _write_catalog(catalog)
+    monkeypatch.setenv("LONG_TERM_PROFILE_WEIGHT", "0.3")
+    app = create_app(data_path=catalog, lazy=False)
+    warmer = app.extensions["recommendation_warmer"]
+    client = app.test_client()
+    client.get("/start")
+    movies = client.get("/api/swipe/next?count=6").get_json()["movies"]
+    decisions = [{"movie_id": movie["id"], "decision": "LIKE"} for movie in movies[:5]]
+    with client.session_transaction() as flask_session:
+        session_id = flask_session["session_id"]
+
+    # Los dos hilos del pool quedan ocupados: el warm-up del lote espera en la cola.
+    release = threading.Event()
+    timer = threading.Timer(10, release.set)  # si /results esperara a la cola, la prueba no se cuelga
+    timer.start()
+    blockers = [warmer._executor.submit(release.wait) for _ in range(2)]
+    client.post("/api/swipe/decisions", json={"decisions": decisions, "prefetch": 0})
+    queued = warmer._entries[session_id][1]
+    started = time.monotonic()
+    assert client.get("/results").status_code == 200
+    assert time.monotonic() - started < 5
+    assert queued.cancelled()
+    release.set()
+    timer.cancel()
+    for blocker in blockers:
+        blocker.result(timeout=10)
+
+    # Un like en otra sesión cambia el índice de co-likes: lo precalculado ya no sirve.
+    computed = warmer.warm(user_id=1, session_id=session_id)
+    computed.result(timeout=10)
+    assert warmer.warm(user_id=1, session_id=session_id) is computed
+    app.extensions["co_occurrence"].record(
+        [Interaction(id=999, user_id=2, movie_id=movies[5]["id"], session_id=999, decision=Interaction.LIKE)]
+    )
+    recomputed = warmer.warm(user_id=1, session_id=session_id)
+    assert recomputed is not computed
+    recomputed.result(timeout=10)
+
+    # Otra sesión del mismo usuario mueve su perfil de largo plazo (un dislike no toca los co-likes).
+    other = app.test_client()
+    other.get("/start")
+    movie_id = other.get("/api/swipe/next?count=1").get_json()["movies"][0]["id"]
+    other.post("/api/swipe/decisions", json={"decisions": [{"movie_id": movie_id, "decision": "DISLIKE"}]})
+    assert warmer.warm(user_id=1, session_id=session_id) is not recomputed
+
+
+def test_metrics_endpoint_exports_stage_timings(tmp_path, monkeypatch):
+    catalog = tmp_path / "movies.json"
+    _write_catalog(catalog)
+    assert create_app(data_path=catalog, lazy=False).test_client().get("/metrics").status_code == 404
+
+    monkeypatch.setenv("APP_METRICS", "1")
+    app = create_app(data_path=catalog, lazy=False)
+    client = app.test_client()
+    client.get("/start")
+    movies = client.get("/api/swipe/next?count=5").get_json()["movies"]
+    decisions = [{"movie_id": movie["id"], "decision": "LIKE"} for movie in movies]
+    client.post("/api/swipe/decisions", json={"decisions": decisions, "prefetch": 0})
+    with client.session_transaction() as flask_session:
+        session_id, filters = flask_session["session_id"], flask_session["filters"]
+    # Con el warm-up terminado, /results lo reutiliza.
+    app.extensions["recommendation_warmer"].warm(user_id=1, session_id=session_id, filters=filters).result(timeout=10)
+    assert client.get("/results").status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert "# TYPE movie_recs_stage_duration_seconds histogram" in text
+    for stage in ("profile", "catalog", "filtering", "fuzzy_scoring", "sorting", "render", "candidate_pool"):
+        assert f'movie_recs_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert 'movie_recs_http_requests_total{endpoint="results",method="GET",status="200"} 1' in text
+    assert 'movie_recs_recommendation_warm_total{result="hit"}' in text
+    assert app.extensions["metrics"].counter_value("fuzzy_evaluations_total") > 0
+
+
+def test_profiled_request_lands_in_admin_ring_buffer(tmp_path, monkeypatch):
+    catalog = tmp_path / "movies.json"
+    _write_catalog(catalog, count=1000)
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monkeypatch.setenv("PROFILE_BUFFER_SIZE", "2")
+    app = create_app(data_path=catalog, lazy=False)
+    client = app.test_client()
+    client.get("/start")
+    movies = client.get("/api/swipe/next?count=5").get_json()["movies"]
+    decisions = [{"movie_id": movie["id"], "decision": "LIKE"} for movie in movies]
+    client.post("/api/swipe/decisions", json={"decisions": decisions, "prefetch": 0})
+
+    # Sin token válido el header se ignora.
+    client.get("/results", headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+    assert app.extensions["request_profiles"].list() == []
+
+    profiled = {"X-Profile": "1", "X-Admin-Token": "secret"}
+    admin = {"X-Admin-Token": "secret"}
+    # Puntuar invalida lo precalculado: el re-ranking corre mientras se perfila.
+    assert client.post("/results", data={"movie_id": "999", "score": "5"}, headers=profiled).status_code == 200
+    summaries = client.get("/admin/profiles", headers=admin).get_json()
+    assert [summary["path"] for summary in summaries] == ["/results"]
+    assert summaries[0]["trigger"] == "header" and summaries[0]["samples"] > 0
+
+    stacks = client.get(f"/admin/profiles/{summaries[0]['id']}", headers=admin).get_data(as_text=True)
+    assert "recommendation_service:RecommendationService.recommend_movies" in stacks
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks.splitlines())
+
+    for _ in range(2):
+        client.get("/healthz", headers=profiled)
+    # El buffer guarda solo los últimos dos perfiles.
+    assert client.get(f"/admin/profiles/{summaries[0]['id']}", headers=admin).status_code == 404
+    assert client.get("/admin/profiles").status_code == 404
+
+
+def test_load_test_runs_full_flows_without_errors(tmp_path):
+    from movie_recommender_fuzzy.web.load_test import FlaskClientTransport, run_load
+
+    catalog = tmp_path / "movies.json"
+    _write_catalog(catalog, count=200)
+    app = create_app(data_path=catalog, lazy=False)
+
+    report = run_load(lambda: FlaskClientTransport(app), users=3, duration=60, think_time=0, max_flows=1)
+
+    assert report["flows"] == 3 and report["errors"] == 0 and report["error_rate"] == 0.0
+    assert set(report["routes"]) == {"GET /start", "GET /swipe", "POST /swipe", "GET /results"}
+    assert report["routes"]["GET /results"]["requests"] == 3
+    # Cada sesión necesita 20 valoraciones válidas; "No la vi" no cuenta.
+    assert report["routes"]["POST /swipe"]["requests"] >= 60
+
+
+def test_sighup_reload_is_installed_by_entry_points_and_waits_for_warm_up(tmp_path):
+    catalog = tmp_path / "movies.json"
+    _write_catalog(catalog)
+    previous = signal.getsignal(signal.SIGHUP)
+    app = create_app(data_path=catalog, lazy=False)
+    assert signal.getsignal(signal.SIGHUP) is previous
+
+    reloader, ready = app.extensions["catalog_reloader"], app.extensions["catalog_ready"]
+    try:
+        install_catalog_reload(app)
+        ready.clear()  # como si el warm-up siguiera en curso
+        os.kill(os.getpid(), signal.SIGHUP)
+        time.sleep(0.1)
+        assert reloader.last_result is None
+
+        ready.set()
+        os.kill(os.getpid(), signal.SIGHUP)
+        deadline = time.time() + 5
+        while reloader.last_result is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert reloader.last_result is not None and reloader.last_result.mode == "noop"
+    finally:
+        signal.signal(signal.SIGHUP, previous)
+
+
+def test_lazy_start_gates_requests_until_catalog_is_ready(tmp_path, monkeypatch):
+    from movie_recommender_fuzzy.web import app as app_module
+
+    catalog = tmp_path / "movies.json"
+    _write_catalog(catalog)
+    release = threading.Event()
+    real_load = app_module.load_catalog
+
+    def slow_load(path):
+        release.wait(5)
+        return real_load(path)
+
+    monkeypatch.setattr(app_module, "load_catalog", slow_load)
+    app = create_app(data_path=catalog, lazy=True)
+    client = app.test_client()
+
+    warming = client.get("/start")
+    assert warming.status_code == 503 and warming.headers["Retry-After"] == "1"
+    readyz = client.get("/readyz")
+    assert readyz.status_code == 503 and readyz.get_json()["status"] == "warming_up"
+    assert client.get("/healthz").status_code == 200
+
+    release.set()
+    assert app.extensions["catalog_ready"].wait(5)
+    assert client.get("/readyz").status_code == 200
+    assert client.get("/start").status_code == 302
+    assert client.get("/api/swipe/next?count=2").status_code == 200
+
+
+def test_readyz_reports_failed_lazy_catalog_load(tmp_path):
+    app = create_app(data_path=tmp_path / "missing.json", lazy=True)
+    client = app.test_client()
+
+    deadline = time.time() + 5
+    while client.get("/readyz").get_json()["status"] == "warming_up" and time.time() < deadline:
+        time.sleep(0.01)
+    readyz = client.get("/readyz")
+    assert readyz.status_code == 503
+    assert readyz.get_json()["status"] == "error" and readyz.get_json()["error"]
+    assert client.get("/start").status_code == 503
+
+
+def test_admin_catalog_reload_requires_the_token_and_reloads_sync_or_in_background(tmp_path, monkeypatch):
+    catalog = tmp_path / "movies.json"
+    _write_catalog(catalog)
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    app = create_app(data_path=catalog, lazy=False)
+    client = app.test_client()
+    admin = {"X-Admin-Token": "secret"}
+
+    assert client.post("/admin/catalog/reload").status_code == 404
+    assert client.post("/admin/catalog/reload", headers={"X-Admin-Token": "wrong"}).status_code == 404
+
+    _write_catalog(catalog, count=31)
+    response = client.post("/admin/catalog/reload?wait=1", headers=admin)
+    assert response.status_code == 200 and response.get_json()["added"] == 1
+
+    reloader = app.extensions["catalog_reloader"]
+    version = reloader.last_result.catalog_version
+    _write_catalog(catalog, count=32)
+    response = client.post("/admin/catalog/reload", headers=admin)
+    assert response.status_code == 202 and response.get_json() == {"status": "reloading"}
+    deadline = time.monotonic() + 10
+    while reloader.last_result.catalog_version == version and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [movie.id for movie in reloader.last_result.diff.added] == [32]
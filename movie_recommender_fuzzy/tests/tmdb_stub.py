@@ -0,0 +1,138 @@
+"""Servidor HTTP local que imita los endpoints de TMDb usados por el loader."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+GENRES = [{"id": 18, "name": "Drama"}, {"id": 35, "name": "Comedy"}, {"id": 28, "name": "Action"}]
+PAGE_SIZE = 20
+
+
+def _item(movie_id: int, popularity_bump: float = 0.0, vote_count: int = 1000) -> Dict[str, object]:
+    return {
+        "id": movie_id,
+        "title": f"Movie {movie_id}",
+        "release_date": f"{1990 + movie_id % 30}-01-01",
+        "genre_ids": [GENRES[movie_id % 3]["id"]],
+        "popularity": float(movie_id) + popularity_bump,
+        "vote_average": 5 + (movie_id % 5),
+        "vote_count": vote_count,
+        "poster_path": f"/p{movie_id}.jpg",
+    }
+
+
+class StubTMDb:
+    """Sirve páginas deterministas; `delay` simula la latencia de red por petición.
+
+    `top_rated` devuelve ids 1, 2, ...; `discover` arranca en `discover_offset`
+    para que ambos listados se solapen y se ejercite la deduplicación.
+    Los códigos en `fail_statuses` se devuelven, en orden, a las primeras
+    peticiones (con `Retry-After` si se indica) para simular límites de tasa.
+    El detalle de las películas de `missing_ids` responde 404 (borradas en TMDb)
+    y el de `obscure_ids` trae pocos votos. Las páginas de discover en
+    `short_pages` traen la mitad de resultados, como cuando TMDb filtra alguno.
+    """
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        discover_offset: int = 51,
+        fail_statuses: Iterable[int] = (),
+        retry_after: Optional[str] = None,
+        changed_ids: Iterable[int] = (),
+        popularity_bump: float = 0.0,
+        missing_ids: Iterable[int] = (),
+        obscure_ids: Iterable[int] = (),
+        short_pages: Iterable[int] = (),
+    ):
+        self.delay = delay
+        self.discover_offset = discover_offset
+        self.fail_statuses = deque(fail_statuses)
+        self.retry_after = retry_after
+        self.changed_ids = list(changed_ids)
+        self.popularity_bump = popularity_bump
+        self.missing_ids = set(missing_ids)
+        self.obscure_ids = set(obscure_ids)
+        self.short_pages = set(short_pages)
+        self.requests: List[str] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - API de http.server
+                stub._handle(self)
+
+            def log_message(self, *_args) -> None:
+                return
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StubTMDb":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def payload(self, path: str, query: Dict[str, List[str]]) -> Dict[str, object]:
+        if path == "/genre/movie/list":
+            return {"genres": GENRES}
+        page = int(query.get("page", ["1"])[0])
+        if path == "/movie/changes":
+            chunk = self.changed_ids[(page - 1) * 100 : page * 100]
+            total_pages = max(1, -(-len(self.changed_ids) // 100))
+            return {"page": page, "total_pages": total_pages, "results": [{"id": i} for i in chunk]}
+        if path.startswith("/movie/") and path.rsplit("/", 1)[-1].isdigit():
+            movie_id = int(path.rsplit("/", 1)[-1])
+            details = _item(movie_id, self.popularity_bump, vote_count=3 if movie_id in self.obscure_ids else 1000)
+            details["genres"] = [GENRES[movie_id % 3]]
+            details["runtime"] = 80 + movie_id % 80
+            return details
+        start = 1 if path == "/movie/top_rated" else self.discover_offset
+        first = start + (page - 1) * PAGE_SIZE
+        size = PAGE_SIZE // 2 if path == "/discover/movie" and page in self.short_pages else PAGE_SIZE
+        return {
+            "page": page,
+            "results": [_item(movie_id, self.popularity_bump) for movie_id in range(first, first + size)],
+        }
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        parsed = urlparse(handler.path)
+        with self._lock:
+            self.requests.append(handler.path)
+            status = self.fail_statuses.popleft() if self.fail_statuses else 200
+            if parsed.path.rsplit("/", 1)[-1] in {str(movie_id) for movie_id in self.missing_ids}:
+                status = 404
+        if self.delay:
+            time.sleep(self.delay)
+        if status != 200:
+            handler.send_response(status)
+            if self.retry_after is not None:
+                handler.send_header("Retry-After", self.retry_after)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+        body = json.dumps(self.payload(parsed.path, parse_qs(parsed.query))).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if handler.headers.get("If-None-Match") == etag:
+            handler.send_response(304)
+            handler.send_header("ETag", etag)
+            handler.end_headers()
+            return
+        handler.send_response(200)
+        handler.send_header("ETag", etag)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
@@ -1,71 +1,161 @@
 from __future__ import annotations
 
-import json
 import os
+import threading
+import time
+from dataclasses import asdict
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from flask import Flask, redirect, render_template, request, session, url_for
+from flask import Flask, Response, abort, g, jsonify, redirect, render_template, request, session, url_for
 
-from movie_recommender_fuzzy.domain.models import Interaction, Movie
+from movie_recommender_fuzzy.domain.models import Interaction
+from movie_recommender_fuzzy.infra.catalog import catalog_genres, load_catalog
+from movie_recommender_fuzzy.infra.catalog_reload import CatalogReloader
 from movie_recommender_fuzzy.infra.db_memory import InMemoryDB
-from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository
+from movie_recommender_fuzzy.infra.db_sqlite import SQLiteDB
+from movie_recommender_fuzzy.infra.interaction_repository import InteractionRepository, SQLiteInteractionRepository
 from movie_recommender_fuzzy.infra.movie_repository import MovieRepository
-from movie_recommender_fuzzy.infra.session_repository import SessionRepository
-from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyEngine
+from movie_recommender_fuzzy.infra.profile_repository import SQLiteUserProfileRepository, UserProfileRepository
+from movie_recommender_fuzzy.infra.session_repository import SessionRepository, SQLiteSessionRepository
+from movie_recommender_fuzzy.services.co_occurrence import CoOccurrenceIndex, CoOccurrenceRebuilder
+from movie_recommender_fuzzy.services.fuzzy_engine import FuzzyConfig, FuzzyEngine
+from movie_recommender_fuzzy.services.metrics import Metrics
 from movie_recommender_fuzzy.services.preference_service import PreferenceService
 from movie_recommender_fuzzy.services.recommendation_service import RecommendationService
+from movie_recommender_fuzzy.services.recommendation_warmer import RecommendationWarmer
 from movie_recommender_fuzzy.services.session_service import SessionService
+from movie_recommender_fuzzy.web.profiling import ProfileStore, ProfilingMiddleware
 
+# Valoraciones válidas necesarias para ver recomendaciones.
+MIN_FOR_RECS = 5
+# Tope de películas por respuesta en la API de precarga.
+MAX_PREFETCH = 20
+DECISIONS = (Interaction.LIKE, Interaction.DISLIKE, Interaction.NOT_SEEN)
 
-def load_movies(path: Path) -> List[Movie]:
-    """Carga películas desde el JSON generado."""
-    if not path.exists():
-        raise FileNotFoundError(f"No se encontró el catálogo en {path}. Ejecuta el loader TMDb primero.")
-
-    data = json.loads(path.read_text(encoding="utf-8"))
-    movies: List[Movie] = []
-    for item in data:
-        movies.append(
-            Movie(
-                id=int(item["id"]),
-                title=str(item.get("title", "")),
-                year=int(item.get("year", 0)),
-                genres=[g.strip().lower() for g in (item.get("genres") or []) if g],
-                duration_minutes=item.get("duration_minutes"),
-                popularity=float(item.get("popularity", 0.0)),
-                rating=float(item["rating"]) if item.get("rating") is not None else None,
-                poster_url=item.get("poster_url"),
-                is_top_100=bool(item.get("is_top_100", False)),
-            )
-        )
-    return movies
 
+def create_app(
+    data_path: Optional[Path] = None, lazy: Optional[bool] = None, session_db: Optional[Path] = None
+) -> Flask:
+    """Crea la app. Con `lazy` (o `APP_LAZY_START=1`) el catálogo se carga en segundo plano.
 
-def create_app() -> Flask:
+    Con `session_db` (o `SESSION_DB_PATH`) sesiones e interacciones viven en ese
+    archivo SQLite, compartido por todos los procesos que sirven la app; si no,
+    quedan en memoria del proceso. Con `APP_METRICS=1` se mide cada etapa y
+    `/metrics` las exporta en formato Prometheus. Con
+    `LONG_TERM_PROFILE_WEIGHT` (p. ej. 0.3) las recomendaciones mezclan la sesión
+    con el perfil de largo plazo del usuario (al arrancar se reconstruye el de quien
+    tenga historial y todavía no lo tenga). `CO_OCCURRENCE_NEIGHBORS` (50; 0 lo
+    apaga) fija los vecinos por película del índice de co-likes, que se rearma
+    al arrancar con las interacciones guardadas y, con `session_db`, cada
+    `CO_OCCURRENCE_REBUILD_SECONDS` (300; 0 lo apaga) para recoger lo que
+    registraron otros procesos. `FUZZY_CONFIG_PATH`
+    carga conjuntos y pesos del motor difuso (p. ej. los de `fuzzy_tuning`). Con
+    `ADMIN_TOKEN` o `PROFILE_SAMPLE_RATE` se pueden perfilar peticiones puntuales
+    (ver `web/profiling.py`).
+    """
     app = Flask(__name__)
     app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret")
 
-    data_path = Path(__file__).resolve().parents[2] / "movie_recommender_fuzzy" / "data" / "movies.json"
-    movies = load_movies(data_path)
+    if data_path is None:
+        data_path = Path(__file__).resolve().parents[2] / "movie_recommender_fuzzy" / "data" / "movies.json"
+    if lazy is None:
+        lazy = os.getenv("APP_LAZY_START", "") in ("1", "true")
+
+    if session_db is None and os.getenv("SESSION_DB_PATH"):
+        session_db = Path(os.environ["SESSION_DB_PATH"])
+
+    metrics = Metrics(enabled=os.getenv("APP_METRICS", "") in ("1", "true"))
+    app.extensions["metrics"] = metrics
 
     db = InMemoryDB()
     movie_repo = MovieRepository(db)
-    movie_repo.add_movies(movies)
-    session_repo = SessionRepository(db)
-    interaction_repo = InteractionRepository(db)
+    if session_db is not None:
+        shared_db = SQLiteDB(session_db)
+        session_repo = SQLiteSessionRepository(shared_db)
+        interaction_repo = SQLiteInteractionRepository(shared_db)
+        profile_repo = SQLiteUserProfileRepository(shared_db)
+    else:
+        session_repo = SessionRepository(db)
+        interaction_repo = InteractionRepository(db)
+        profile_repo = UserProfileRepository(db)
+
+    # Índices derivados del catálogo; se reconstruyen en cada swap de recarga.
+    catalog_state = {"genres": [], "error": None}
+    ready = threading.Event()
+
+    def on_catalog_swap(new_catalog, _result) -> None:
+        catalog_state["genres"] = catalog_genres(new_catalog)
+
+    def warm_up() -> None:
+        try:
+            catalog = load_catalog(data_path)
+            genres = catalog_genres(catalog)
+        except (OSError, ValueError) as exc:
+            catalog_state["error"] = str(exc)
+            if not lazy:
+                raise
+            return
+        movie_repo.swap_catalog(catalog)
+        catalog_state["genres"] = genres
+        # Usuarios con historial previo a activar el perfil de largo plazo.
+        preference_service.backfill_long_term_profiles()
+        # El índice de co-likes vive en memoria: se rearma con el historial guardado.
+        if co_occurrence is not None:
+            co_occurrence.record(interaction_repo.iter_all())
+        ready.set()
+
+    app.extensions["catalog_ready"] = ready
 
-    all_genres = sorted({genre for movie in movies for genre in movie.genres})
+    # SIGHUP y el vigilante de archivo los activan los puntos de entrada
+    # (`install_catalog_reload`), no la fábrica.
+    reloader = CatalogReloader(movie_repo, data_path, on_swap=on_catalog_swap)
+    app.extensions["catalog_reloader"] = reloader
 
-    session_service = SessionService(session_repo, interaction_repo, movie_repo)
-    preference_service = PreferenceService(interaction_repo, movie_repo)
-    fuzzy_engine = FuzzyEngine()
+    neighbors = int(os.getenv("CO_OCCURRENCE_NEIGHBORS", "50") or 0)
+    co_occurrence = CoOccurrenceIndex(neighbors=neighbors) if neighbors > 0 else None
+    app.extensions["co_occurrence"] = co_occurrence
+    # En memoria no hay otros procesos que escriban: el índice nunca se desfasa.
+    rebuild_seconds = float(os.getenv("CO_OCCURRENCE_REBUILD_SECONDS", "300") or 0) if session_db is not None else 0
+    co_rebuilder = (
+        CoOccurrenceRebuilder(co_occurrence, interaction_repo.iter_all, rebuild_seconds)
+        if co_occurrence is not None and rebuild_seconds > 0
+        else None
+    )
+    app.extensions["co_occurrence_rebuilder"] = co_rebuilder
+    long_term_weight = float(os.getenv("LONG_TERM_PROFILE_WEIGHT", "0") or 0)
+    preference_service = PreferenceService(
+        interaction_repo,
+        movie_repo,
+        metrics=metrics,
+        profile_repository=profile_repo if long_term_weight > 0 else None,
+        long_term_weight=long_term_weight,
+    )
+    if lazy:
+        threading.Thread(target=warm_up, name="catalog-warmup", daemon=True).start()
+    else:
+        warm_up()
+    session_service = SessionService(
+        session_repo,
+        interaction_repo,
+        movie_repo,
+        strategy=os.getenv("SWIPE_STRATEGY", "random"),
+        metrics=metrics,
+        preference_service=preference_service,
+        co_occurrence=co_occurrence,
+    )
+    fuzzy_config_path = os.getenv("FUZZY_CONFIG_PATH")
+    fuzzy_engine = FuzzyEngine(FuzzyConfig.load(Path(fuzzy_config_path)) if fuzzy_config_path else None)
     recommendation_service = RecommendationService(
         movie_repository=movie_repo,
         interaction_repository=interaction_repo,
         preference_service=preference_service,
         fuzzy_engine=fuzzy_engine,
+        metrics=metrics,
+        co_occurrence=co_occurrence,
     )
+    warmer = RecommendationWarmer(recommendation_service, interaction_repo, movie_repo, metrics=metrics)
+    app.extensions["recommendation_warmer"] = warmer
 
     def get_session_id() -> Optional[int]:
         raw = session.get("session_id")
@@ -74,11 +164,93 @@ def create_app() -> Flask:
         except (TypeError, ValueError):
             return None
 
+    def render(template: str, **context) -> str:
+        with metrics.stage("render"):
+            return render_template(template, **context)
+
+    if metrics.enabled:
+
+        @app.before_request
+        def start_timer():
+            g.request_started = time.perf_counter()
+
+        @app.after_request
+        def record_request(response):
+            started = g.pop("request_started", None)
+            endpoint = request.endpoint or "unknown"
+            status = str(response.status_code)
+            metrics.inc("http_requests_total", endpoint=endpoint, method=request.method, status=status)
+            if started is not None:
+                metrics.observe("http_request_duration_seconds", time.perf_counter() - started, endpoint=endpoint)
+            return response
+
+    @app.before_request
+    def require_ready():
+        if ready.is_set() or request.endpoint in ("healthz", "readyz", "metrics", "static"):
+            return None
+        return jsonify({"status": "warming_up"}), 503, {"Retry-After": "1"}
+
+    if co_rebuilder is not None:
+
+        @app.before_request
+        def rebuild_co_likes():
+            if ready.is_set():
+                co_rebuilder.maybe_rebuild()
+
+    @app.route("/healthz")
+    def healthz():
+        return jsonify({"status": "ok"})
+
+    @app.route("/readyz")
+    def readyz():
+        if ready.is_set():
+            return jsonify({"status": "ready", "catalog_version": movie_repo.catalog_version()})
+        status = "error" if catalog_state["error"] else "warming_up"
+        return jsonify({"status": status, "error": catalog_state["error"]}), 503
+
+    def current_filters() -> dict:
+        return session.get("filters", {"genres": [], "duration": ""})
+
+    def warm_recommendations(current_session) -> None:
+        """Con suficientes valoraciones, deja calculando `/results` en segundo plano."""
+        if current_session.valid_ratings_count >= MIN_FOR_RECS:
+            warmer.warm(
+                user_id=1, session_id=current_session.id, k=10, include_breakdown=True, filters=current_filters()
+            )
+
+    def progress_payload(current_session) -> dict:
+        return {
+            "current": current_session.valid_ratings_count,
+            "target": current_session.target_ratings,
+            "completed": current_session.is_completed(),
+            "results_available": current_session.valid_ratings_count >= MIN_FOR_RECS,
+        }
+
+    def parse_decisions(payload: object) -> Optional[List[Tuple[int, str, Optional[int]]]]:
+        """Valida `[{"movie_id", "decision", "score"?}, ...]`; devuelve None si algo no es válido."""
+        if not isinstance(payload, list):
+            return None
+        decisions: List[Tuple[int, str, Optional[int]]] = []
+        for item in payload:
+            if not isinstance(item, dict) or item.get("decision") not in DECISIONS:
+                return None
+            try:
+                movie_id = int(item["movie_id"])
+                score = int(item["score"]) if item.get("score") is not None else None
+            except (KeyError, TypeError, ValueError):
+                return None
+            if item["decision"] == Interaction.NOT_SEEN:
+                score = None
+            if score is not None and not 1 <= score <= 5:
+                return None
+            decisions.append((movie_id, item["decision"], score))
+        return decisions
+
     @app.route("/")
     def home():
         current_session_id = get_session_id()
         current_session = session_repo.get(current_session_id) if current_session_id else None
-        return render_template("home.html", session=current_session)
+        return render("home.html", session=current_session)
 
     @app.route("/filters", methods=["GET", "POST"])
     def filters():
@@ -92,9 +264,9 @@ def create_app() -> Flask:
             return redirect(url_for("start"))
 
         filters_data = session.get("filters", {"genres": [], "duration": ""})
-        return render_template(
+        return render(
             "filters.html",
-            genres=all_genres,
+            genres=catalog_state["genres"],
             selected_genres=filters_data.get("genres", []),
             selected_duration=filters_data.get("duration", ""),
         )
@@ -138,10 +310,11 @@ def create_app() -> Flask:
                 if movie_int is not None:
                     session_service.register_decision(current_session_id, movie_int, decision, score=score_val)
             current_session = session_repo.get(current_session_id)
+            warm_recommendations(current_session)
             if current_session.is_completed():
                 return redirect(url_for("results"))
 
-        filters_data = session.get("filters", {"genres": [], "duration": ""})
+        filters_data = current_filters()
         movie = session_service.get_next_movie(current_session_id, filters=filters_data)
         if movie is None:
             return redirect(url_for("results"))
@@ -150,9 +323,9 @@ def create_app() -> Flask:
             "current": current_session.valid_ratings_count,
             "target": current_session.target_ratings,
         }
-        min_for_recs = 5
+        min_for_recs = MIN_FOR_RECS
         remaining_for_recs = max(0, min_for_recs - current_session.valid_ratings_count)
-        return render_template(
+        return render(
             "swipe.html",
             movie=movie,
             progress=progress,
@@ -175,7 +348,7 @@ def create_app() -> Flask:
         if current_session is None:
             return redirect(url_for("start"))
 
-        if current_session.valid_ratings_count < 5:
+        if current_session.valid_ratings_count < MIN_FOR_RECS:
             return redirect(url_for("swipe"))
 
         if request.method == "POST":
@@ -192,25 +365,121 @@ def create_app() -> Flask:
             except ValueError:
                 movie_int = None
             if movie_int is not None and score_val:
-                interaction = Interaction(
-                    id=interaction_repo.next_id(),
-                    user_id=current_session.user_id,
-                    movie_id=movie_int,
-                    session_id=current_session.id,
-                    decision=Interaction.LIKE,
-                    score=score_val,
-                )
-                interaction_repo.add(interaction)
+                session_service.rate_recommendation(current_session.id, movie_int, score_val)
 
-        filters_data = session.get("filters", {"genres": [], "duration": ""})
-        recs = recommendation_service.recommend_movies(
-            user_id=1, session_id=current_session_id, k=10, include_breakdown=True, filters=filters_data
+        recs = warmer.get(
+            user_id=1, session_id=current_session_id, k=10, include_breakdown=True, filters=current_filters()
         )
-        return render_template("results.html", recommendations=recs, session=current_session)
+        if current_session.is_completed():
+            # La sesión ya no suma valoraciones: no hace falta seguir guardando su cálculo.
+            warmer.forget(current_session_id)
+        return render("results.html", recommendations=recs, session=current_session)
+
+    @app.route("/api/swipe/next")
+    def api_swipe_next():
+        """Próximas N películas de la sesión en una sola respuesta (`?count=`, por defecto 5)."""
+        current_session = session_repo.get(get_session_id() or 0)
+        if current_session is None:
+            return jsonify({"error": "no hay una sesión activa"}), 409
+        try:
+            count = min(MAX_PREFETCH, max(1, int(request.args.get("count", "5"))))
+        except ValueError:
+            return jsonify({"error": "count debe ser un entero"}), 400
+        movies = session_service.get_next_movies(current_session.id, count, filters=current_filters())
+        return jsonify({"movies": [asdict(movie) for movie in movies], "progress": progress_payload(current_session)})
+
+    @app.route("/api/swipe/decisions", methods=["POST"])
+    def api_swipe_decisions():
+        """Registra varias decisiones de una vez y devuelve el progreso y las siguientes películas."""
+        current_session = session_repo.get(get_session_id() or 0)
+        if current_session is None:
+            return jsonify({"error": "no hay una sesión activa"}), 409
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({"error": "el cuerpo debe ser un objeto JSON"}), 400
+        decisions = parse_decisions(payload.get("decisions"))
+        if decisions is None:
+            return jsonify({"error": "decisions debe ser una lista de {movie_id, decision, score 1-5}"}), 400
+
+        stored = session_service.register_decisions(current_session.id, decisions)
+        current_session = session_repo.get(current_session.id)
+        warm_recommendations(current_session)
+        try:
+            count = min(MAX_PREFETCH, max(0, int(payload.get("prefetch", 5))))
+        except (TypeError, ValueError):
+            count = 5
+        movies = session_service.get_next_movies(current_session.id, count, filters=current_filters()) if count else []
+        return jsonify(
+            {
+                "registered": len(stored),
+                "progress": progress_payload(current_session),
+                "movies": [asdict(movie) for movie in movies],
+            }
+        )
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        if not metrics.enabled:
+            abort(404)
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    def is_admin_token(value: Optional[str]) -> bool:
+        token = os.getenv("ADMIN_TOKEN")
+        return bool(token) and value == token
+
+    def require_admin() -> None:
+        if not is_admin_token(request.headers.get("X-Admin-Token")):
+            abort(404)
+
+    profiles = ProfileStore(capacity=int(os.getenv("PROFILE_BUFFER_SIZE", "50")))
+    sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0") or 0)
+    if os.getenv("ADMIN_TOKEN") or sample_rate > 0:
+        app.wsgi_app = ProfilingMiddleware(app.wsgi_app, profiles, is_admin_token, sample_rate=sample_rate)
+    app.extensions["request_profiles"] = profiles
+
+    @app.route("/admin/profiles")
+    def admin_profiles():
+        """Resumen de los últimos perfiles guardados (el más reciente primero)."""
+        require_admin()
+        return jsonify([profile.summary() for profile in profiles.list()])
+
+    @app.route("/admin/profiles/<int:profile_id>")
+    def admin_profile(profile_id: int):
+        """Pilas del perfil en formato collapsed (para flamegraph.pl o speedscope)."""
+        require_admin()
+        profile = profiles.get(profile_id)
+        if profile is None:
+            abort(404)
+        return Response(profile.collapsed(), mimetype="text/plain")
+
+    @app.route("/admin/catalog/reload", methods=["POST"])
+    def admin_catalog_reload():
+        require_admin()
+        if request.args.get("wait") in ("1", "true"):
+            return jsonify(reloader.reload().as_dict())
+        reloader.reload_in_background()
+        return jsonify({"status": "reloading"}), 202
 
     return app
 
 
+def install_catalog_reload(app: Flask) -> None:
+    """Recarga del catálogo por SIGHUP y, con `CATALOG_WATCH_SECONDS`, al cambiar `movies.json`.
+
+    Efectos globales del proceso (handler de señal e hilo vigilante): los
+    instalan los puntos de entrada, no `create_app`. Ambos esperan a que
+    termine la carga inicial del catálogo, así que no compiten con el
+    warm-up del modo lazy.
+    """
+    reloader = app.extensions["catalog_reloader"]
+    ready = app.extensions["catalog_ready"]
+    reloader.install_signal_handler(ready=ready)
+    watch_seconds = float(os.getenv("CATALOG_WATCH_SECONDS", "0") or 0)
+    if watch_seconds > 0:
+        reloader.watch(interval=watch_seconds, ready=ready)
+
+
 if __name__ == "__main__":
     app = create_app()
+    install_catalog_reload(app)
     app.run(debug=True, port=int(os.getenv("PORT", "5000")))
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from dataclasses import dataclass, field
+from http.cookiejar import CookieJar
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from movie_recommender_fuzzy.benchmarks.suite import percentile
+from movie_recommender_fuzzy.benchmarks.synthetic import DECISION_WEIGHTS
+from movie_recommender_fuzzy.domain.models import Interaction
+from movie_recommender_fuzzy.web.throughput_bench import running_server
+
+# La película que muestra `/swipe` viaja en un input oculto del formulario.
+MOVIE_ID_PATTERN = re.compile(r'name="movie_id" value="(\d+)"')
+# Tope de swipes por flujo, por si la sesión se queda sin películas que mostrar.
+MAX_SWIPES = 100
+
+# (estado HTTP, cuerpo, path al que redirige o None)
+Reply = Tuple[int, str, Optional[str]]
+
+
+class FlaskClientTransport:
+    """Transporte en proceso: el `test_client` de la app, con cookies propias por usuario."""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method: str, path: str, form: Optional[Mapping[str, str]] = None) -> Reply:
+        response = self._client.open(path, method=method, data=form)
+        location = response.headers.get("Location")
+        return response.status_code, response.get_data(as_text=True), _path_of(location)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *_args, **_kwargs):
+        return None
+
+
+class HttpTransport:
+    """Transporte sobre un socket local: `urllib` contra `base_url`, sin seguir redirecciones."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), _NoRedirect())
+
+    def request(self, method: str, path: str, form: Optional[Mapping[str, str]] = None) -> Reply:
+        data = urllib.parse.urlencode(form).encode("utf-8") if form is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        try:
+            with self._opener.open(req, timeout=self.timeout) as response:
+                return response.status, response.read().decode("utf-8", "replace"), None
+        except urllib.error.HTTPError as exc:
+            body = exc.read().decode("utf-8", "replace")
+            return exc.code, body, _path_of(exc.headers.get("Location"))
+
+
+def _path_of(location: Optional[str]) -> Optional[str]:
+    return urllib.parse.urlsplit(location).path if location else None
+
+
+@dataclass
+class UserStats:
+    """Lo que midió un usuario simulado: latencias por ruta, errores y flujos completos."""
+
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    errors: Counter = field(default_factory=Counter)
+    statuses: Counter = field(default_factory=Counter)
+    flows: int = 0
+
+
+class AbortFlow(Exception):
+    """El servidor respondió algo que no permite seguir el flujo; el usuario arranca uno nuevo."""
+
+
+class SimulatedUser:
+    """Un usuario que recorre `/start` → N×`/swipe` → `/results` con pausas entre acciones.
+
+    Las decisiones siguen `decision_weights` (por defecto la misma mezcla que el
+    log sintético de `benchmarks`) y las pausas son exponenciales con media
+    `think_time` segundos, como las de una persona leyendo la ficha.
+    """
+
+    def __init__(
+        self,
+        transport,
+        rng: random.Random,
+        think_time: float = 0.5,
+        decision_weights: Optional[Mapping[str, float]] = None,
+    ):
+        self.transport = transport
+        self.rng = rng
+        self.think_time = think_time
+        weights = decision_weights or DECISION_WEIGHTS
+        self._decisions, self._weights = list(weights), list(weights.values())
+        self.stats = UserStats()
+
+    def _think(self) -> None:
+        if self.think_time > 0:
+            time.sleep(self.rng.expovariate(1.0 / self.think_time))
+
+    def _call(self, method: str, path: str, form: Optional[Mapping[str, str]] = None) -> Reply:
+        route = f"{method} {path}"
+        started = time.perf_counter()
+        try:
+            status, body, location = self.transport.request(method, path, form)
+        except OSError as exc:
+            self.stats.errors[route] += 1
+            self.stats.statuses[type(exc).__name__] += 1
+            raise AbortFlow(route) from exc
+        self.stats.latencies.setdefault(route, []).append((time.perf_counter() - started) * 1000)
+        self.stats.statuses[str(status)] += 1
+        if status >= 400:
+            self.stats.errors[route] += 1
+            raise AbortFlow(route)
+        return status, body, location
+
+    def _movie_id(self, route: str, body: str) -> str:
+        match = MOVIE_ID_PATTERN.search(body)
+        if match is None:
+            self.stats.errors[route] += 1
+            raise AbortFlow(route)
+        return match.group(1)
+
+    def run_flow(self) -> None:
+        """Un flujo completo; si el servidor falla a mitad se corta y cuenta como error de esa ruta."""
+        try:
+            self._call("GET", "/start")
+            _status, body, location = self._call("GET", "/swipe")
+            for _ in range(MAX_SWIPES):
+                if location is not None:
+                    break
+                movie_id = self._movie_id("GET /swipe", body)
+                self._think()
+                decision = self.rng.choices(self._decisions, weights=self._weights)[0]
+                form = {"movie_id": movie_id, "decision": decision}
+                if decision != Interaction.NOT_SEEN:
+                    form["score"] = str(self.rng.randint(1, 5))
+                _status, body, location = self._call("POST", "/swipe", form)
+            self._think()
+            self._call("GET", "/results")
+            self.stats.flows += 1
+        except AbortFlow:
+            pass
+
+    def run(self, deadline: float, max_flows: Optional[int] = None) -> UserStats:
+        while time.monotonic() < deadline and (max_flows is None or self.stats.flows < max_flows):
+            self.run_flow()
+        return self.stats
+
+
+def run_load(
+    make_transport: Callable[[], object],
+    users: int = 20,
+    duration: float = 30.0,
+    think_time: float = 0.5,
+    max_flows: Optional[int] = None,
+    seed: int = 0,
+    decision_weights: Optional[Mapping[str, float]] = None,
+) -> Dict[str, object]:
+    """Corre `users` usuarios concurrentes (hilos) durante `duration` segundos y devuelve el reporte.
+
+    Cada usuario tiene su propio transporte (sus cookies, su sesión) y su propio
+    generador aleatorio derivado de `seed`. Con `max_flows` cada usuario se
+    detiene tras esa cantidad de flujos completos aunque quede tiempo.
+    """
+    deadline = time.monotonic() + duration
+    simulated = [
+        SimulatedUser(make_transport(), random.Random(f"{seed}:{index}"), think_time, decision_weights)
+        for index in range(users)
+    ]
+    threads = [
+        threading.Thread(target=user.run, args=(deadline, max_flows), name=f"load-user-{index}", daemon=True)
+        for index, user in enumerate(simulated)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return build_report([user.stats for user in simulated], elapsed, users)
+
+
+def build_report(stats: List[UserStats], elapsed: float, users: int) -> Dict[str, object]:
+    """Junta lo medido por cada usuario: throughput, percentiles por ruta y tasa de error."""
+    latencies: Dict[str, List[float]] = {}
+    errors: Counter = Counter()
+    statuses: Counter = Counter()
+    for user in stats:
+        for route, samples in user.latencies.items():
+            latencies.setdefault(route, []).extend(samples)
+        errors.update(user.errors)
+        statuses.update(user.statuses)
+
+    requests = sum(statuses.values())
+    total_errors = sum(errors.values())
+    flows = sum(user.flows for user in stats)
+    routes = {}
+    for route in sorted(latencies.keys() | errors.keys()):
+        samples = latencies.get(route, [])
+        routes[route] = {
+            "requests": len(samples),
+            "errors": errors[route],
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p90_ms": round(percentile(samples, 90), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "max_ms": round(max(samples, default=0.0), 2),
+        }
+    return {
+        "users": users,
+        "elapsed_s": round(elapsed, 2),
+        "requests": requests,
+        "requests_per_s": round(requests / elapsed, 1) if elapsed else 0.0,
+        "flows": flows,
+        "flows_per_s": round(flows / elapsed, 2) if elapsed else 0.0,
+        "errors": total_errors,
+        "error_rate": round(total_errors / requests, 4) if requests else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+        "routes": routes,
+    }
+
+
+def format_report(report: Mapping[str, object]) -> str:
+    """Tabla de texto con el resumen y una fila por ruta."""
+    lines = [
+        f"{report['users']} usuarios, {report['elapsed_s']}s: {report['requests']} peticiones "
+        f"({report['requests_per_s']}/s), {report['flows']} flujos completos ({report['flows_per_s']}/s), "
+        f"tasa de error {float(report['error_rate']) * 100:.2f}%",
+        f"{'ruta':<14} {'peticiones':>10} {'errores':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}",
+    ]
+    for route, row in report["routes"].items():
+        lines.append(
+            f"{route:<14} {row['requests']:>10} {row['errors']:>8} {row['p50_ms']:>9.2f} "
+            f"{row['p90_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Prueba de carga del flujo /start → /swipe → /results con usuarios concurrentes."
+    )
+    parser.add_argument("--users", type=int, default=20, help="Usuarios concurrentes")
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Pausa media entre acciones (segundos)")
+    parser.add_argument("--flows", type=int, default=None, help="Flujos completos por usuario como máximo")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--mix",
+        type=float,
+        nargs=3,
+        metavar=("LIKE", "DISLIKE", "NOT_SEEN"),
+        default=None,
+        help="Pesos de cada decisión (por defecto 0.45 0.35 0.20)",
+    )
+    parser.add_argument("--url", default=None, help="Servidor ya levantado (p. ej. http://127.0.0.1:8000)")
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Levanta `serve` con N workers en un puerto local y lo carga por HTTP"
+    )
+    parser.add_argument("--data", default=None, help="Catálogo JSON para la app (en proceso o levantada)")
+    parser.add_argument("--json", action="store_true", help="Imprime el reporte en JSON")
+    args = parser.parse_args()
+
+    mix = dict(zip((Interaction.LIKE, Interaction.DISLIKE, Interaction.NOT_SEEN), args.mix)) if args.mix else None
+    data = Path(args.data) if args.data else None
+
+    def load(make_transport: Callable[[], object]) -> Dict[str, object]:
+        return run_load(make_transport, args.users, args.duration, args.think_time, args.flows, args.seed, mix)
+
+    if args.url:
+        report = load(lambda: HttpTransport(args.url))
+    elif args.workers > 0:
+        with running_server(args.workers, data) as base_url:
+            report = load(lambda: HttpTransport(base_url))
+    else:
+        from movie_recommender_fuzzy.web.app import create_app
+
+        app = create_app(data_path=data, lazy=False)
+        report = load(lambda: FlaskClientTransport(app))
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    if report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
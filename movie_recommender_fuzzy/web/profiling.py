@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Sequence
+
+# Hilos que trabajan para una petición aunque no sean el suyo (p. ej. el precálculo de recomendaciones).
+HELPER_THREAD_PREFIXES = ("recs-warmup",)
+
+
+def frame_label(frame) -> str:
+    """`módulo:Clase.función` del frame, legible en un flame graph."""
+    module = frame.f_globals.get("__name__", "?").rsplit(".", 1)[-1]
+    code = frame.f_code
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """Profiler por muestreo: cada `interval` segundos anota la pila de los hilos observados.
+
+    Observa el hilo que lo arranca y los hilos cuyo nombre empieza con alguno
+    de `helper_prefixes`. Las pilas se acumulan en formato "collapsed" (una
+    línea `hilo;frame;frame;... cuenta`), el que consumen `flamegraph.pl` o
+    speedscope.
+    """
+
+    def __init__(self, interval: float = 0.001, helper_prefixes: Sequence[str] = HELPER_THREAD_PREFIXES):
+        self.interval = interval
+        self.helper_prefixes = tuple(helper_prefixes)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _observed(self) -> Dict[int, str]:
+        observed = {}
+        for thread in threading.enumerate():
+            if thread.ident == self._target:
+                observed[thread.ident] = "request"
+            elif thread.name.startswith(self.helper_prefixes):
+                observed[thread.ident] = thread.name
+        return observed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        frames = sys._current_frames()
+        for ident, thread_name in self._observed().items():
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            labels: List[str] = []
+            while frame is not None:
+                labels.append(frame_label(frame))
+                frame = frame.f_back
+            labels.append(thread_name)
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+
+@dataclass
+class RequestProfile:
+    """Perfil de una petición: pilas muestreadas y datos para ubicarla."""
+
+    id: int
+    method: str
+    path: str
+    trigger: str  # "header" o "sampling"
+    started_at: datetime
+    duration_ms: float
+    samples: int
+    stacks: Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, object]:
+        hottest = Counter()
+        for stack, count in self.stacks.items():
+            hottest[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": self.samples,
+            "top_frames": hottest.most_common(5),
+        }
+
+    def collapsed(self) -> str:
+        ordered = sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        return "".join(f"{stack} {count}\n" for stack, count in ordered)
+
+
+class ProfileStore:
+    """Buffer circular con los últimos `capacity` perfiles."""
+
+    def __init__(self, capacity: int = 50):
+        self._profiles: Deque[RequestProfile] = deque(maxlen=capacity)
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            profile_id = self._next_id
+            self._next_id += 1
+            return profile_id
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+    def list(self) -> List[RequestProfile]:
+        """Perfiles guardados, el más reciente primero."""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+
+class ProfilingMiddleware:
+    """Middleware WSGI que perfila peticiones puntuales sin reiniciar la app.
+
+    Se perfila una petición si trae `X-Profile: 1` junto con un
+    `X-Admin-Token` válido (`is_authorized`), o al azar con probabilidad
+    `sample_rate`. El resto pasa directo, sin costo extra.
+    """
+
+    def __init__(
+        self,
+        wsgi_app: Callable,
+        store: ProfileStore,
+        is_authorized: Callable[[Optional[str]], bool],
+        sample_rate: float = 0.0,
+        interval: float = 0.001,
+        rng: Optional[random.Random] = None,
+    ):
+        self.wsgi_app = wsgi_app
+        self.store = store
+        self.is_authorized = is_authorized
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self._rng = rng or random.Random()
+
+    def _trigger(self, environ) -> Optional[str]:
+        if environ.get("HTTP_X_PROFILE") in ("1", "true") and self.is_authorized(environ.get("HTTP_X_ADMIN_TOKEN")):
+            return "header"
+        if self.sample_rate > 0 and self._rng.random() < self.sample_rate:
+            return "sampling"
+        return None
+
+    def __call__(self, environ, start_response) -> Iterable[bytes]:
+        trigger = self._trigger(environ)
+        if trigger is None:
+            return self.wsgi_app(environ, start_response)
+
+        started_at = datetime.now()
+        started = time.perf_counter()
+        sampler = StackSampler(interval=self.interval).start()
+        try:
+            # Se consume el cuerpo dentro del perfil: incluye el render de la respuesta.
+            result = self.wsgi_app(environ, start_response)
+            try:
+                body = list(result)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        finally:
+            sampler.stop()
+            self.store.add(
+                RequestProfile(
+                    id=self.store.next_id(),
+                    method=environ.get("REQUEST_METHOD", ""),
+                    path=environ.get("PATH_INFO", ""),
+                    trigger=trigger,
+                    started_at=started_at,
+                    duration_ms=(time.perf_counter() - started) * 1000,
+                    samples=sampler.samples,
+                    stacks=dict(sampler.stacks),
+                )
+            )
+        return body
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from movie_recommender_fuzzy.web.app import create_app
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parents[1] / "data" / "movies.json"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _touch_catalog(path: Path, round_number: int, changed: int) -> None:
+    """Modifica la popularidad de `changed` películas para forzar un delta."""
+    items = json.loads(path.read_text(encoding="utf-8"))
+    for item in items[:changed]:
+        item["popularity"] = float(item.get("popularity", 0.0)) + 0.001 * (round_number + 1)
+    path.write_text(json.dumps(items), encoding="utf-8")
+
+
+def measure_reload_latency(
+    catalog_path: Path = DEFAULT_CATALOG_PATH,
+    clients: int = 4,
+    reloads: int = 5,
+    changed: int = 50,
+) -> Dict[str, Dict[str, float]]:
+    """Mide la latencia de `/swipe` con y sin una recarga de catálogo en curso."""
+    workdir = Path(tempfile.mkdtemp(prefix="catalog-reload-"))
+    try:
+        data_path = workdir / "movies.json"
+        shutil.copy(catalog_path, data_path)
+        app = create_app(data_path=data_path)
+        reloader = app.extensions["catalog_reloader"]
+
+        reloading = threading.Event()
+        done = threading.Event()
+        samples: List[Tuple[bool, float]] = []
+        lock = threading.Lock()
+
+        def worker() -> None:
+            client = app.test_client()
+            client.get("/start")
+            local: List[Tuple[bool, float]] = []
+            while not done.is_set():
+                during = reloading.is_set()
+                started = time.perf_counter()
+                client.get("/swipe")
+                local.append((during or reloading.is_set(), time.perf_counter() - started))
+            with lock:
+                samples.extend(local)
+
+        threads = [threading.Thread(target=worker) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+
+        reload_stats = []
+        for round_number in range(reloads):
+            time.sleep(0.2)
+            _touch_catalog(data_path, round_number, changed)
+            reloading.set()
+            reload_stats.append(reloader.reload().as_dict())
+            reloading.clear()
+        time.sleep(0.2)
+        done.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report: Dict[str, Dict[str, float]] = {}
+    for label, flag in (("steady", False), ("during_reload", True)):
+        values = [latency for during, latency in samples if during is flag]
+        report[label] = {
+            "requests": len(values),
+            "p50_ms": _percentile(values, 50) * 1000,
+            "p99_ms": _percentile(values, 99) * 1000,
+            "mean_ms": (statistics.fmean(values) * 1000) if values else 0.0,
+        }
+    report["reload"] = {
+        "build_ms_max": max(stat["build_ms"] for stat in reload_stats),
+        "swap_ms_max": max(stat["swap_ms"] for stat in reload_stats),
+    }
+    return report
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Latencia de /swipe durante recargas de catálogo.")
+    parser.add_argument("--catalog", default=str(DEFAULT_CATALOG_PATH), help="Catálogo JSON base")
+    parser.add_argument("--clients", type=int, default=4, help="Clientes concurrentes")
+    parser.add_argument("--reloads", type=int, default=5, help="Cantidad de recargas")
+    parser.add_argument("--changed", type=int, default=50, help="Películas modificadas por recarga")
+    args = parser.parse_args()
+
+    report = measure_reload_latency(Path(args.catalog), args.clients, args.reloads, args.changed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
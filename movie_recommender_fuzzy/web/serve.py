@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import gc
+import os
+import signal
+import socket
+import time
+import traceback
+from pathlib import Path
+from typing import Dict
+
+from flask import Flask
+
+# Un worker que muere antes de MIN_UPTIME segundos cuenta como caída rápida:
+# se reemplaza tras una espera que se duplica en cada caída seguida (hasta
+# MAX_RESPAWN_DELAY) y, pasadas MAX_QUICK_CRASHES, su lugar queda vacío.
+MIN_UPTIME = 5.0
+RESPAWN_DELAY = 0.5
+MAX_RESPAWN_DELAY = 30.0
+MAX_QUICK_CRASHES = 5
+
+
+def serve_prefork(app: Flask, host: str = "127.0.0.1", port: int = 8000, workers: int = 2) -> None:
+    """Sirve `app` con `workers` procesos hijos que comparten el socket de escucha.
+
+    La app (catálogo e índices incluidos) se construye una sola vez en el
+    proceso padre antes del `fork`, así que los workers la comparten
+    copy-on-write; `gc.freeze()` evita que el recolector de los hijos toque esas
+    páginas. El padre reemplaza workers caídos (con espera creciente si se
+    caen enseguida), reenvía SIGHUP (recarga del catálogo) y termina a todos
+    con SIGTERM/SIGINT. Los hijos atienden SIGHUP con el manejador que había
+    instalado antes de llamar a esta función (o el de por defecto).
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("El modo pre-fork necesita os.fork (no disponible en esta plataforma)")
+    from werkzeug.serving import make_server
+
+    listener = socket.create_server((host, port), backlog=1024)
+    listener.set_inheritable(True)
+    gc.collect()
+    gc.freeze()
+
+    previous = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP)}
+    children: Dict[int, int] = {}
+    started: Dict[int, float] = {}
+    quick_crashes: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, previous[signal.SIGHUP] or signal.SIG_DFL)
+            status = 0
+            try:
+                make_server(host, port, app, threaded=True, fd=listener.fileno()).serve_forever()
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                os._exit(status)
+        children[pid] = slot
+        started[slot] = time.monotonic()
+
+    def stop(_signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            os.kill(pid, signal.SIGTERM)
+
+    def forward(signum, _frame) -> None:
+        for pid in list(children):
+            os.kill(pid, signum)
+
+    for slot in range(workers):
+        spawn(slot)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, forward)
+
+    try:
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot = children.pop(pid, None)
+            if stopping or slot is None:
+                continue
+            quick = time.monotonic() - started[slot] < MIN_UPTIME
+            crashes = quick_crashes[slot] = quick_crashes.get(slot, 0) + 1 if quick else 0
+            if crashes > MAX_QUICK_CRASHES:
+                print(f"worker {slot} se cayó {crashes} veces seguidas; no se reemplaza", flush=True)
+                continue
+            print(f"worker {slot} (pid {pid}) terminó con estado {os.waitstatus_to_exitcode(status)}", flush=True)
+            if crashes:
+                time.sleep(min(MAX_RESPAWN_DELAY, RESPAWN_DELAY * 2 ** (crashes - 1)))
+            if not stopping:
+                spawn(slot)
+    finally:
+        listener.close()
+        for signum, handler in previous.items():
+            signal.signal(signum, handler if handler is not None else signal.SIG_DFL)
+
+
+def main() -> None:
+    import argparse
+
+    from movie_recommender_fuzzy.infra.catalog import DEFAULT_CATALOG_PATH
+    from movie_recommender_fuzzy.web.app import create_app, install_catalog_reload
+
+    parser = argparse.ArgumentParser(description="Servidor de producción pre-fork con sesiones compartidas en SQLite.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos worker")
+    parser.add_argument("--data", default=str(DEFAULT_CATALOG_PATH), help="Catálogo JSON")
+    parser.add_argument(
+        "--session-db",
+        default=os.getenv("SESSION_DB_PATH") or str(DEFAULT_CATALOG_PATH.with_name("sessions.db")),
+        help="Archivo SQLite compartido para sesiones e interacciones",
+    )
+    args = parser.parse_args()
+
+    app = create_app(data_path=Path(args.data), lazy=False, session_db=Path(args.session_db))
+    install_catalog_reload(app)
+    print(f"Sirviendo en http://{args.host}:{args.port} con {args.workers} workers", flush=True)
+    serve_prefork(app, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# Se ejecuta en un proceso nuevo para medir imports y arranque en frío reales.
+_PROBE = """
+import json, time
+t0 = time.perf_counter()
+from movie_recommender_fuzzy.web.app import create_app
+t_import = time.perf_counter()
+app = create_app(lazy={lazy})
+t_app = time.perf_counter()
+client = app.test_client()
+client.get("/healthz")
+t_live = time.perf_counter()
+app.extensions["catalog_ready"].wait(60)
+t_ready = time.perf_counter()
+client.get("/start")
+client.get("/swipe")
+t_first = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (t_import - t0) * 1000,
+    "create_app_ms": (t_app - t_import) * 1000,
+    "live_ms": (t_live - t0) * 1000,
+    "ready_ms": (t_ready - t0) * 1000,
+    "first_swipe_ms": (t_first - t_ready) * 1000,
+}}))
+"""
+
+
+def measure_startup(lazy: bool, repeat: int = 5) -> Dict[str, float]:
+    """Mediana de tiempos de import, creación de app, liveness, readiness y primer `/swipe`."""
+    runs: List[Dict[str, float]] = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(lazy=lazy)], check=True, capture_output=True, text=True
+        )
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return {key: round(statistics.median(run[key] for run in runs), 3) for key in runs[0]}
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark de arranque: imports y latencia de la primera petición.")
+    parser.add_argument("--repeat", type=int, default=5, help="Procesos por modo")
+    args = parser.parse_args()
+
+    report = {"eager": measure_startup(False, args.repeat), "lazy": measure_startup(True, args.repeat)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
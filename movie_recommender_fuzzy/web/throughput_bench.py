@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from http.cookiejar import CookieJar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al arrancar (código {server.returncode})")
+        try:
+            with urllib.request.urlopen(base_url + "/readyz", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (OSError, urllib.error.URLError):
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"El servidor en {base_url} no quedó listo en {timeout}s")
+
+
+def _client_loop(base_url: str, duration: float) -> Tuple[int, int, List[float]]:
+    """Un cliente: inicia una sesión y swipea (`next` + `decisions`) hasta agotar el tiempo.
+
+    Devuelve peticiones completadas, errores y latencias en ms.
+    """
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+    latencies: List[float] = []
+    errors = 0
+    like = True
+
+    def call(path: str, body: Optional[dict] = None) -> Optional[dict]:
+        nonlocal errors
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(base_url + path, data=data, headers={"Content-Type": "application/json"})
+        started = time.perf_counter()
+        try:
+            with opener.open(req, timeout=30) as response:
+                payload = response.read()
+        except (OSError, urllib.error.URLError):
+            errors += 1
+            return None
+        latencies.append((time.perf_counter() - started) * 1000)
+        try:
+            return json.loads(payload)
+        except ValueError:
+            return {}
+
+    deadline = time.monotonic() + duration
+    call("/start")
+    while time.monotonic() < deadline:
+        batch = call("/api/swipe/next?count=1")
+        movies = (batch or {}).get("movies") or []
+        if not movies or (batch or {}).get("progress", {}).get("completed"):
+            call("/start")
+            continue
+        decision = "LIKE" if like else "DISLIKE"
+        like = not like
+        body = {"decisions": [{"movie_id": movies[0]["id"], "decision": decision}], "prefetch": 0}
+        call("/api/swipe/decisions", body)
+    return len(latencies), errors, latencies
+
+
+@contextmanager
+def running_server(workers: int, catalog: Optional[Path] = None) -> Iterator[str]:
+    """Levanta `serve` con `workers` procesos en un puerto libre y entrega su URL base ya lista."""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        command = [
+            sys.executable,
+            "-m",
+            "movie_recommender_fuzzy.web.serve",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--session-db",
+            str(Path(tmp) / "sessions.db"),
+        ]
+        if catalog is not None:
+            command += ["--data", str(catalog)]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_ready(base_url, server)
+            yield base_url
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def measure_throughput(
+    workers: int, clients: int, duration: float, catalog: Optional[Path] = None
+) -> Dict[str, float]:
+    """Levanta `serve` con `workers` procesos y lo carga con `clients` clientes en paralelo."""
+    with running_server(workers, catalog) as base_url:
+        with ProcessPoolExecutor(max_workers=clients) as pool:
+            started = time.perf_counter()
+            results = list(pool.map(_client_loop, [base_url] * clients, [duration] * clients))
+            elapsed = time.perf_counter() - started
+
+    requests = sum(count for count, _errors, _latencies in results)
+    latencies = sorted(latency for _count, _errors, client_latencies in results for latency in client_latencies)
+    return {
+        "workers": workers,
+        "requests": requests,
+        "errors": sum(errors for _count, errors, _latencies in results),
+        "requests_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else 0.0,
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))], 2) if latencies else 0.0,
+    }
+
+
+def run_benchmark(
+    worker_counts: Sequence[int] = (1, 2, 4, 8),
+    clients: int = 16,
+    duration: float = 10.0,
+    catalog: Optional[Path] = None,
+) -> List[Dict[str, float]]:
+    """Una medición por cantidad de workers, con la misma carga."""
+    return [measure_throughput(workers, clients, duration, catalog) for workers in worker_counts]
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Throughput del servidor pre-fork según la cantidad de workers.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Cantidades de workers a medir")
+    parser.add_argument("--clients", type=int, default=16, help="Clientes concurrentes (procesos)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de carga por medición")
+    parser.add_argument("--data", default=None, help="Catálogo JSON (por defecto el del servidor)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.workers, args.clients, args.duration, Path(args.data) if args.data else None)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()